@@ -1,6 +1,6 @@
 #!/usr/bin/bash
 
-python3 src/main.py
+python3 src/main.py "$@"
 echo "Starting up the server...."
-cd public && python3 -m http.server 8888
+python3 src/serve.py --port 8888 --directory public
 
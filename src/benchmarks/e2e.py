@@ -0,0 +1,206 @@
+# end to end build benchmarks on a synthetic site, with a regression gate
+#
+#   PYTHONPATH=src python -m benchmarks.e2e run --pages 500 --output bench.json
+#   PYTHONPATH=src python -m benchmarks.e2e compare baseline.json bench.json --threshold 0.15
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import DEFAULT_BLOCK_MIX, generate_site
+
+MAIN_PATH = Path(__file__).resolve().parent.parent / "main.py"
+
+
+# runs one build of the site in a fresh interpreter, exactly like main.sh does
+def timed_build(site: Path, build_args: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, str(MAIN_PATH), *build_args],
+        cwd=site,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def clean_outputs(site: Path) -> None:
+    public = site / "public"
+    if public.is_symlink():
+        public.unlink()
+    else:
+        shutil.rmtree(public, ignore_errors=True)
+    shutil.rmtree(site / ".public-generations", ignore_errors=True)
+    shutil.rmtree(site / ".ssg-cache", ignore_errors=True)
+
+
+# full cold build, no-op incremental build and a rebuild after editing a single page
+def measure(site: Path, pages: list[Path], repeat: int, build_args: list[str]) -> dict:
+    full, noop, single = [], [], []
+
+    for i in range(repeat):
+        clean_outputs(site)
+        full.append(timed_build(site, build_args))
+        noop.append(timed_build(site, build_args))
+
+        edited = pages[i % len(pages)]
+        edited.write_text(edited.read_text(encoding="utf-8") + f"\nedit {i}\n", encoding="utf-8")
+        single.append(timed_build(site, build_args))
+
+    def summary(samples: list[float]) -> dict[str, float]:
+        return {"min": min(samples), "median": statistics.median(samples)}
+
+    return {
+        "full_build": summary(full),
+        "noop_build": summary(noop),
+        "single_page_rebuild": summary(single),
+    }
+
+
+# returns (metric, baseline, current, slowdown) for every metric slower than allowed
+def find_regressions(
+    baseline: dict,
+    current: dict,
+    threshold: float,
+) -> list[tuple[str, float, float, float]]:
+    regressions = []
+    for metric, values in current["results"].items():
+        if metric not in baseline["results"]:
+            continue
+        before = baseline["results"][metric]["min"]
+        after = values["min"]
+        slowdown = after / before - 1 if before else 0.0
+        if slowdown > threshold:
+            regressions.append((metric, before, after, slowdown))
+    return regressions
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    print(f"{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for metric, values in current["results"].items():
+        before = baseline["results"].get(metric, {}).get("min")
+        if before is None:
+            print(f"{metric:<22}{'-':>12}{values['min']:>11.3f}s{'new':>10}")
+            continue
+        change = values["min"] / before - 1 if before else 0.0
+        print(f"{metric:<22}{before:>11.3f}s{values['min']:>11.3f}s{change:>+10.1%}")
+
+    regressions = find_regressions(baseline, current, threshold)
+    for metric, _, _, slowdown in regressions:
+        print(f"REGRESSION: {metric} is {slowdown:.1%} slower (threshold {threshold:.0%})")
+    return not regressions
+
+
+# parses six comma separated block weights, e.g. "8,1,1,1,2,2"
+def block_mix(value: str) -> tuple[int, ...]:
+    try:
+        weights = tuple(int(weight) for weight in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid block mix: {value!r}")
+    if len(weights) != len(DEFAULT_BLOCK_MIX) or min(weights) < 0 or not any(weights):
+        raise argparse.ArgumentTypeError(
+            f"block mix needs {len(DEFAULT_BLOCK_MIX)} non negative weights, got {value!r}"
+        )
+    return weights
+
+
+def run(args: argparse.Namespace) -> int:
+    config = {
+        "pages": args.pages,
+        "depth": args.depth,
+        "blocks_per_page": args.blocks,
+        "giant_pages": args.giant_pages,
+        "giant_blocks": args.giant_blocks,
+        "inline_density": args.inline_density,
+        "link_density": args.link_density,
+        "image_density": args.image_density,
+        "block_mix": list(args.block_mix),
+        "seed": args.seed,
+        "jobs": args.jobs,
+        "repeat": args.repeat,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="ssg-bench-") as tmp:
+        site = Path(tmp)
+        pages = generate_site(
+            site,
+            pages=args.pages,
+            depth=args.depth,
+            blocks_per_page=args.blocks,
+            seed=args.seed,
+            inline_density=args.inline_density,
+            link_density=args.link_density,
+            image_density=args.image_density,
+            block_mix=args.block_mix,
+            giant_pages=args.giant_pages,
+            giant_blocks=args.giant_blocks,
+        )
+        results = measure(site, pages, args.repeat, ["--jobs", str(args.jobs)])
+
+    report = {
+        "config": config,
+        "python": platform.python_version(),
+        "results": results,
+    }
+    for metric, values in results.items():
+        print(f"{metric:<22}{values['min']:>9.3f}s min {values['median']:>9.3f}s median")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=1), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        return 0 if compare(baseline, report, args.threshold) else 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="End to end build benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="generate a site and time its builds")
+    run_parser.add_argument("--pages", type=int, default=200)
+    run_parser.add_argument("--depth", type=int, default=2)
+    run_parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    run_parser.add_argument("--giant-pages", type=int, default=0)
+    run_parser.add_argument("--giant-blocks", type=int, default=20000)
+    run_parser.add_argument("--inline-density", type=float, default=0.09)
+    run_parser.add_argument("--link-density", type=float, default=0.03)
+    run_parser.add_argument("--image-density", type=float, default=0.03)
+    run_parser.add_argument(
+        "--block-mix",
+        type=block_mix,
+        default=DEFAULT_BLOCK_MIX,
+        help="weights of paragraph, heading, code, quote, unordered and ordered list blocks",
+    )
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--jobs", type=int, default=1)
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", type=Path)
+    run_parser.add_argument("--baseline", type=Path)
+    run_parser.add_argument("--threshold", type=float, default=0.15)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.15)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return run(args)
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    return 0 if compare(baseline, current, args.threshold) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import argparse
+
+import pytest
+
+from benchmarks.e2e import block_mix, find_regressions
+from benchmarks.synthetic import generate_site
+
+
+def results(**mins):
+    return {"results": {metric: {"min": value, "median": value} for metric, value in mins.items()}}
+
+
+def test_find_regressions_uses_threshold():
+    baseline = results(full_build=1.0, noop_build=0.2)
+    current = results(full_build=1.1, noop_build=0.3, single_page_rebuild=0.5)
+
+    assert find_regressions(baseline, current, threshold=0.15) == [
+        ("noop_build", 0.2, 0.3, 0.3 / 0.2 - 1)
+    ]
+    assert find_regressions(baseline, current, threshold=0.6) == []
+
+
+def test_generate_site_is_reproducible(tmp_path):
+    first = generate_site(tmp_path / "a", pages=5, depth=3, blocks_per_page=5, seed=7)
+    second = generate_site(tmp_path / "b", pages=5, depth=3, blocks_per_page=5, seed=7)
+
+    assert [path.relative_to(tmp_path / "a") for path in first] == [
+        path.relative_to(tmp_path / "b") for path in second
+    ]
+    assert [path.read_text() for path in first] == [path.read_text() for path in second]
+    assert (tmp_path / "a" / "template.html").exists()
+    assert (tmp_path / "a" / "static" / "index.css").exists()
+
+
+def test_generate_site_giant_pages(tmp_path):
+    pages = generate_site(
+        tmp_path, pages=2, blocks_per_page=5, giant_pages=1, giant_blocks=500, static_files=0
+    )
+
+    assert len(pages) == 3
+    assert pages[2].stat().st_size > 10 * pages[0].stat().st_size
+
+
+def test_block_mix_parses_six_weights():
+    assert block_mix("8,1,0,1,2,2") == (8, 1, 0, 1, 2, 2)
+    for value in ("8,1,1", "a,b,c,d,e,f", "0,0,0,0,0,0", "1,1,1,1,1,-1"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            block_mix(value)
+
+
+def test_generate_site_densities_and_block_mix(tmp_path):
+    pages = generate_site(
+        tmp_path,
+        pages=3,
+        blocks_per_page=20,
+        link_density=0.0,
+        image_density=0.5,
+        block_mix=(1, 0, 0, 0, 0, 0),
+        static_files=0,
+    )
+    text = "".join(page.read_text() for page in pages)
+
+    assert "![" in text
+    assert "](https://example.com/" not in text
+    assert "```" not in text
+    assert "\n- " not in text
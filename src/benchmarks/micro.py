@@ -0,0 +1,238 @@
+# microbenchmarks for every parsing and rendering primitive, on typical and
+# adversarial inputs. reports ops/sec, the peak memory allocated per call and
+# how many memory blocks each call leaves allocated in its result
+#
+#   PYTHONPATH=src python -m benchmarks.micro --filter text_to_nodes --json micro.json
+#   PYTHONPATH=src python -m benchmarks.micro --scaling
+
+import argparse
+import json
+import random
+import sys
+import time
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.synthetic import SITE_TEMPLATE, sentence, synthetic_markdown
+from errors.syntax import MarkdownSyntaxError
+from generators.page_gen import inject_variables
+from nodes.blocks.block_types import block_to_blocktype
+from nodes.htmlnode import HTMLNode
+from nodes.leafnode import LeafNode
+from nodes.parentnode import ParentNode
+from nodes.textnode import TextNode, TextType
+from utils.asset_splitters import AssetType, split_asset_nodes
+from utils.markdown_to_blocks import markdown_to_blocks
+from utils.split_nodes_delemeter import split_nodes_delemeter
+from utils.text_to_nodes import text_to_nodes
+
+
+def deep_tree(depth: int) -> HTMLNode:
+    node: HTMLNode = LeafNode("leaf", "b")
+    for _ in range(depth):
+        node = ParentNode("span", [node])
+    return ParentNode("div", [node])
+
+
+def wide_tree(width: int) -> HTMLNode:
+    return ParentNode(
+        "ul",
+        [ParentNode("li", [LeafNode(f"item {i}", "a", {"href": f"/{i}"})]) for i in range(width)],
+    )
+
+
+def swallow_syntax_errors(func: Callable[[], object]) -> Callable[[], object]:
+    def call() -> object:
+        try:
+            return func()
+        except MarkdownSyntaxError:
+            return None
+
+    return call
+
+
+# name -> zero argument callable, inputs are built once up front
+def build_cases(unclosed_bracket_length: int) -> dict[str, Callable[[], object]]:
+    rng = random.Random(0)
+    prose = " ".join(sentence(rng, 40, 0.1, 0.025, 0.025) for _ in range(5))
+    underscores = "a_" * 5000 + "a"
+    nested_brackets = "[" * 2000 + "x" + "]" * 2000 + "(url)"
+    bracket_pairs = "[a]" * 3000
+    # the old link regex backtracked exponentially on this input
+    unclosed_bracket = "[" + "a" * unclosed_bracket_length
+    ordered_list = "\n".join(f"{i}. item {i}" for i in range(1, 1001))
+    document = synthetic_markdown(200, seed=1)
+    deep, wide = deep_tree(200), wide_tree(5000)
+
+    def plain(text: str) -> list[TextNode]:
+        return [TextNode(text, TextType.PLAIN)]
+
+    return {
+        "split_nodes_delemeter/prose": lambda: split_nodes_delemeter(
+            plain(prose), "**", TextType.BOLD_TEXT
+        ),
+        "split_nodes_delemeter/underscores": swallow_syntax_errors(
+            lambda: split_nodes_delemeter(plain(underscores), "_", TextType.ITALIC_TEXT)
+        ),
+        "split_asset_nodes/prose": lambda: split_asset_nodes(plain(prose), AssetType.LINK),
+        "split_asset_nodes/nested_brackets": lambda: split_asset_nodes(
+            plain(nested_brackets), AssetType.LINK
+        ),
+        "split_asset_nodes/bracket_pairs": lambda: split_asset_nodes(
+            plain(bracket_pairs), AssetType.LINK
+        ),
+        "split_asset_nodes/unclosed_bracket": lambda: split_asset_nodes(
+            plain(unclosed_bracket), AssetType.LINK
+        ),
+        "text_to_nodes/prose": lambda: text_to_nodes(prose),
+        "text_to_nodes/underscores": lambda: text_to_nodes(underscores),
+        "text_to_nodes/nested_brackets": lambda: text_to_nodes(nested_brackets),
+        "text_to_nodes/unclosed_bracket": lambda: text_to_nodes(unclosed_bracket),
+        "block_to_blocktype/paragraph": lambda: block_to_blocktype(prose),
+        "block_to_blocktype/ordered_list": lambda: block_to_blocktype(ordered_list),
+        "markdown_to_blocks/document": lambda: markdown_to_blocks(document),
+        "inject_variables/template": lambda: inject_variables(
+            SITE_TEMPLATE, {"Title": "title", "Content": prose}
+        ),
+        "to_html/deep_tree": deep.to_html,
+        "to_html/wide_tree": wide.to_html,
+    }
+
+
+def ops_per_second(func: Callable[[], object], min_time: float) -> float:
+    timer = timeit.Timer(func)
+    loops, elapsed = timer.autorange()
+    while elapsed < min_time:
+        loops *= 2
+        elapsed = timer.timeit(loops)
+    return loops / elapsed
+
+
+# peak bytes allocated while running a single call
+def peak_bytes_per_call(func: Callable[[], object]) -> int:
+    func()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start, _ = tracemalloc.get_traced_memory()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - start
+
+
+# memory blocks a call allocates that are still alive in its result. the
+# results of all calls are kept so the snapshots can count them, and the
+# difference is averaged over the calls. temporaries freed before a call
+# returns are not counted, peak_bytes_per_call covers those
+def allocations_per_call(func: Callable[[], object], calls: int = 20) -> float:
+    func()
+    results: list[object] = [None] * calls
+    own_traces = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot().filter_traces(own_traces)
+    for i in range(calls):
+        results[i] = func()
+    after = tracemalloc.take_snapshot().filter_traces(own_traces)
+    tracemalloc.stop()
+    return sum(stat.count_diff for stat in after.compare_to(before, "filename")) / calls
+
+
+# inputs that made the old link regex or a naive rescan blow up
+SCALING_PATTERNS: dict[str, Callable[[int], str]] = {
+    "open_brackets": lambda n: "[" * n,
+    "unclosed_label": lambda n: "[" + "a" * n,
+    "nested_unclosed": lambda n: "[a" * n,
+    "open_destinations": lambda n: "[a](" * n,
+    "open_titles": lambda n: '[a](u "' * n,
+    "images": lambda n: "![" * n + "]" * (n // 2),
+    "bracket_pairs": lambda n: "[a]" * n,
+    "underscores": lambda n: "_" * n,
+    "links_in_open_span": lambda n: "_" + "[a](u_)" * n,
+    "code_in_open_span": lambda n: "**" + "`**`" * n,
+}
+
+
+def best_time(func: Callable[[], object], repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+# how many times longer each link parser takes on every pattern when the
+# input grows from small to large. linear parsing stays near large / small,
+# quadratic parsing near its square
+def scaling_ratios(small: int = 2_000, large: int = 16_000) -> dict[str, float]:
+    parsers: dict[str, Callable[[str], object]] = {
+        "text_to_nodes": text_to_nodes,
+        "split_asset_nodes": lambda text: split_asset_nodes(
+            [TextNode(text, TextType.PLAIN)], AssetType.LINK
+        ),
+    }
+    ratios = {}
+    for pattern, build in SCALING_PATTERNS.items():
+        small_text, large_text = build(small), build(large)
+        for parser, parse in parsers.items():
+            small_time = best_time(lambda: parse(small_text))
+            large_time = best_time(lambda: parse(large_text))
+            ratios[f"{parser}/{pattern}"] = large_time / max(small_time, 1e-4)
+    return ratios
+
+
+# prints the growth of every pattern and returns whether all of them stayed
+# within a generous noise margin (3x) of linear
+def check_scaling(small: int = 2_000, large: int = 16_000) -> bool:
+    limit = large / small * 3
+    linear = True
+    print(f"{'case':<40}{'growth':>10}  (input grew {large / small:.0f}x)")
+    for name, ratio in scaling_ratios(small, large).items():
+        verdict = "" if ratio < limit else "  superlinear"
+        linear = linear and not verdict
+        print(f"{name:<40}{ratio:>9.1f}x{verdict}")
+    return linear
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for each primitive")
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per case")
+    parser.add_argument("--unclosed-bracket-length", type=int, default=10_000)
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    parser.add_argument(
+        "--scaling",
+        action="store_true",
+        help="check that link parsing grows linearly on worst case inputs, exit 1 if not",
+    )
+    args = parser.parse_args(argv)
+
+    if args.scaling:
+        if not check_scaling():
+            sys.exit(1)
+        return
+
+    results = {}
+    print(f"{'case':<40}{'ops/sec':>14}{'allocs/call':>14}{'peak KiB/call':>16}")
+    for name, func in build_cases(args.unclosed_bracket_length).items():
+        if args.filter not in name:
+            continue
+
+        ops = ops_per_second(func, args.min_time)
+        allocations = allocations_per_call(func)
+        peak = peak_bytes_per_call(func)
+        results[name] = {
+            "ops_per_sec": ops,
+            "allocations_per_call": allocations,
+            "peak_bytes_per_call": peak,
+        }
+        print(f"{name:<40}{ops:>14,.1f}{allocations:>14,.1f}{peak / 1024:>16,.1f}")
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(results, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
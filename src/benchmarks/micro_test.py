@@ -0,0 +1,134 @@
+import sys
+
+import pytest
+
+import utils.asset_splitters as asset_splitters
+import utils.text_to_nodes as text_to_nodes_module
+from benchmarks.micro import (
+    SCALING_PATTERNS,
+    allocations_per_call,
+    build_cases,
+    deep_tree,
+    peak_bytes_per_call,
+    wide_tree,
+)
+from nodes.textnode import TextNode, TextType
+from utils.asset_splitters import AssetScanner, AssetType, split_asset_nodes
+from utils.text_to_nodes import text_to_nodes
+
+
+# characters scanned by str.find, regex searches and matches, plus one per
+# call, so a parser that keeps rescanning the same text shows up as a count
+# instead of as noisy timings
+class StepCounter:
+    def __init__(self) -> None:
+        self.steps = 0
+
+    def count(self, start: int, stop: int) -> None:
+        self.steps += 1 + max(stop - start, 0)
+
+
+class CountingText(str):
+    counter: StepCounter
+
+    def find(self, sub, start=0, end=sys.maxsize):
+        found = super().find(sub, start, end)
+        self.counter.count(start, found if found != -1 else min(end, len(self)))
+        return found
+
+
+class CountingPattern:
+    def __init__(self, pattern, counter: StepCounter) -> None:
+        self.pattern = pattern
+        self.counter = counter
+
+    def search(self, string, pos=0, endpos=sys.maxsize):
+        found = self.pattern.search(string, pos, endpos)
+        self.counter.count(pos, found.end() if found else min(endpos, len(string)))
+        return found
+
+    def match(self, string, pos=0, endpos=sys.maxsize):
+        found = self.pattern.match(string, pos, endpos)
+        self.counter.count(pos, found.end() if found else pos)
+        return found
+
+    def finditer(self, string, pos=0, endpos=sys.maxsize):
+        self.counter.count(pos, min(endpos, len(string)))
+        return self.pattern.finditer(string, pos, endpos)
+
+
+@pytest.fixture
+def counter(monkeypatch):
+    counter = StepCounter()
+    for module, name in (
+        (text_to_nodes_module, "INLINE_TOKEN_PATTERN"),
+        (text_to_nodes_module, "NESTED_TOKEN_PATTERN"),
+        (asset_splitters, "BRACKET_PATTERN"),
+        (asset_splitters, "DESTINATION_PATTERN"),
+        (asset_splitters, "WHITESPACE_PATTERN"),
+    ):
+        monkeypatch.setattr(module, name, CountingPattern(getattr(module, name), counter))
+
+    match = AssetScanner.match
+
+    def counting_match(self, open_index):
+        counter.count(0, 0)
+        return match(self, open_index)
+
+    monkeypatch.setattr(AssetScanner, "match", counting_match)
+    return counter
+
+
+PARSERS = {
+    "text_to_nodes": text_to_nodes,
+    "split_asset_nodes": lambda text: split_asset_nodes(
+        [TextNode(text, TextType.PLAIN)], AssetType.LINK
+    ),
+}
+
+
+def steps(counter, parse, text: str) -> int:
+    counted = CountingText(text)
+    counted.counter = counter
+    counter.steps = 0
+    parse(counted)
+    return counter.steps
+
+
+def test_every_case_runs():
+    for name, func in build_cases(unclosed_bracket_length=8).items():
+        func()
+
+
+def test_trees_have_requested_shape():
+    assert deep_tree(3).to_html() == "<div><span><span><span><b>leaf</b></span></span></span></div>"
+    assert wide_tree(2).to_html().count("<li>") == 2
+
+
+def test_peak_bytes_per_call():
+    assert peak_bytes_per_call(lambda: bytearray(100_000)) >= 100_000
+
+
+def test_allocations_per_call_counts_blocks_kept_by_the_result():
+    assert allocations_per_call(lambda: [object() for _ in range(100)]) >= 100
+    assert allocations_per_call(lambda: None) < 1
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("pattern", SCALING_PATTERNS)
+def test_link_parsing_steps_grow_linearly(counter, parser, pattern):
+    build, parse = SCALING_PATTERNS[pattern], PARSERS[parser]
+    small = steps(counter, parse, build(500))
+    large = steps(counter, parse, build(2000))
+
+    assert large <= 4.5 * small
+
+
+def test_step_count_catches_a_rescanning_parser(counter):
+    def rescan(text):
+        return [text.find("]", i) for i in range(len(text))]
+
+    small = steps(counter, rescan, "[" * 500)
+    large = steps(counter, rescan, "[" * 2000)
+
+    assert large > 10 * small
@@ -0,0 +1,80 @@
+# reports bytes per node and peak memory for parsing a large synthetic page
+#
+#   PYTHONPATH=src python -m benchmarks.node_memory --blocks 20000
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import synthetic_markdown
+from nodes.htmlnode import HTMLNode
+from nodes.leafnode import LeafNode
+from nodes.parentnode import ParentNode
+from nodes.textnode import TextNode, TextType
+from utils.markdown_to_html_nodes import markdown_to_html_nodes
+from utils.text_to_nodes import text_to_nodes
+
+
+# shallow size of an instance, including its __dict__ when it has one
+def instance_size(obj: object) -> int:
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def count_nodes(node: HTMLNode) -> int:
+    total = 1
+    for child in node.children or []:
+        total += count_nodes(child)
+    return total
+
+
+def run(blocks: int, seed: int) -> dict[str, float]:
+    markdown = synthetic_markdown(blocks, seed=seed)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    root = markdown_to_html_nodes(markdown)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    html_nodes = count_nodes(root)
+
+    tracemalloc.start()
+    text_nodes = text_to_nodes(markdown)
+    text_retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "markdown_bytes": len(markdown.encode("utf-8")),
+        "parse_seconds": elapsed,
+        "html_nodes": html_nodes,
+        "html_tree_bytes": retained,
+        "html_bytes_per_node": retained / html_nodes,
+        "parse_peak_bytes": peak,
+        "text_nodes": len(text_nodes),
+        "text_bytes_per_node": text_retained / max(len(text_nodes), 1),
+        "textnode_size": instance_size(TextNode("x", TextType.PLAIN)),
+        "leafnode_size": instance_size(LeafNode("x")),
+        "parentnode_size": instance_size(ParentNode("p", [])),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Bytes per node and peak memory of a parsed page")
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for key, value in run(args.blocks, args.seed).items():
+        if isinstance(value, float):
+            print(f"{key:>22}: {value:,.2f}")
+        else:
+            print(f"{key:>22}: {value:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# throughput and tail latency of the local server on a built synthetic site,
+# with concurrent keep alive clients
+#
+#   PYTHONPATH=src python -m benchmarks.serve --pages 200 --clients 16 --json serve.json
+#   PYTHONPATH=src python -m benchmarks.serve --server stdlib  # python -m http.server, for comparison
+
+import argparse
+import http.client
+import json
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.e2e import MAIN_PATH, timed_build
+from benchmarks.synthetic import generate_site
+from utils.files.sync import scan_files
+
+SERVE_PATH = MAIN_PATH.parent / "serve.py"
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def start_server(site: Path, kind: str, port: int) -> subprocess.Popen:
+    if kind == "stdlib":
+        command = [sys.executable, "-m", "http.server", str(port), "--directory", "public"]
+    else:
+        command = [sys.executable, str(SERVE_PATH), "--port", str(port), "--quiet"]
+    process = subprocess.Popen(
+        command, cwd=site, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"{kind} server did not start on port {port}")
+
+
+# every client keeps one connection open (http.client reconnects on its own
+# when the server closes it) and records the latency of each request
+def run_client(
+    port: int,
+    paths: list[str],
+    requests: int,
+    revalidate: float,
+    seed: int,
+    latencies: list[float],
+    etags: dict[str, str],
+) -> None:
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    for _ in range(requests):
+        path = rng.choice(paths)
+        headers = {"Accept-Encoding": "gzip"}
+        if path in etags and rng.random() < revalidate:
+            headers["If-None-Match"] = etags[path]
+
+        start = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+
+        if etag := response.headers.get("ETag"):
+            etags[path] = etag
+    connection.close()
+
+
+def measure(port: int, paths: list[str], clients: int, requests: int, revalidate: float) -> dict:
+    latencies: list[list[float]] = [[] for _ in range(clients)]
+    etags: dict[str, str] = {}
+    threads = [
+        threading.Thread(
+            target=run_client,
+            args=(port, paths, requests, revalidate, seed, latencies[seed], etags),
+        )
+        for seed in range(clients)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(latency for client in latencies for latency in client)
+    return summarize(samples, elapsed)
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def summarize(samples: list[float], elapsed: float) -> dict:
+    return {
+        "requests": len(samples),
+        "requests_per_sec": len(samples) / elapsed,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": samples[-1] * 1000,
+        "mean_ms": statistics.fmean(samples) * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Local server throughput and latency")
+    parser.add_argument("--server", choices=["bundled", "stdlib"], default="bundled")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--static-files", type=int, default=20)
+    parser.add_argument("--static-file-bytes", type=int, default=256 * 1024)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument(
+        "--revalidate",
+        type=float,
+        default=0.3,
+        help="share of repeat requests sent with If-None-Match",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="ssg-serve-bench-") as tmp:
+        site = Path(tmp)
+        generate_site(
+            site,
+            pages=args.pages,
+            seed=args.seed,
+            static_files=args.static_files,
+            static_file_bytes=args.static_file_bytes,
+        )
+        timed_build(site, ["--jobs", "0"])
+
+        public = site / "public"
+        paths = sorted(
+            "/" + relative.as_posix().removesuffix("index.html")
+            for relative in scan_files(public)
+        )
+
+        port = free_port()
+        process = start_server(site, args.server, port)
+        try:
+            results = measure(port, paths, args.clients, args.requests, args.revalidate)
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(f"{args.server} server, {args.clients} clients, {len(paths)} files")
+    for metric, value in results.items():
+        print(f"  {metric:<18}{value:>12,.2f}")
+
+    if args.json is not None:
+        report = {"config": vars(args) | {"json": str(args.json)}, "python": platform.python_version()}
+        report["results"] = results
+        args.json.write_text(json.dumps(report, indent=1), encoding="utf-8")
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from benchmarks.serve import percentile, summarize
+
+
+def test_summarize_reports_throughput_and_tail():
+    samples = [i / 1000 for i in range(1, 101)]
+
+    results = summarize(samples, elapsed=2.0)
+
+    assert results["requests"] == 100
+    assert results["requests_per_sec"] == 50
+    assert percentile(samples, 0.5) == 0.051
+    assert round(results["p99_ms"]) == 100
+    assert round(results["max_ms"]) == 100
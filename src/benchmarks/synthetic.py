@@ -0,0 +1,139 @@
+import random
+from pathlib import Path
+
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua rivendell elrond "
+    "glorfindel bombadil shire hobbit ring mithril"
+).split()
+
+# relative weights of paragraph, heading, code, quote, unordered and ordered list blocks
+DEFAULT_BLOCK_MIX = (8, 1, 1, 1, 2, 2)
+
+SITE_TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>
+      {{ Content }}
+    </article>
+  </body>
+</html>
+"""
+
+
+def sentence(
+    rng: random.Random,
+    words: int,
+    inline_density: float,
+    link_density: float = 0.0,
+    image_density: float = 0.0,
+) -> str:
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < inline_density:
+            match rng.randrange(3):
+                case 0:
+                    word = f"**{word}**"
+                case 1:
+                    word = f"_{word}_"
+                case 2:
+                    word = f"`{word}`"
+        elif roll < inline_density + link_density:
+            word = f"[{word}](https://example.com/{word})"
+        elif roll < inline_density + link_density + image_density:
+            word = f"![{word}](/images/{word}.png)"
+        parts.append(word)
+    return " ".join(parts)
+
+
+# builds a reproducible markdown document mixing every block type,
+# the same arguments always give the same document
+def synthetic_markdown(
+    blocks: int,
+    seed: int = 0,
+    inline_density: float = 0.09,
+    link_density: float = 0.03,
+    image_density: float = 0.03,
+    block_mix: tuple[int, ...] = DEFAULT_BLOCK_MIX,
+) -> str:
+    rng = random.Random(seed)
+    out = [f"# {sentence(rng, 4, 0)}"]
+
+    def text(words: int) -> str:
+        return sentence(rng, words, inline_density, link_density, image_density)
+
+    for _ in range(blocks):
+        match rng.choices(range(6), weights=block_mix)[0]:
+            case 0:
+                out.append("\n".join(text(12) for _ in range(3)))
+            case 1:
+                out.append("#" * rng.randint(2, 6) + " " + sentence(rng, 5, 0))
+            case 2:
+                lines = [sentence(rng, 8, 0) for _ in range(rng.randint(2, 6))]
+                out.append("```\n" + "\n".join(lines) + "\n```")
+            case 3:
+                out.append("> " + text(15))
+            case 4:
+                items = [text(6) for _ in range(rng.randint(2, 8))]
+                out.append("\n".join(f"- {item}" for item in items))
+            case 5:
+                items = [text(6) for _ in range(rng.randint(2, 8))]
+                out.append("\n".join(f"{i}. {item}" for i, item in enumerate(items, 1)))
+
+    return "\n\n".join(out) + "\n"
+
+
+# writes a reproducible site (content/, static/ and template.html) under root.
+# pages are spread over nested sections up to the given depth, and the giant
+# pages are added on top of the regular ones
+def generate_site(
+    root: Path,
+    pages: int = 100,
+    depth: int = 2,
+    blocks_per_page: int = 40,
+    seed: int = 0,
+    inline_density: float = 0.09,
+    link_density: float = 0.03,
+    image_density: float = 0.03,
+    block_mix: tuple[int, ...] = DEFAULT_BLOCK_MIX,
+    giant_pages: int = 0,
+    giant_blocks: int = 20000,
+    static_files: int = 10,
+    static_file_bytes: int = 16 * 1024,
+) -> list[Path]:
+    rng = random.Random(seed)
+    content = root / "content"
+    written = []
+
+    for i in range(pages + giant_pages):
+        sections = [f"section{rng.randrange(4)}" for _ in range(rng.randint(0, depth))]
+        path = content.joinpath(*sections, f"page{i}", "index.md")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            synthetic_markdown(
+                giant_blocks if i >= pages else blocks_per_page,
+                seed=seed * 1_000_003 + i,
+                inline_density=inline_density,
+                link_density=link_density,
+                image_density=image_density,
+                block_mix=block_mix,
+            ),
+            encoding="utf-8",
+        )
+        written.append(path)
+
+    static = root / "static"
+    (static / "images").mkdir(parents=True, exist_ok=True)
+    (static / "index.css").write_text("body { margin: 0 auto; }\n", encoding="utf-8")
+    for i in range(static_files):
+        (static / "images" / f"image{i}.png").write_bytes(rng.randbytes(static_file_bytes))
+
+    (root / "template.html").write_text(SITE_TEMPLATE, encoding="utf-8")
+    return written
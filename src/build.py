@@ -1,28 +1,228 @@
-from generators.page_gen import generate_page_rec
-from utils.files.managers import cleanup_dir, copy_dir_contents
+from pathlib import Path
+
+from errors.build import BuildError
+from generators.deploy import diff_states, load_state, save_json, summarize_diff
+from generators.manifest import BuildManifest
+from generators.page_gen import collect_pages, page_output_path
+from generators.pool import render_pages
+from generators.precompress import precompress_outputs, summarize_compression
+from generators.render_cache import RenderCache
+from generators.template import template_fingerprint
+from profiling.report import (
+    build_memory_report,
+    build_report,
+    format_memory_report,
+    format_report,
+    merge_cprofile,
+    write_report,
+)
+from utils.files.sync import SyncMode, SyncStats, sync_dir
 
 from constants import (
     CONTENT_DIR_PATH,
+    CPROFILE_DIR_PATH,
+    CPROFILE_STATS_PATH,
+    DEPLOY_DIFF_PATH,
+    DEPLOYED_STATE_PATH,
     DEST_STATIC_DIR_PATH,
+    MANIFEST_FILE_PATH,
+    MEMPROFILE_REPORT_PATH,
+    PROFILE_REPORT_PATH,
+    RENDER_CACHE_DIR_PATH,
+    RENDER_CACHE_MAX_BYTES,
     SOURCE_STATIC_DIR_PATH,
     TEMPLATE_FILE_PATH,
 )
 
 
-def build() -> None:
-    print("setting up static assets")
-
+def build(
+    jobs: int = 1,
+    use_cache: bool = True,
+    profile: bool = False,
+    cprofile: bool = False,
+    profile_top: int = 10,
+    memprofile: bool = False,
+    output_dir: Path = DEST_STATIC_DIR_PATH,
+    static_stats: SyncStats | None = None,
+    precompress_levels: dict[str, int] | None = None,
+    minify: bool = False,
+) -> None:
     print("Initializing build......")
-    generate_page_rec(
-        template_path=TEMPLATE_FILE_PATH,
+    manifest = BuildManifest.load(MANIFEST_FILE_PATH)
+
+    # what every page's html hashed to last time, kept even when the
+    # manifest is replaced so identical pages are still not rewritten
+    previous_hashes = manifest.output_hashes()
+
+    template_hash = template_fingerprint(TEMPLATE_FILE_PATH)
+    if not manifest.is_compatible(template_hash, minify):
+        print("Template, renderer or minification changed, rebuilding every page")
+        manifest = BuildManifest(
+            template_hash=template_hash,
+            static=manifest.static,
+            compressed=manifest.compressed,
+            minify=minify,
+        )
+
+    if static_stats is not None:
+        for relative, (file_hash, size) in static_stats.hashes.items():
+            manifest.record_static(relative, file_hash, size)
+        for relative in static_stats.deleted:
+            manifest.remove_static(relative)
+
+    # pages are rendered into output_dir (a staging generation when the
+    # output is published atomically) but the manifest always tracks the
+    # live paths, which is where the pages end up
+    pages = collect_pages(
         content_dir_path=CONTENT_DIR_PATH,
         dest_dir_path=DEST_STATIC_DIR_PATH,
     )
-    print("Build successfull!!")
 
+    for stale_output in manifest.remove_orphans({source for source, _ in pages}):
+        stale_output = staged_path(stale_output, output_dir)
+        print(f"Removing stale output {stale_output}")
+        stale_output.unlink(missing_ok=True)
+
+    # a profiled build renders every page, measuring only the dirty ones
+    # would not say much about where build time or memory goes
+    dirty_pages = [
+        (from_path, dest_path)
+        for from_path, dest_path in pages
+        if profile
+        or memprofile
+        or not manifest.is_page_fresh(from_path, page_output_path(from_path, dest_path))
+    ]
+
+    errors = []
+    block_hits = block_misses = 0
+    written = 0
+    profiled_pages = []
+    memory_pages = []
+    cprofile_dir = CPROFILE_DIR_PATH if profile and cprofile else None
+    results = render_pages(
+        [(from_path, staged_path(dest_path, output_dir)) for from_path, dest_path in dirty_pages],
+        template_path=TEMPLATE_FILE_PATH,
+        jobs=jobs,
+        cache_dir=RENDER_CACHE_DIR_PATH if use_cache else None,
+        profile=profile,
+        cprofile_dir=cprofile_dir,
+        memprofile=memprofile,
+        previous_hashes=previous_hashes,
+        minify=minify,
+    )
+    for (from_path, dest_path), result in zip(dirty_pages, results):
+        print(result.log, end="")
+        block_hits += result.block_hits
+        block_misses += result.block_misses
+        if result.stages is not None:
+            profiled_pages.append((from_path, result.stages))
+        if result.memory is not None:
+            memory_pages.append((from_path, result.memory))
+        if result.error is not None:
+            errors.append(result.error)
+            continue
+        written += result.written
+        manifest.record_page(
+            from_path,
+            page_output_path(from_path, dest_path),
+            result.output_hash,
+            result.output_size,
+        )
+
+    # variants of whatever changed are written next to it. empty levels
+    # remove the ones from earlier builds, None keeps making them at the
+    # levels they were made with
+    if not errors:
+        if precompress_levels is None:
+            precompress_levels = manifest.compression_levels()
+        compress_stats = precompress_outputs(
+            manifest, output_dir, DEST_STATIC_DIR_PATH, precompress_levels, jobs
+        )
+        if precompress_levels or compress_stats.removed:
+            print(summarize_compression(compress_stats, precompress_levels))
+
+    # pages that did render are still recorded when others failed, unless
+    # they were staged, a failed staged build is thrown away as a whole
+    if not errors or output_dir == DEST_STATIC_DIR_PATH:
+        manifest.save(MANIFEST_FILE_PATH)
+
+    if use_cache:
+        RenderCache(RENDER_CACHE_DIR_PATH).evict(RENDER_CACHE_MAX_BYTES)
 
-def setup_static_content() -> None:
-    cleanup_dir(
-        DEST_STATIC_DIR_PATH,
+    if profile:
+        report = build_report(profiled_pages)
+        write_report(report, PROFILE_REPORT_PATH)
+        print(format_report(report, top=profile_top))
+        print(f"Profile report written to {PROFILE_REPORT_PATH}")
+
+        if cprofile_dir is not None and (
+            merged := merge_cprofile(cprofile_dir, CPROFILE_STATS_PATH)
+        ):
+            merged.sort_stats("cumulative").print_stats(profile_top)
+            print(f"Merged cProfile stats written to {CPROFILE_STATS_PATH}")
+
+    if memprofile:
+        memory_report = build_memory_report(memory_pages)
+        write_report(memory_report, MEMPROFILE_REPORT_PATH)
+        print(format_memory_report(memory_report, top=profile_top))
+        print(f"Memory profile written to {MEMPROFILE_REPORT_PATH}")
+
+    if errors:
+        raise BuildError(
+            f"{len(errors)} of {len(dirty_pages)} pages failed to render:\n"
+            + "\n".join(errors)
+        )
+
+    if block_hits + block_misses:
+        print(
+            f"Block memo: {block_hits} hits, {block_misses} misses "
+            f"({block_hits / (block_hits + block_misses):.0%} hit rate)"
+        )
+
+    # what has to be uploaded, from the hashes recorded above instead
+    # of another walk over the whole output
+    deploy_diff = diff_states(
+        load_state(DEPLOYED_STATE_PATH),
+        manifest.output_state(DEST_STATIC_DIR_PATH),
+    )
+    save_json(DEPLOY_DIFF_PATH, deploy_diff)
+    print(f"{summarize_diff(deploy_diff)}, written to {DEPLOY_DIFF_PATH}")
+
+    rendered = len(dirty_pages)
+    print(
+        f"Build successfull!! {rendered} rendered, {len(pages) - rendered} unchanged, "
+        f"{written} written, {rendered - written} skipped as identical"
+    )
+
+
+# where a live output path is written when building into output_dir
+def staged_path(path: Path, output_dir: Path) -> Path:
+    return output_dir / path.relative_to(DEST_STATIC_DIR_PATH)
+
+
+def setup_static_content(
+    mode: SyncMode = SyncMode.COPY,
+    use_hash: bool = False,
+    output_dir: Path = DEST_STATIC_DIR_PATH,
+) -> SyncStats:
+    print("setting up static assets")
+    manifest = BuildManifest.load(MANIFEST_FILE_PATH)
+
+    # rendered pages and precompressed variants tracked by the manifest are
+    # not static orphans, so unchanged ones do not have to be made again
+    # afterwards. the returned stats carry the hashes that build() records
+    # in the manifest
+    stats = sync_dir(
+        src=SOURCE_STATIC_DIR_PATH,
+        dest=output_dir,
+        keep={staged_path(output, output_dir) for output in manifest.outputs()}
+        | {output_dir / variant for variant in manifest.variants()},
+        use_hash=use_hash,
+        mode=mode,
+        known={Path(relative) for relative in manifest.static},
+    )
+    print(
+        f"Static assets synced: {len(stats.copied)} copied, "
+        f"{stats.unchanged} unchanged, {len(stats.deleted)} removed"
     )
-    copy_dir_contents(src=SOURCE_STATIC_DIR_PATH, dest=DEST_STATIC_DIR_PATH)
+    return stats
@@ -7,7 +7,74 @@ SOURCE_STATIC_DIR_PATH = Path("static")
 DEST_STATIC_DIR_PATH = Path("public")
 
 
+# published outputs, public is a symlink to one of these
+DEST_GENERATIONS_DIR_PATH = Path(".public-generations")
+
+
+# generations kept around for rollback, the live one included
+KEEP_GENERATIONS = 3
+
+
 CONTENT_DIR_PATH = Path("content")
 
 
 TEMPLATE_FILE_PATH = Path("template.html")
+
+
+CACHE_DIR_PATH = Path(".ssg-cache")
+
+
+MANIFEST_FILE_PATH = CACHE_DIR_PATH / "manifest.json"
+
+
+# bump this whenever a change to the parser or renderer alters the generated
+# html, so that every page gets rebuilt on the next incremental build
+RENDERER_VERSION = "7"
+
+
+# sources at least this large are rendered while they are being read
+STREAMING_THRESHOLD_BYTES = 16 * 1024 * 1024
+
+
+RENDER_CACHE_DIR_PATH = CACHE_DIR_PATH / "render"
+
+
+# the render cache is trimmed back to this size after every build
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+# upper bound for the in-process memo of rendered blocks, per worker
+BLOCK_MEMO_MAX_BYTES = 32 * 1024 * 1024
+
+
+PROFILE_REPORT_PATH = CACHE_DIR_PATH / "profile.json"
+
+
+CPROFILE_DIR_PATH = CACHE_DIR_PATH / "cprofile"
+
+
+CPROFILE_STATS_PATH = CACHE_DIR_PATH / "profile.pstats"
+
+
+MEMPROFILE_REPORT_PATH = CACHE_DIR_PATH / "memprofile.json"
+
+
+# output state (path -> hash, size) as of the last upload
+DEPLOYED_STATE_PATH = CACHE_DIR_PATH / "deployed.json"
+
+
+# files to upload or delete to get from the deployed state to the last build
+DEPLOY_DIFF_PATH = CACHE_DIR_PATH / "deploy-diff.json"
+
+
+# in-memory lru of hot files in the local server, files above the
+# per file limit are sent with sendfile instead
+SERVER_CACHE_MAX_BYTES = 64 * 1024 * 1024
+SERVER_CACHE_MAX_FILE_BYTES = 1024 * 1024
+
+
+# precompressed variants written next to an output, by content coding, and
+# the default levels they are compressed at
+VARIANT_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+GZIP_LEVEL = 9
+ZSTD_LEVEL = 19
@@ -0,0 +1,3 @@
+class BuildError(Exception):
+    def __init__(self, message) -> None:
+        super().__init__(message)
@@ -1,3 +1,8 @@
 class MarkdownSyntaxError(Exception):
     def __init__(self, message) -> None:
         super().__init__(message)
+
+
+class TemplateSyntaxError(Exception):
+    def __init__(self, message) -> None:
+        super().__init__(message)
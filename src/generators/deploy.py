@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+ADDED = "added"
+CHANGED = "changed"
+DELETED = "deleted"
+
+# relative output path -> {"hash": ..., "size": ...}
+OutputState = dict[str, dict]
+
+
+# the output state that was last uploaded, empty when nothing ever was
+def load_state(path: Path) -> OutputState:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        print(f"Ignoring unreadable deploy state {path}: {e}")
+        return {}
+
+
+def save_json(path: Path, data: object) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+# every file that has to be uploaded or removed to turn the deployed output
+# into the current one. deleted entries carry the hash and size that were
+# deployed, so the uploader can tell what it is removing
+def diff_states(deployed: OutputState, current: OutputState) -> list[dict]:
+    entries = []
+    for path in sorted(deployed.keys() | current.keys()):
+        if path not in current:
+            action, entry = DELETED, deployed[path]
+        elif path not in deployed:
+            action, entry = ADDED, current[path]
+        elif deployed[path]["hash"] != current[path]["hash"]:
+            action, entry = CHANGED, current[path]
+        else:
+            continue
+
+        entries.append(
+            {"path": path, "hash": entry["hash"], "size": entry["size"], "action": action}
+        )
+    return entries
+
+
+def summarize_diff(entries: list[dict]) -> str:
+    counts = dict.fromkeys((ADDED, CHANGED, DELETED), 0)
+    upload = 0
+    for entry in entries:
+        counts[entry["action"]] += 1
+        if entry["action"] != DELETED:
+            upload += entry["size"]
+    return (
+        f"Deploy diff: {counts[ADDED]} added, {counts[CHANGED]} changed, "
+        f"{counts[DELETED]} deleted ({upload / 1024:.1f} KiB to upload)"
+    )
@@ -0,0 +1,51 @@
+from generators.deploy import (
+    ADDED,
+    CHANGED,
+    DELETED,
+    diff_states,
+    load_state,
+    save_json,
+    summarize_diff,
+)
+
+
+def test_diff_states_lists_every_action():
+    deployed = {
+        "index.html": {"hash": "a", "size": 10},
+        "same.css": {"hash": "s", "size": 5},
+        "gone.png": {"hash": "g", "size": 2048},
+    }
+    current = {
+        "index.html": {"hash": "b", "size": 12},
+        "same.css": {"hash": "s", "size": 5},
+        "blog/new.html": {"hash": "n", "size": 1024},
+    }
+
+    assert diff_states(deployed, current) == [
+        {"path": "blog/new.html", "hash": "n", "size": 1024, "action": ADDED},
+        {"path": "gone.png", "hash": "g", "size": 2048, "action": DELETED},
+        {"path": "index.html", "hash": "b", "size": 12, "action": CHANGED},
+    ]
+
+
+def test_nothing_deployed_means_everything_is_added():
+    current = {"index.html": {"hash": "a", "size": 1024}}
+
+    entries = diff_states({}, current)
+
+    assert [entry["action"] for entry in entries] == [ADDED]
+    assert summarize_diff(entries) == (
+        "Deploy diff: 1 added, 0 changed, 0 deleted (1.0 KiB to upload)"
+    )
+
+
+def test_state_round_trip(tmp_path):
+    path = tmp_path / "deployed.json"
+    assert load_state(path) == {}
+
+    state = {"index.html": {"hash": "a", "size": 1}}
+    save_json(path, state)
+    assert load_state(path) == state
+
+    path.write_text("{not json")
+    assert load_state(path) == {}
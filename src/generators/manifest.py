@@ -0,0 +1,198 @@
+import json
+from pathlib import Path
+
+from constants import RENDERER_VERSION, VARIANT_SUFFIXES
+from utils.files.hashing import hash_file
+
+
+# the manifest persists what every page looked like when it was last rendered,
+# so the next build can skip pages whose source has not changed
+class BuildManifest:
+    template_hash: str
+    renderer_version: str
+    # whether the recorded pages were written minified
+    minify: bool
+    pages: dict[str, dict]
+    # relative path in the output -> hash and size of each synced static file
+    static: dict[str, dict]
+    # relative path in the output -> hash it was compressed from, the levels
+    # used and hash and size of every precompressed variant written
+    compressed: dict[str, dict]
+
+    def __init__(
+        self,
+        template_hash: str = "",
+        renderer_version: str = RENDERER_VERSION,
+        pages: dict[str, dict] | None = None,
+        static: dict[str, dict] | None = None,
+        compressed: dict[str, dict] | None = None,
+        minify: bool = False,
+    ) -> None:
+        self.template_hash = template_hash
+        self.renderer_version = renderer_version
+        self.minify = minify
+        self.pages = pages if pages is not None else {}
+        self.static = static if static is not None else {}
+        self.compressed = compressed if compressed is not None else {}
+
+    # loads the manifest from disk, a missing or unreadable manifest
+    # just means everything gets rebuilt
+    @classmethod
+    def load(cls, path: Path) -> "BuildManifest":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return cls(
+                template_hash=data["template_hash"],
+                renderer_version=data["renderer_version"],
+                pages=data["pages"],
+                static=data.get("static", {}),
+                compressed=data.get("compressed", {}),
+                minify=data.get("minify", False),
+            )
+        except FileNotFoundError:
+            return cls()
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring unreadable manifest {path}: {e}")
+            return cls()
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # write to a temp file first so an interrupted build never
+        # leaves a half written manifest behind
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(
+            json.dumps(
+                {
+                    "template_hash": self.template_hash,
+                    "renderer_version": self.renderer_version,
+                    "minify": self.minify,
+                    "pages": self.pages,
+                    "static": self.static,
+                    "compressed": self.compressed,
+                },
+                indent=1,
+                sort_keys=True,
+            ),
+            encoding="utf-8",
+        )
+        tmp_path.replace(path)
+
+    def is_compatible(self, template_hash: str, minify: bool = False) -> bool:
+        return (
+            self.template_hash == template_hash
+            and self.renderer_version == RENDERER_VERSION
+            and self.minify == minify
+        )
+
+    def outputs(self) -> set[Path]:
+        return {Path(entry["output"]) for entry in self.pages.values()}
+
+    # a page is fresh when its output still exists and the source is unchanged,
+    # mtime and size are checked first and the content hash only when they differ
+    def is_page_fresh(self, source: Path, output: Path) -> bool:
+        entry = self.pages.get(str(source))
+        if entry is None or entry["output"] != str(output) or not output.exists():
+            return False
+
+        stat = source.stat()
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+
+        if hash_file(source) != entry["hash"]:
+            return False
+
+        # touched but identical, remember the new mtime so we skip hashing next time
+        entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def record_page(
+        self,
+        source: Path,
+        output: Path,
+        output_hash: str | None = None,
+        output_size: int | None = None,
+    ) -> None:
+        stat = source.stat()
+        self.pages[str(source)] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": hash_file(source),
+            "output": str(output),
+        }
+        if output_hash is not None:
+            self.pages[str(source)]["output_hash"] = output_hash
+        if output_size is not None:
+            self.pages[str(source)]["output_size"] = output_size
+
+    # source -> hash of the html last written for it, for pages that have one
+    def output_hashes(self) -> dict[Path, str]:
+        return {
+            Path(source): entry["output_hash"]
+            for source, entry in self.pages.items()
+            if "output_hash" in entry
+        }
+
+    # drops every page whose source is gone and returns their outputs
+    def remove_orphans(self, sources: set[Path]) -> list[Path]:
+        known = {str(source) for source in sources}
+        orphans = []
+        for source in sorted(set(self.pages) - known):
+            orphans.append(Path(self.pages.pop(source)["output"]))
+        return orphans
+
+    def record_static(self, relative: Path, file_hash: str, size: int) -> None:
+        self.static[relative.as_posix()] = {"hash": file_hash, "size": size}
+
+    def remove_static(self, relative: Path) -> None:
+        self.static.pop(relative.as_posix(), None)
+
+    def record_compressed(
+        self,
+        relative: str,
+        source_hash: str,
+        levels: dict[str, int],
+        variants: dict[str, dict],
+    ) -> None:
+        self.compressed[relative] = {
+            "hash": source_hash,
+            "levels": levels,
+            "variants": variants,
+        }
+
+    # the levels the current variants were made with, empty without any
+    def compression_levels(self) -> dict[str, int]:
+        for entry in self.compressed.values():
+            return dict(entry["levels"])
+        return {}
+
+    # relative paths of every precompressed variant in the output
+    def variants(self) -> set[Path]:
+        return {
+            Path(relative + VARIANT_SUFFIXES[encoding])
+            for relative, entry in self.compressed.items()
+            for encoding in entry["variants"]
+        }
+
+    # every file in the output as relative path -> hash and size, put together
+    # from what was recorded while rendering, syncing and compressing. only
+    # pages from before hashes were recorded are read back from output_root
+    def output_state(self, output_root: Path) -> dict[str, dict]:
+        state = dict(self.static)
+        for entry in self.pages.values():
+            output = Path(entry["output"])
+            relative = output.relative_to(output_root).as_posix()
+            if "output_hash" in entry and "output_size" in entry:
+                state[relative] = {"hash": entry["output_hash"], "size": entry["output_size"]}
+            elif output.exists():
+                state[relative] = {"hash": hash_file(output), "size": output.stat().st_size}
+
+        # variants made from an older version of their file are stale
+        for relative, entry in self.compressed.items():
+            if state.get(relative, {}).get("hash") != entry["hash"]:
+                continue
+            for encoding, variant in entry["variants"].items():
+                state[relative + VARIANT_SUFFIXES[encoding]] = dict(variant)
+        return state
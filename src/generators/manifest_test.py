@@ -0,0 +1,174 @@
+import os
+from pathlib import Path
+
+from generators.manifest import BuildManifest
+from utils.files.hashing import hash_file
+
+
+def make_page(tmp_path, name="page.md", content="# Title\n\nbody"):
+    source = tmp_path / name
+    source.write_text(content, encoding="utf-8")
+    output = tmp_path / "out" / source.with_suffix(".html").name
+    output.parent.mkdir(exist_ok=True)
+    output.write_text("<html></html>", encoding="utf-8")
+    return source, output
+
+
+def test_unrecorded_page_is_not_fresh(tmp_path):
+    source, output = make_page(tmp_path)
+
+    assert not BuildManifest().is_page_fresh(source, output)
+
+
+def test_recorded_page_is_fresh(tmp_path):
+    source, output = make_page(tmp_path)
+    manifest = BuildManifest()
+    manifest.record_page(source, output)
+
+    assert manifest.is_page_fresh(source, output)
+
+
+def test_changed_source_is_not_fresh(tmp_path):
+    source, output = make_page(tmp_path)
+    manifest = BuildManifest()
+    manifest.record_page(source, output)
+
+    source.write_text("# Title\n\nanother body", encoding="utf-8")
+
+    assert not manifest.is_page_fresh(source, output)
+
+
+def test_same_size_edit_is_caught_by_hash(tmp_path):
+    source, output = make_page(tmp_path, content="# Title\n\naaaa")
+    manifest = BuildManifest()
+    manifest.record_page(source, output)
+
+    source.write_text("# Title\n\nbbbb", encoding="utf-8")
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+    assert not manifest.is_page_fresh(source, output)
+
+
+def test_touched_source_is_still_fresh(tmp_path):
+    source, output = make_page(tmp_path)
+    manifest = BuildManifest()
+    manifest.record_page(source, output)
+
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+    assert manifest.is_page_fresh(source, output)
+    assert manifest.pages[str(source)]["mtime_ns"] == source.stat().st_mtime_ns
+
+
+def test_missing_output_is_not_fresh(tmp_path):
+    source, output = make_page(tmp_path)
+    manifest = BuildManifest()
+    manifest.record_page(source, output)
+
+    output.unlink()
+
+    assert not manifest.is_page_fresh(source, output)
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    source, output = make_page(tmp_path)
+    manifest = BuildManifest(template_hash="abc")
+    manifest.record_page(source, output)
+
+    path = tmp_path / "cache" / "manifest.json"
+    manifest.save(path)
+    loaded = BuildManifest.load(path)
+
+    assert loaded.is_compatible("abc")
+    assert loaded.pages == manifest.pages
+
+
+def test_load_missing_or_corrupt_manifest(tmp_path):
+    path = tmp_path / "manifest.json"
+    assert BuildManifest.load(path).pages == {}
+
+    path.write_text("{not json", encoding="utf-8")
+    assert BuildManifest.load(path).pages == {}
+
+
+def test_template_renderer_or_minify_change_is_incompatible(tmp_path):
+    manifest = BuildManifest(template_hash="abc", renderer_version="0")
+
+    assert not manifest.is_compatible("abc")
+    assert not BuildManifest(template_hash="abc").is_compatible("def")
+
+    minified = BuildManifest(template_hash="abc", minify=True)
+    minified.save(tmp_path / "manifest.json")
+    assert BuildManifest.load(tmp_path / "manifest.json").is_compatible("abc", minify=True)
+    assert not minified.is_compatible("abc")
+
+
+def test_remove_orphans(tmp_path):
+    kept, kept_output = make_page(tmp_path, "kept.md")
+    gone, gone_output = make_page(tmp_path, "gone.md")
+    manifest = BuildManifest()
+    manifest.record_page(kept, kept_output)
+    manifest.record_page(gone, gone_output)
+
+    orphans = manifest.remove_orphans({kept})
+
+    assert orphans == [gone_output]
+    assert list(manifest.pages) == [str(kept)]
+
+
+def test_output_hashes_are_recorded(tmp_path):
+    source, output = make_page(tmp_path)
+    other, other_output = make_page(tmp_path, name="other.md")
+    manifest = BuildManifest()
+    manifest.record_page(source, output, output_hash="abc")
+    manifest.record_page(other, other_output)
+
+    assert manifest.output_hashes() == {source: "abc"}
+
+
+def test_output_state_joins_pages_and_static(tmp_path):
+    source, output = make_page(tmp_path)
+    old, old_output = make_page(tmp_path, name="old.md")
+    manifest = BuildManifest()
+    manifest.record_page(source, output, output_hash="abc", output_size=3)
+    # recorded before output hashes existed, read back from disk
+    manifest.record_page(old, old_output)
+    manifest.record_static(Path("images/a.png"), "png", 4)
+    manifest.record_static(Path("gone.css"), "css", 1)
+    manifest.remove_static(Path("gone.css"))
+
+    assert manifest.output_state(tmp_path / "out") == {
+        "page.html": {"hash": "abc", "size": 3},
+        "old.html": {"hash": hash_file(old_output), "size": len("<html></html>")},
+        "images/a.png": {"hash": "png", "size": 4},
+    }
+
+    manifest.save(tmp_path / "manifest.json")
+    assert BuildManifest.load(tmp_path / "manifest.json").static == manifest.static
+
+
+def test_output_state_lists_only_current_variants(tmp_path):
+    manifest = BuildManifest()
+    manifest.record_static(Path("index.css"), "css", 100)
+    manifest.record_static(Path("app.js"), "js-new", 100)
+    gz = {"gzip": {"hash": "gz", "size": 10}}
+    manifest.record_compressed("index.css", "css", {"gzip": 9}, gz)
+    # compressed from a version of app.js that has since changed
+    manifest.record_compressed("app.js", "js-old", {"gzip": 9}, gz)
+
+    assert manifest.output_state(tmp_path)["index.css.gz"] == {"hash": "gz", "size": 10}
+    assert "app.js.gz" not in manifest.output_state(tmp_path)
+    assert manifest.variants() == {Path("index.css.gz"), Path("app.js.gz")}
+
+    manifest.save(tmp_path / "manifest.json")
+    assert BuildManifest.load(tmp_path / "manifest.json").compressed == manifest.compressed
+
+
+def test_compression_levels_of_recorded_variants():
+    manifest = BuildManifest()
+    assert manifest.compression_levels() == {}
+
+    manifest.record_compressed("index.css", "css", {"gzip": 9, "zstd": 19}, {})
+    assert manifest.compression_levels() == {"gzip": 9, "zstd": 19}
@@ -0,0 +1,61 @@
+import threading
+import time
+from pathlib import Path
+
+
+# the rendered bytes of one page plus what a server needs to answer for it
+class MemoryPage:
+    data: bytes
+    output_hash: str
+    mtime: float
+
+    def __init__(self, data: bytes, output_hash: str, mtime: float) -> None:
+        self.data = data
+        self.output_hash = output_hash
+        self.mtime = mtime
+
+
+# pages rendered into memory instead of the output directory, keyed by
+# their path relative to it ("blog/post/index.html"). the watcher writes
+# while server threads read, so every access takes the lock
+class MemoryOutput:
+    root: Path
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.pages: dict[str, MemoryPage] = {}
+        self.lock = threading.Lock()
+
+    def relative(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix()
+
+    # stores the page and returns whether it differs from what was there,
+    # identical html keeps the old entry and its mtime
+    def put(self, path: Path, data: bytes, output_hash: str) -> bool:
+        relative = self.relative(path)
+        with self.lock:
+            previous = self.pages.get(relative)
+            if previous is not None and previous.output_hash == output_hash:
+                return False
+            self.pages[relative] = MemoryPage(data, output_hash, time.time())
+        return True
+
+    def remove(self, path: Path) -> None:
+        with self.lock:
+            self.pages.pop(self.relative(path), None)
+
+    def get(self, relative: str) -> MemoryPage | None:
+        with self.lock:
+            return self.pages.get(relative)
+
+    def __contains__(self, relative: str) -> bool:
+        with self.lock:
+            return relative in self.pages
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.pages)
+
+    def size(self) -> int:
+        with self.lock:
+            return sum(len(page.data) for page in self.pages.values())
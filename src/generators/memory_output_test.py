@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from generators.memory_output import MemoryOutput
+
+
+def test_put_keeps_identical_pages():
+    memory = MemoryOutput(Path("public"))
+
+    assert memory.put(Path("public/blog/index.html"), b"one", "hash-one")
+    first = memory.get("blog/index.html")
+    assert not memory.put(Path("public/blog/index.html"), b"one", "hash-one")
+    assert memory.get("blog/index.html") is first
+
+    assert memory.put(Path("public/blog/index.html"), b"two!", "hash-two")
+    assert memory.get("blog/index.html").data == b"two!"
+    assert "blog/index.html" in memory
+    assert len(memory) == 1 and memory.size() == 4
+
+
+def test_remove():
+    memory = MemoryOutput(Path("public"))
+    memory.put(Path("public/index.html"), b"home", "hash")
+
+    memory.remove(Path("public/index.html"))
+    memory.remove(Path("public/missing.html"))
+
+    assert memory.get("index.html") is None
+    assert len(memory) == 0
@@ -1,74 +1,281 @@
-import re
+import io
+import os
+from functools import lru_cache
 from pathlib import Path
+from typing import TextIO
 
+from constants import STREAMING_THRESHOLD_BYTES
+from nodes.htmlnode import HTMLNode
+from nodes.leafnode import LeafNode
+from generators.memory_output import MemoryOutput
+from generators.render_cache import RenderCache
+from generators.template import Template, compile_template, load_template
+from profiling import stages
+from utils.block_memo import BlockMemo
 from utils.extract_title import extract_title_h1
+from utils.files.hashing import HashingWriter, hash_file
+from utils.markdown_stream import MarkdownFileStream
+from utils.minify_html import MinifyingWriter
 from utils.markdown_to_html_nodes import markdown_to_html_nodes
 
 
-def generate_page_rec(
-    template_path: Path,
-    dest_dir_path: Path,
-    content_dir_path: Path,
-) -> None:
-    for item in content_dir_path.iterdir():
+# walks the content tree and returns every (source, destination dir) pair
+# in a stable order, without rendering anything
+def collect_pages(content_dir_path: Path, dest_dir_path: Path) -> list[tuple[Path, Path]]:
+    pages = []
+    for item in sorted(content_dir_path.iterdir()):
         if item.is_file() and item.suffix == ".md":
-            generate_page(
-                from_path=item,
-                template_path=template_path,
-                dest_path=dest_dir_path,
-            )
+            pages.append((item, dest_dir_path))
         elif item.is_dir():
-            generate_page_rec(
-                content_dir_path=item,
-                template_path=template_path,
-                dest_dir_path=dest_dir_path / item.name,
-            )
+            pages.extend(collect_pages(item, dest_dir_path / item.name))
+    return pages
+
+
+def page_output_path(from_path: Path, dest_path: Path) -> Path:
+    return dest_path / from_path.with_suffix(".html").name
+
+
+# text sink that passes everything written to it on to two sinks
+class TeeWriter:
+    def __init__(self, first: TextIO, second: TextIO) -> None:
+        self.first = first
+        self.second = second
+
+    def write(self, text: str) -> int:
+        self.first.write(text)
+        self.second.write(text)
+        return len(text)
+
+
+# a freshly parsed page that goes into the render cache while it is being
+# written out, so its tree is serialized once and never held as one string.
+# only the first write stores the entry
+class CachingContent:
+    def __init__(self, node: HTMLNode, cache: RenderCache, key: str, title: str) -> None:
+        self.node = node
+        self.cache: RenderCache | None = cache
+        self.key = key
+        self.title = title
+
+    def write_html(self, sink: TextIO) -> None:
+        if self.cache is None:
+            self.node.write_html(sink)
+            return
+
+        cache, self.cache = self.cache, None
+        with cache.writer(self.key, self.title) as entry:
+            self.node.write_html(TeeWriter(sink, entry))
 
 
-def generate_page(from_path: Path, template_path: Path, dest_path: Path) -> None:
+# parsed page content, a node tree, a tree on its way into the render cache
+# or a stream for very large sources
+PageContent = HTMLNode | CachingContent | MarkdownFileStream
+
+
+# what writing a page did, the hash and size of its bytes and whether
+# the file on disk actually changed
+class PageWrite:
+    output_hash: str
+    size: int
+    written: bool
+
+    def __init__(self, output_hash: str, size: int, written: bool) -> None:
+        self.output_hash = output_hash
+        self.size = size
+        self.written = written
+
+
+def generate_page(
+    from_path: Path,
+    template_path: Path,
+    dest_path: Path,
+    cache: RenderCache | None = None,
+    memo: BlockMemo | None = None,
+    previous_hash: str | None = None,
+    memory: MemoryOutput | None = None,
+    minify: bool = False,
+) -> PageWrite:
     print(f"Generating pages from {from_path} to {dest_path}.....")
 
-    markdown_content = readfile(
-        from_path,
+    template = load_template(template_path)
+    page_title, root_node = parse_page(from_path, cache, memo)
+    return write_page(
+        template,
+        page_title=page_title,
+        content=root_node,
+        destination_file_path=page_output_path(from_path, dest_path),
+        previous_hash=previous_hash,
+        memory=memory,
+        minify=minify,
     )
-    template_content = readfile(file_path=template_path)
 
+
+def parse_page(
+    from_path: Path,
+    cache: RenderCache | None = None,
+    memo: BlockMemo | None = None,
+) -> tuple[str, PageContent]:
+    # very large sources are parsed while they are being written out
+    # instead of being loaded into memory as a whole
+    root_node: PageContent
     page_title = ""
-    try:
-        page_title = extract_title_h1(markdown_content)
-    except Exception as e:
-        print(e)
+    if from_path.stat().st_size >= STREAMING_THRESHOLD_BYTES:
+        root_node = MarkdownFileStream(from_path, memo)
+        try:
+            with stages.measure("title"):
+                page_title = root_node.title()
+        except Exception as e:
+            print(e)
+    else:
+        with stages.measure("read"):
+            markdown_content = readfile(
+                from_path,
+            )
 
-    html_content = markdown_to_html_nodes(markdown=markdown_content).to_html()
+        # a cached page skips parsing entirely, its rendered html
+        # is written out as a raw leaf
+        cache_key = ""
+        if cache is not None:
+            cache_key = cache.key(markdown_content.encode("utf-8"))
+            if (cached := cache.get(cache_key)) is not None:
+                page_title, html_content = cached
+                return page_title, LeafNode(html_content)
 
-    generated_html = inject_variables(
-        content=template_content,
-        context={
-            "Title": page_title,
-            "Content": html_content,
-        },
-    )
+        try:
+            with stages.measure("title"):
+                page_title = extract_title_h1(markdown_content)
+        except Exception as e:
+            print(e)
+
+        root_node = markdown_to_html_nodes(markdown=markdown_content, memo=memo)
+        if cache is not None:
+            root_node = CachingContent(root_node, cache, cache_key, page_title)
+
+    return page_title, root_node
+
+
+def write_page(
+    template: Template,
+    page_title: str,
+    content: PageContent,
+    destination_file_path: Path,
+    previous_hash: str | None = None,
+    memory: MemoryOutput | None = None,
+    minify: bool = False,
+) -> PageWrite:
+    context = {
+        "Title": page_title,
+        "Content": content,
+    }
+
+    # in memory builds the page only ever exists as bytes in the map
+    if memory is not None:
+        buffer = io.BytesIO()
+        writer = HashingWriter(buffer, WRITE_BUFFER_SIZE)
+        output_hash = render_template(template, context, writer, minify)
+        written = memory.put(destination_file_path, buffer.getvalue(), output_hash)
+        return PageWrite(output_hash, writer.size, written)
 
-    destination_file_path = dest_path / from_path.with_suffix(".html").name
     destination_file_path.parent.mkdir(
         parents=True,
         exist_ok=True,
     )
-    destination_file_path.write_text(generated_html, encoding="utf-8")
 
+    # the compiled template streams its literal text and the content
+    # node straight into the file, the page never exists as one string.
+    # it goes to a temp file that replaces the page at the end, so readers
+    # never see half a page and a hardlinked older output is left alone
+    tmp_path = destination_file_path.with_name(f".{destination_file_path.name}.tmp")
+    try:
+        with stages.measure("write"):
+            with tmp_path.open("wb", buffering=WRITE_BUFFER_SIZE) as output:
+                writer = HashingWriter(output, WRITE_BUFFER_SIZE)
+                output_hash = render_template(template, context, writer, minify)
+
+            # identical bytes keep the old file and its mtime, so rsync,
+            # cdn diffing and If-Modified-Since all see the page as unchanged
+            if is_same_output(destination_file_path, output_hash, writer.size, previous_hash):
+                tmp_path.unlink()
+                return PageWrite(output_hash, writer.size, written=False)
+
+            os.replace(tmp_path, destination_file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return PageWrite(output_hash, writer.size, written=True)
+
+
+# streams the page into the writer and returns its hash. the minifier sits
+# in front of the hashing writer, so the hash is the one of the bytes written.
+# while profiling, the content, minify and write stages nest in the template one
+def render_template(
+    template: Template,
+    context: dict,
+    writer: HashingWriter,
+    minify: bool,
+) -> str:
+    with stages.measure("template"):
+        if minify:
+            minifier = MinifyingWriter(writer, WRITE_BUFFER_SIZE)
+            template.write(minifier, context=context)
+            minifier.finish()
+        else:
+            template.write(writer, context=context)
+        return writer.hexdigest()
 
-# varaible pattern {{ varaible }} matches the names
-VARIABLE_PATTERNS = re.compile(r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\}\}")
+
+# writes a page that was already rendered, like one kept in memory,
+# with the same temp file and unchanged output rules as write_page
+def write_output(
+    destination_file_path: Path,
+    data: bytes,
+    output_hash: str,
+    previous_hash: str | None = None,
+) -> PageWrite:
+    if is_same_output(destination_file_path, output_hash, len(data), previous_hash):
+        return PageWrite(output_hash, len(data), written=False)
+
+    destination_file_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = destination_file_path.with_name(f".{destination_file_path.name}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, destination_file_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return PageWrite(output_hash, len(data), written=True)
+
+
+# the hash recorded when the page was last written saves reading the
+# existing file back, it is only hashed when there is no such record
+def is_same_output(
+    path: Path,
+    output_hash: str,
+    size: int,
+    previous_hash: str | None,
+) -> bool:
+    try:
+        if path.stat().st_size != size:
+            return False
+    except FileNotFoundError:
+        return False
+
+    if previous_hash is not None:
+        return previous_hash == output_hash
+    return hash_file(path) == output_hash
+
+
+WRITE_BUFFER_SIZE = 64 * 1024
 
 
 def inject_variables(content: str, context: dict[str, str]) -> str:
-    def replace(match):
-        key = match.group(1)
-        if key not in context:
-            raise KeyError(f"Missing variable: {key}")
-        return str(context[key])
+    return compile_cached(content).render(context)
+
 
-    return VARIABLE_PATTERNS.sub(replace, content)
+@lru_cache(maxsize=32)
+def compile_cached(content: str) -> Template:
+    return compile_template(content)
 
 
 def readfile(file_path: Path) -> str:
@@ -0,0 +1,146 @@
+import os
+
+import pytest
+
+from generators.memory_output import MemoryOutput
+from generators.page_gen import generate_page, inject_variables, write_output
+from utils.files.hashing import hash_file
+
+
+def test_inject_variables():
+    assert inject_variables("<t>{{ Title }}</t>{{Title}}", {"Title": "x"}) == "<t>x</t>x"
+
+
+def test_inject_variables_missing_variable():
+    with pytest.raises(KeyError, match="Missing variable: Title"):
+        inject_variables("{{ Title }}", {})
+
+
+def test_generate_page_streams_same_html_as_injection(tmp_path):
+    template = tmp_path / "template.html"
+    template.write_text(
+        "<title>{{ Title }}</title><body>{{ Content }}</body><h2>{{Title}}</h2>",
+        encoding="utf-8",
+    )
+    source = tmp_path / "index.md"
+    source.write_text("# Hello\n\nsome **bold** text", encoding="utf-8")
+
+    generate_page(from_path=source, template_path=template, dest_path=tmp_path / "out")
+
+    expected = inject_variables(
+        template.read_text(),
+        {
+            "Title": "Hello",
+            "Content": "<div><h1>Hello</h1><p>some <b>bold</b> text</p></div>",
+        },
+    )
+    assert (tmp_path / "out" / "index.html").read_text() == expected
+
+
+def test_generate_page_with_repeated_content_slot(tmp_path):
+    template = tmp_path / "template.html"
+    template.write_text("{{ Content }}|{{ Content }}", encoding="utf-8")
+    source = tmp_path / "index.md"
+    source.write_text("# Hi", encoding="utf-8")
+
+    generate_page(from_path=source, template_path=template, dest_path=tmp_path)
+
+    assert (tmp_path / "index.html").read_text() == (
+        "<div><h1>Hi</h1></div>|<div><h1>Hi</h1></div>"
+    )
+
+
+def test_generate_page_replaces_hardlinked_output(tmp_path):
+    template = tmp_path / "template.html"
+    template.write_text("{{ Content }}", encoding="utf-8")
+    source = tmp_path / "index.md"
+    source.write_text("# New", encoding="utf-8")
+    previous = tmp_path / "previous.html"
+    previous.write_text("old", encoding="utf-8")
+    os.link(previous, tmp_path / "index.html")
+
+    generate_page(from_path=source, template_path=template, dest_path=tmp_path)
+
+    assert (tmp_path / "index.html").read_text() == "<div><h1>New</h1></div>"
+    assert previous.read_text() == "old"
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "index.html",
+        "index.md",
+        "previous.html",
+        "template.html",
+    ]
+
+
+def test_identical_output_is_not_rewritten(tmp_path):
+    template = tmp_path / "template.html"
+    template.write_text("{{ Content }}", encoding="utf-8")
+    source = tmp_path / "index.md"
+    source.write_text("# Same", encoding="utf-8")
+    output = tmp_path / "index.html"
+
+    first = generate_page(from_path=source, template_path=template, dest_path=tmp_path)
+    os.utime(output, ns=(1, 1))
+
+    # whitespace only edits render to the same bytes
+    source.write_text("# Same\n\n\n", encoding="utf-8")
+    second = generate_page(from_path=source, template_path=template, dest_path=tmp_path)
+    recorded = generate_page(
+        from_path=source,
+        template_path=template,
+        dest_path=tmp_path,
+        previous_hash=first.output_hash,
+    )
+
+    assert first.written and not second.written and not recorded.written
+    assert first.output_hash == second.output_hash == recorded.output_hash
+    assert output.stat().st_mtime_ns == 1
+
+    source.write_text("# Changed", encoding="utf-8")
+    changed = generate_page(
+        from_path=source,
+        template_path=template,
+        dest_path=tmp_path,
+        previous_hash=first.output_hash,
+    )
+
+    assert changed.written
+    assert output.read_text() == "<div><h1>Changed</h1></div>"
+    assert not (tmp_path / ".index.html.tmp").exists()
+
+
+def test_memory_build_never_touches_the_output(tmp_path):
+    template = tmp_path / "template.html"
+    template.write_text("{{ Content }}", encoding="utf-8")
+    source = tmp_path / "index.md"
+    source.write_text("# Memory", encoding="utf-8")
+    memory = MemoryOutput(tmp_path / "public")
+
+    first = generate_page(source, template, tmp_path / "public" / "blog", memory=memory)
+    again = generate_page(source, template, tmp_path / "public" / "blog", memory=memory)
+
+    assert first.written and not again.written
+    assert memory.get("blog/index.html").data == b"<div><h1>Memory</h1></div>"
+    assert not (tmp_path / "public").exists()
+
+    page = memory.get("blog/index.html")
+    output = tmp_path / "public" / "blog" / "index.html"
+    assert write_output(output, page.data, page.output_hash).written
+    assert not write_output(output, page.data, page.output_hash).written
+    assert output.read_bytes() == page.data
+
+
+def test_minified_page_keeps_code_blocks(tmp_path):
+    template = tmp_path / "template.html"
+    template.write_text("<html>\n  <body>\n    {{ Content }}\n  </body>\n</html>\n", encoding="utf-8")
+    source = tmp_path / "index.md"
+    source.write_text("# Title\n\n```\nkeep   this\n  indented\n```", encoding="utf-8")
+
+    page_write = generate_page(source, template, tmp_path, minify=True)
+
+    output = tmp_path / "index.html"
+    assert output.read_text() == (
+        "<html><body><div><h1>Title</h1>"
+        "<pre><code>keep   this\n  indented\n</code></pre></div></body></html>"
+    )
+    assert page_write.output_hash == hash_file(output)
+    assert page_write.size == output.stat().st_size
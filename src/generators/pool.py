@@ -0,0 +1,188 @@
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+from constants import BLOCK_MEMO_MAX_BYTES
+from generators.page_gen import generate_page
+from generators.render_cache import RenderCache
+from profiling.page_profile import memprofile_page, profile_page
+from utils.block_memo import BlockMemo
+
+# everything a worker needs to render a single page
+class PageJob:
+    from_path: Path
+    template_path: Path
+    dest_path: Path
+    cache_dir: Path | None
+    profile: bool
+    cprofile_dir: Path | None
+    memprofile: bool
+    previous_hash: str | None
+    minify: bool
+
+    def __init__(
+        self,
+        from_path: Path,
+        template_path: Path,
+        dest_path: Path,
+        cache_dir: Path | None = None,
+        profile: bool = False,
+        cprofile_dir: Path | None = None,
+        memprofile: bool = False,
+        previous_hash: str | None = None,
+        minify: bool = False,
+    ) -> None:
+        self.from_path = from_path
+        self.template_path = template_path
+        self.dest_path = dest_path
+        self.cache_dir = cache_dir
+        self.profile = profile
+        self.cprofile_dir = cprofile_dir
+        self.memprofile = memprofile
+        self.previous_hash = previous_hash
+        self.minify = minify
+
+
+# outcome of rendering a single page, sent back from the worker
+class PageResult:
+    log: str
+    error: str | None
+    block_hits: int
+    block_misses: int
+    stages: dict[str, float] | None
+    memory: dict | None
+    output_hash: str | None
+    output_size: int | None
+    written: bool
+
+    def __init__(
+        self,
+        log: str,
+        error: str | None,
+        block_hits: int = 0,
+        block_misses: int = 0,
+        stages: dict[str, float] | None = None,
+        memory: dict | None = None,
+        output_hash: str | None = None,
+        output_size: int | None = None,
+        written: bool = True,
+    ) -> None:
+        self.log = log
+        self.error = error
+        self.block_hits = block_hits
+        self.block_misses = block_misses
+        self.stages = stages
+        self.memory = memory
+        self.output_hash = output_hash
+        self.output_size = output_size
+        self.written = written
+
+
+# every process (the parent included) keeps its own block memo for the
+# whole build, so blocks repeated across the pages it renders are reused
+block_memo = BlockMemo(BLOCK_MEMO_MAX_BYTES)
+
+
+def resolve_jobs(jobs: int) -> int:
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+# renders one page and captures everything it prints, so the parent can
+# replay the logs in page order no matter which worker finished first
+def render_page_job(job: PageJob) -> PageResult:
+    log = io.StringIO()
+    error = None
+    page_stages = None
+    page_memory = None
+    page_write = None
+    hits, misses = block_memo.hits, block_memo.misses
+
+    with contextlib.redirect_stdout(log):
+        try:
+            if job.memprofile:
+                page_memory, page_write = memprofile_page(
+                    from_path=job.from_path,
+                    template_path=job.template_path,
+                    dest_path=job.dest_path,
+                    previous_hash=job.previous_hash,
+                    minify=job.minify,
+                )
+            elif job.profile:
+                page_stages, page_write = profile_page(
+                    from_path=job.from_path,
+                    template_path=job.template_path,
+                    dest_path=job.dest_path,
+                    cprofile_dir=job.cprofile_dir,
+                    previous_hash=job.previous_hash,
+                    minify=job.minify,
+                )
+            else:
+                page_write = generate_page(
+                    from_path=job.from_path,
+                    template_path=job.template_path,
+                    dest_path=job.dest_path,
+                    cache=RenderCache(job.cache_dir) if job.cache_dir else None,
+                    memo=block_memo,
+                    previous_hash=job.previous_hash,
+                    minify=job.minify,
+                )
+        except Exception as e:
+            error = f"{job.from_path}: {type(e).__name__}: {e}"
+
+    return PageResult(
+        log.getvalue(),
+        error,
+        block_hits=block_memo.hits - hits,
+        block_misses=block_memo.misses - misses,
+        stages=page_stages,
+        memory=page_memory,
+        output_hash=page_write.output_hash if page_write else None,
+        output_size=page_write.size if page_write else None,
+        written=page_write.written if page_write else error is None,
+    )
+
+
+# renders the pages across a pool of worker processes and yields the
+# results in the same order as the pages were given
+def render_pages(
+    pages: list[tuple[Path, Path]],
+    template_path: Path,
+    jobs: int = 1,
+    cache_dir: Path | None = None,
+    profile: bool = False,
+    cprofile_dir: Path | None = None,
+    memprofile: bool = False,
+    previous_hashes: dict[Path, str] | None = None,
+    minify: bool = False,
+) -> Iterator[PageResult]:
+    previous_hashes = previous_hashes or {}
+    page_jobs = [
+        PageJob(
+            from_path,
+            template_path,
+            dest_path,
+            cache_dir=cache_dir,
+            profile=profile,
+            cprofile_dir=cprofile_dir,
+            memprofile=memprofile,
+            previous_hash=previous_hashes.get(from_path),
+            minify=minify,
+        )
+        for from_path, dest_path in pages
+    ]
+    workers = min(resolve_jobs(jobs), len(page_jobs))
+
+    if workers <= 1:
+        yield from map(render_page_job, page_jobs)
+        return
+
+    # hand out a few chunks per worker to amortize the ipc overhead
+    # while still keeping the load balanced
+    chunksize = max(1, len(page_jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(render_page_job, page_jobs, chunksize=chunksize)
@@ -0,0 +1,122 @@
+from generators.pool import PageJob, render_page_job, render_pages, resolve_jobs
+from utils.files.hashing import hash_file
+
+
+def make_site(tmp_path, count):
+    template = tmp_path / "template.html"
+    template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+
+    pages = []
+    for i in range(count):
+        source = tmp_path / f"page{i}.md"
+        source.write_text(f"# Page {i}\n\nbody {i}", encoding="utf-8")
+        pages.append((source, tmp_path / "public"))
+    return template, pages
+
+
+def test_resolve_jobs():
+    assert resolve_jobs(3) == 3
+    assert resolve_jobs(0) >= 1
+
+
+def test_render_page_job_captures_log(tmp_path):
+    template, [(source, dest)] = make_site(tmp_path, 1)
+
+    result = render_page_job(PageJob(source, template, dest))
+
+    assert result.error is None
+    assert str(source) in result.log
+    assert (dest / "page0.html").read_text() == (
+        "<title>Page 0</title><div><h1>Page 0</h1><p>body 0</p></div>"
+    )
+
+
+def test_render_page_job_reports_error(tmp_path):
+    template, [(source, dest)] = make_site(tmp_path, 1)
+    template.write_text("{{ Missing }}", encoding="utf-8")
+
+    error = render_page_job(PageJob(source, template, dest)).error
+
+    assert error is not None
+    assert error.startswith(str(source))
+    assert "Missing" in error
+
+
+def test_parallel_results_keep_page_order(tmp_path):
+    template, pages = make_site(tmp_path, 8)
+
+    results = list(render_pages(pages, template_path=template, jobs=4))
+
+    assert [result.error for result in results] == [None] * 8
+    for (source, _), result in zip(pages, results):
+        assert str(source) in result.log
+    for i in range(8):
+        assert f"<h1>Page {i}</h1>" in (tmp_path / "public" / f"page{i}.html").read_text()
+
+
+def test_repeated_blocks_hit_the_memo(tmp_path):
+    template, pages = make_site(tmp_path, 3)
+    for source, _ in pages:
+        source.write_text(source.read_text() + "\n\nshared disclaimer", encoding="utf-8")
+
+    results = list(render_pages(pages, template_path=template, jobs=1))
+
+    assert sum(result.block_hits for result in results) >= 2
+
+
+def test_profiled_pages_report_stage_times(tmp_path):
+    template, pages = make_site(tmp_path, 2)
+
+    results = list(render_pages(pages, template_path=template, profile=True))
+
+    for result in results:
+        assert result.error is None
+        assert set(result.stages) >= {"read", "block_parse", "inline_parse", "write"}
+        assert all(seconds >= 0 for seconds in result.stages.values())
+    assert "<h1>Page 1</h1>" in (tmp_path / "public" / "page1.html").read_text()
+
+
+def test_profiled_pages_are_written_like_any_other(tmp_path):
+    template, [(source, dest)] = make_site(tmp_path, 1)
+    output = dest / "page0.html"
+
+    first = render_page_job(PageJob(source, template, dest, profile=True, minify=True))
+    assert first.written
+    assert first.output_hash == hash_file(output)
+    assert first.output_size == output.stat().st_size
+    for stage in ("read", "node_build", "serialize", "template", "minify", "write"):
+        assert first.stages[stage] > 0
+
+    again = render_page_job(
+        PageJob(source, template, dest, profile=True, previous_hash=first.output_hash, minify=True)
+    )
+    assert not again.written
+    assert again.output_hash == first.output_hash
+
+
+def test_memprofiled_pages_report_stage_memory(tmp_path):
+    template, pages = make_site(tmp_path, 2)
+
+    results = list(render_pages(pages, template_path=template, memprofile=True))
+
+    for result in results:
+        assert result.error is None
+        memory = result.memory
+        assert memory["peak"] >= memory["stages"]["node_build"]["peak"] > 0
+        assert memory["rss"] > 0
+        assert memory["sites"]
+    assert "<h1>Page 1</h1>" in (tmp_path / "public" / "page1.html").read_text()
+
+
+def test_memprofile_streams_large_sources(tmp_path, monkeypatch):
+    monkeypatch.setattr("generators.page_gen.STREAMING_THRESHOLD_BYTES", 1024)
+    template, [(source, dest)] = make_site(tmp_path, 1)
+    paragraph = "a long paragraph " * 60 + "\n\n"
+    source.write_text("# Big\n\n" + paragraph * 2000, encoding="utf-8")
+
+    result = render_page_job(PageJob(source, template, dest, memprofile=True))
+
+    assert result.output_hash == hash_file(dest / "page0.html")
+    # measured on the streaming path a build takes, memory is bounded by
+    # the write buffers instead of growing with the page
+    assert result.memory["peak"] < source.stat().st_size / 2
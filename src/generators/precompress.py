@@ -0,0 +1,224 @@
+import gzip
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from constants import VARIANT_SUFFIXES
+from generators.manifest import BuildManifest
+from generators.pool import resolve_jobs
+from utils.files.hashing import hash_bytes
+
+# text outputs worth compressing, images and archives already are
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt"}
+
+Compressor = Callable[[bytes, int], bytes]
+
+
+def gzip_compress(data: bytes, level: int) -> bytes:
+    # no timestamp in the header, the same bytes always compress the same
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+# zstd from the standard library (python 3.14+) or the zstandard package,
+# None when the runtime has neither
+def zstd_compressor() -> Compressor | None:
+    try:
+        from compression import zstd
+
+        return lambda data, level: zstd.compress(data, level=level)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def compressors() -> dict[str, Compressor]:
+    available = {"gzip": gzip_compress}
+    if (zstd := zstd_compressor()) is not None:
+        available["zstd"] = zstd
+    return available
+
+
+# the levels to compress at, by content coding, for the codings this
+# runtime can produce
+def compression_levels(gzip_level: int, zstd_level: int) -> dict[str, int]:
+    levels = {"gzip": gzip_level, "zstd": zstd_level}
+    available = compressors()
+    if "zstd" not in available:
+        print("zstd is not available in this runtime, writing .gz variants only")
+    return {encoding: level for encoding, level in levels.items() if encoding in available}
+
+
+# one output file to compress, sent to a worker
+class CompressJob:
+    path: Path
+    relative: str
+    source_hash: str
+    levels: dict[str, int]
+
+    def __init__(
+        self,
+        path: Path,
+        relative: str,
+        source_hash: str,
+        levels: dict[str, int],
+    ) -> None:
+        self.path = path
+        self.relative = relative
+        self.source_hash = source_hash
+        self.levels = levels
+
+
+class CompressResult:
+    relative: str
+    # encoding -> {"hash": ..., "size": ...} of every variant written
+    variants: dict[str, dict]
+    error: str | None
+
+    def __init__(
+        self,
+        relative: str,
+        variants: dict[str, dict],
+        error: str | None = None,
+    ) -> None:
+        self.relative = relative
+        self.variants = variants
+        self.error = error
+
+
+class CompressStats:
+    compressed: int
+    unchanged: int
+    removed: int
+    saved: int
+
+    def __init__(self) -> None:
+        self.compressed = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.saved = 0
+
+
+# writes a variant of the file for every level asked for. a variant that
+# would not be smaller than the file is not written, and any older one removed
+def compress_file(job: CompressJob) -> CompressResult:
+    variants = {}
+    try:
+        data = job.path.read_bytes()
+        available = compressors()
+        for encoding, level in job.levels.items():
+            target = variant_path(job.path, encoding)
+            compressed = available[encoding](data, level)
+            if len(compressed) >= len(data):
+                target.unlink(missing_ok=True)
+                continue
+
+            tmp_path = target.with_name(f".{target.name}.tmp")
+            tmp_path.write_bytes(compressed)
+            os.replace(tmp_path, target)
+            variants[encoding] = {"hash": hash_bytes(compressed), "size": len(compressed)}
+    except Exception as e:
+        return CompressResult(job.relative, variants, f"{job.path}: {type(e).__name__}: {e}")
+    return CompressResult(job.relative, variants)
+
+
+def variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + VARIANT_SUFFIXES[encoding])
+
+
+# a file needs compressing when it changed since its variants were made,
+# the levels changed or a variant went missing or is older than the file
+# (copy2 carries the source mtime of a re-synced static file over)
+def needs_compression(
+    path: Path,
+    source_hash: str,
+    levels: dict[str, int],
+    entry: dict | None,
+) -> bool:
+    if entry is None or entry["hash"] != source_hash or entry["levels"] != levels:
+        return True
+    try:
+        mtime = path.stat().st_mtime_ns
+        return any(
+            variant_path(path, encoding).stat().st_mtime_ns < mtime
+            for encoding in entry["variants"]
+        )
+    except FileNotFoundError:
+        return True
+
+
+def remove_variants(path: Path) -> None:
+    for encoding in VARIANT_SUFFIXES:
+        variant_path(path, encoding).unlink(missing_ok=True)
+
+
+# brings the precompressed variants below output_root in line with the
+# output recorded in the manifest. only files whose hash changed since they
+# were last compressed go to the worker pool, variants of files that are
+# gone (or of every file, when levels is empty) are removed
+def precompress_outputs(
+    manifest: BuildManifest,
+    output_root: Path,
+    live_root: Path,
+    levels: dict[str, int],
+    jobs: int = 1,
+) -> CompressStats:
+    stats = CompressStats()
+    state = manifest.output_state(live_root)
+
+    jobs_todo = []
+    for relative, entry in sorted(state.items()):
+        if not levels or Path(relative).suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        path = output_root / relative
+        if needs_compression(path, entry["hash"], levels, manifest.compressed.get(relative)):
+            jobs_todo.append(CompressJob(path, relative, entry["hash"], levels))
+        else:
+            stats.unchanged += 1
+
+    for relative in sorted(manifest.compressed):
+        if levels and relative in state and Path(relative).suffix in COMPRESSIBLE_SUFFIXES:
+            continue
+        del manifest.compressed[relative]
+        remove_variants(output_root / relative)
+        stats.removed += 1
+
+    for job, result in zip(jobs_todo, compress_files(jobs_todo, jobs)):
+        if result.error is not None:
+            # the plain file is still served, just not a stale variant
+            print(f"Could not precompress {result.error}")
+            manifest.compressed.pop(job.relative, None)
+            remove_variants(job.path)
+            continue
+        manifest.record_compressed(job.relative, job.source_hash, levels, result.variants)
+        stats.compressed += 1
+        stats.saved += state[job.relative]["size"] * len(result.variants) - sum(
+            variant["size"] for variant in result.variants.values()
+        )
+    return stats
+
+
+# compresses the files across a pool of worker processes, results come
+# back in the order the jobs were given
+def compress_files(compress_jobs: list[CompressJob], jobs: int = 1) -> Iterator[CompressResult]:
+    workers = min(resolve_jobs(jobs), len(compress_jobs))
+    if workers <= 1:
+        yield from map(compress_file, compress_jobs)
+        return
+
+    chunksize = max(1, len(compress_jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(compress_file, compress_jobs, chunksize=chunksize)
+
+
+def summarize_compression(stats: CompressStats, levels: dict[str, int]) -> str:
+    codings = ", ".join(f"{encoding} {level}" for encoding, level in levels.items()) or "off"
+    return (
+        f"Precompressed ({codings}): {stats.compressed} compressed, "
+        f"{stats.unchanged} unchanged, {stats.removed} removed "
+        f"({stats.saved / 1024:.1f} KiB saved)"
+    )
@@ -0,0 +1,77 @@
+import gzip
+import os
+from pathlib import Path
+
+from generators.manifest import BuildManifest
+from generators.precompress import precompress_outputs
+from utils.files.hashing import hash_file
+
+PAGE = b"<p>" + b"compressible text " * 200 + b"</p>"
+
+
+def output(root, relative, content: bytes, manifest):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    manifest.record_static(path.relative_to(root), hash_file(path), len(content))
+    return path
+
+
+def test_only_changed_text_outputs_are_compressed(tmp_path):
+    manifest = BuildManifest()
+    output(tmp_path, "blog/index.html", PAGE, manifest)
+    output(tmp_path, "index.css", b"a{}", manifest)
+    output(tmp_path, "tom.png", PAGE, manifest)
+
+    stats = precompress_outputs(manifest, tmp_path, tmp_path, {"gzip": 9}, jobs=2)
+
+    assert stats.compressed == 2 and stats.unchanged == 0
+    assert gzip.decompress((tmp_path / "blog/index.html.gz").read_bytes()) == PAGE
+    # not worth it for three bytes, and pngs are compressed already
+    assert not (tmp_path / "index.css.gz").exists()
+    assert not (tmp_path / "tom.png.gz").exists()
+    assert set(manifest.output_state(tmp_path)) == {
+        "blog/index.html",
+        "blog/index.html.gz",
+        "index.css",
+        "tom.png",
+    }
+
+    stats = precompress_outputs(manifest, tmp_path, tmp_path, {"gzip": 9})
+    assert stats.compressed == 0 and stats.unchanged == 2
+
+    output(tmp_path, "blog/index.html", PAGE + b"<p>more</p>", manifest)
+    stats = precompress_outputs(manifest, tmp_path, tmp_path, {"gzip": 9})
+    assert stats.compressed == 1
+    assert gzip.decompress((tmp_path / "blog/index.html.gz").read_bytes()).endswith(b"more</p>")
+
+
+def test_variants_older_than_their_file_are_redone(tmp_path):
+    manifest = BuildManifest()
+    page = output(tmp_path, "index.html", PAGE, manifest)
+    precompress_outputs(manifest, tmp_path, tmp_path, {"gzip": 9})
+
+    # re-synced with copy2, same bytes but a newer mtime than the variant
+    os.utime(tmp_path / "index.html.gz", ns=(1, 1))
+    stats = precompress_outputs(manifest, tmp_path, tmp_path, {"gzip": 9})
+
+    assert stats.compressed == 1
+    assert (tmp_path / "index.html.gz").stat().st_mtime_ns >= page.stat().st_mtime_ns
+
+
+def test_variants_of_removed_outputs_or_without_levels_are_deleted(tmp_path):
+    manifest = BuildManifest()
+    output(tmp_path, "index.html", PAGE, manifest)
+    output(tmp_path, "gone.html", PAGE, manifest)
+    precompress_outputs(manifest, tmp_path, tmp_path, {"gzip": 9})
+
+    (tmp_path / "gone.html").unlink()
+    manifest.remove_static(Path("gone.html"))
+    stats = precompress_outputs(manifest, tmp_path, tmp_path, {"gzip": 9})
+    assert stats.removed == 1
+    assert not (tmp_path / "gone.html.gz").exists()
+
+    stats = precompress_outputs(manifest, tmp_path, tmp_path, {})
+    assert stats.removed == 1
+    assert not (tmp_path / "index.html.gz").exists()
+    assert manifest.compressed == {} and manifest.variants() == set()
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import struct
+import tarfile
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO
+
+from constants import RENDERER_VERSION
+
+# bumped when the layout of a cache entry changes
+CACHE_FORMAT_VERSION = 2
+
+# an entry is the length of the utf-8 title, the title and the utf-8 html,
+# zlib compressed. plain bytes, so a cache packed by one python version
+# reads back the same in any other
+TITLE_LENGTH = struct.Struct("<I")
+
+
+# streams one entry into its file, the html is compressed as it comes in
+# and small writes are batched like in HashingWriter
+class CacheEntryWriter:
+    def __init__(self, file: BinaryIO, title: str, buffer_size: int = 64 * 1024) -> None:
+        self.file = file
+        self.buffer_size = buffer_size
+        self._compressor = zlib.compressobj()
+        self._pending: list[str] = []
+        self._pending_size = 0
+        encoded = title.encode("utf-8")
+        self.file.write(self._compressor.compress(TITLE_LENGTH.pack(len(encoded)) + encoded))
+
+    def write(self, text: str) -> int:
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        data = "".join(self._pending).encode("utf-8")
+        self._pending.clear()
+        self._pending_size = 0
+        self.file.write(self._compressor.compress(data))
+
+    def close(self) -> None:
+        self.flush()
+        self.file.write(self._compressor.flush())
+
+
+# content addressed cache of rendered pages shared between builds (and
+# between CI jobs through pack/unpack). an entry is keyed by the hash of the
+# markdown source plus the renderer version and holds the page title and the
+# rendered content html. entry mtimes are bumped on every hit, so eviction
+# can drop the least recently used ones
+class RenderCache:
+    root: Path
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    @staticmethod
+    def key(source: bytes) -> str:
+        digest = hashlib.sha256(source)
+        digest.update(f"\0{RENDERER_VERSION}\0{CACHE_FORMAT_VERSION}".encode())
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> tuple[str, str] | None:
+        path = self.entry_path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+
+        try:
+            data = zlib.decompress(data)
+            (title_length,) = TITLE_LENGTH.unpack_from(data)
+            html_start = TITLE_LENGTH.size + title_length
+            if html_start > len(data):
+                raise ValueError("title runs past the end of the entry")
+            title = data[TITLE_LENGTH.size : html_start].decode("utf-8")
+            html = data[html_start:].decode("utf-8")
+        except (ValueError, struct.error, zlib.error):
+            # a corrupted entry is dropped and treated as a miss
+            path.unlink(missing_ok=True)
+            return None
+        return title, html
+
+    def put(self, key: str, title: str, html: str) -> None:
+        with self.writer(key, title) as entry:
+            entry.write(html)
+
+    # stores the html written to the yielded writer under key. the entry only
+    # appears once the block finishes, an exception leaves no entry behind
+    @contextmanager
+    def writer(self, key: str, title: str) -> Iterator[CacheEntryWriter]:
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # several workers may store the same entry at once,
+        # each one writes its own temp file and renames it into place
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.tmp")
+        try:
+            with tmp_path.open("wb") as file:
+                entry = CacheEntryWriter(file, title)
+                yield entry
+                entry.close()
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def entries(self) -> list[tuple[Path, os.stat_result]]:
+        if not self.root.exists():
+            return []
+        return [
+            (path, path.stat())
+            for path in self.root.glob("*/*")
+            if not path.name.endswith(".tmp")
+        ]
+
+    # removes the least recently used entries until the cache fits in max_bytes
+    def evict(self, max_bytes: int) -> int:
+        entries = sorted(self.entries(), key=lambda entry: entry[1].st_mtime_ns)
+        total = sum(stat.st_size for _, stat in entries)
+
+        evicted = 0
+        for path, stat in entries:
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            evicted += 1
+        return evicted
+
+    # archives the cache with relative paths so it can be restored anywhere
+    def pack(self, archive_path: Path) -> None:
+        with tarfile.open(archive_path, "w:gz") as archive:
+            for path, _ in sorted(self.entries()):
+                archive.add(path, arcname=str(path.relative_to(self.root)))
+
+    def unpack(self, archive_path: Path) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        with tarfile.open(archive_path, "r:*") as archive:
+            archive.extractall(self.root, filter="data")
@@ -0,0 +1,121 @@
+import os
+import struct
+import zlib
+
+import pytest
+
+from generators.page_gen import generate_page, parse_page, write_page
+from generators.render_cache import RenderCache
+from generators.template import load_template
+
+
+def test_miss_then_hit(tmp_path):
+    cache = RenderCache(tmp_path / "cache")
+    key = cache.key(b"# Title")
+
+    assert cache.get(key) is None
+    cache.put(key, "Title", "<div><h1>Title</h1></div>")
+    assert cache.get(key) == ("Title", "<div><h1>Title</h1></div>")
+
+
+def test_key_depends_on_source():
+    assert RenderCache.key(b"a") != RenderCache.key(b"b")
+    assert RenderCache.key(b"a") == RenderCache.key(b"a")
+
+
+def test_entry_is_length_prefixed_utf8(tmp_path):
+    cache = RenderCache(tmp_path)
+    key = cache.key(b"x")
+    cache.put(key, "Tïtle", "<p>é</p>")
+
+    data = zlib.decompress(cache.entry_path(key).read_bytes())
+    assert data == struct.pack("<I", 6) + "Tïtle".encode() + "<p>é</p>".encode()
+
+
+def test_failed_entry_is_not_stored(tmp_path):
+    cache = RenderCache(tmp_path)
+    key = cache.key(b"x")
+
+    with pytest.raises(RuntimeError):
+        with cache.writer(key, "t") as entry:
+            entry.write("<p>half")
+            raise RuntimeError
+
+    assert cache.get(key) is None
+    assert list(tmp_path.glob("*/*")) == []
+
+
+def test_corrupted_entry_is_a_miss(tmp_path):
+    cache = RenderCache(tmp_path)
+    key = cache.key(b"x")
+    cache.put(key, "t", "h")
+    cache.entry_path(key).write_bytes(b"garbage")
+
+    assert cache.get(key) is None
+    assert not cache.entry_path(key).exists()
+
+
+def test_evict_drops_least_recently_used(tmp_path):
+    cache = RenderCache(tmp_path)
+    keys = [cache.key(str(i).encode()) for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, "t", "x" * 1000)
+        os.utime(cache.entry_path(key), ns=(age * 10**9, age * 10**9))
+
+    # reading the oldest entry makes it the most recently used one
+    cache.get(keys[0])
+    size = cache.entry_path(keys[0]).stat().st_size
+    evicted = cache.evict(max_bytes=size * 2)
+
+    assert evicted == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+
+def test_pack_and_unpack(tmp_path):
+    cache = RenderCache(tmp_path / "a")
+    key = cache.key(b"page")
+    cache.put(key, "Page", "<p>page</p>")
+    archive = tmp_path / "cache.tar.gz"
+
+    cache.pack(archive)
+    restored = RenderCache(tmp_path / "b")
+    restored.unpack(archive)
+
+    assert restored.get(key) == ("Page", "<p>page</p>")
+
+
+def test_generate_page_uses_cache(tmp_path):
+    cache = RenderCache(tmp_path / "cache")
+    template = tmp_path / "template.html"
+    template.write_text("<t>{{ Title }}</t>{{ Content }}", encoding="utf-8")
+    source = tmp_path / "index.md"
+    source.write_text("# Hi\n\ntext", encoding="utf-8")
+
+    generate_page(source, template, tmp_path / "one", cache=cache)
+    key = cache.key(source.read_bytes())
+    assert cache.get(key) == ("Hi", "<div><h1>Hi</h1><p>text</p></div>")
+
+    # a poisoned entry proves the second render comes from the cache
+    cache.put(key, "Cached", "<p>from cache</p>")
+    generate_page(source, template, tmp_path / "two", cache=cache)
+
+    assert (tmp_path / "two" / "index.html").read_text() == (
+        "<t>Cached</t><p>from cache</p>"
+    )
+
+
+def test_entry_is_stored_while_the_page_is_written(tmp_path):
+    cache = RenderCache(tmp_path / "cache")
+    template = tmp_path / "template.html"
+    template.write_text("<t>{{ Title }}</t>{{ Content }}", encoding="utf-8")
+    source = tmp_path / "index.md"
+    source.write_text("# Hi\n\ntext", encoding="utf-8")
+    key = cache.key(source.read_bytes())
+
+    title, content = parse_page(source, cache)
+    assert cache.get(key) is None
+
+    write_page(load_template(template), title, content, tmp_path / "index.html")
+    assert cache.get(key) == ("Hi", "<div><h1>Hi</h1><p>text</p></div>")
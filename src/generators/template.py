@@ -0,0 +1,209 @@
+import hashlib
+import re
+from pathlib import Path
+from typing import Any, Mapping, TextIO
+
+from errors.syntax import TemplateSyntaxError
+from profiling import stages
+
+# {{ variable }}, {{ item.field }} and {% statement %} tags
+TAG_PATTERN = re.compile(
+    r"\{\{\s*([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)\s*\}\}"
+    r"|\{%\s*(.+?)\s*%\}"
+)
+INCLUDE_PATTERN = re.compile(r"""include\s+["']([^"']+)["']""")
+IF_PATTERN = re.compile(r"if\s+([a-zA-Z_][\w.]*)")
+FOR_PATTERN = re.compile(r"for\s+([a-zA-Z_]\w*)\s+in\s+([a-zA-Z_][\w.]*)")
+
+Context = Mapping[str, Any]
+
+
+# list that can be used as a write sink, rendering to a string
+# then becomes a single join over the collected fragments
+class FragmentList(list):
+    write = list.append
+
+
+class Variable:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.path = name.split(".")
+
+    def resolve(self, context: Context, strict: bool = True) -> Any:
+        value: Any = context
+        for key in self.path:
+            if not isinstance(value, Mapping) or key not in value:
+                if strict:
+                    raise KeyError(f"Missing variable: {self.name}")
+                return None
+            value = value[key]
+        return value
+
+    # values that know how to stream themselves (html nodes) are written
+    # directly into the sink instead of being turned into a string first
+    def write(self, sink: TextIO, context: Context) -> None:
+        value = self.resolve(context)
+        if hasattr(value, "write_html"):
+            with stages.measure("serialize"):
+                value.write_html(sink)
+        else:
+            sink.write(str(value))
+
+
+class Conditional:
+    def __init__(self, condition: Variable) -> None:
+        self.condition = condition
+        self.body: list = []
+        self.else_body: list = []
+
+    def write(self, sink: TextIO, context: Context) -> None:
+        if self.condition.resolve(context, strict=False):
+            write_segments(self.body, sink, context)
+        else:
+            write_segments(self.else_body, sink, context)
+
+
+class Loop:
+    def __init__(self, target: str, iterable: Variable) -> None:
+        self.target = target
+        self.iterable = iterable
+        self.body: list = []
+
+    def write(self, sink: TextIO, context: Context) -> None:
+        for item in self.iterable.resolve(context, strict=False) or ():
+            write_segments(self.body, sink, {**context, self.target: item})
+
+
+def write_segments(segments: list, sink: TextIO, context: Context) -> None:
+    for segment in segments:
+        if type(segment) is str:
+            sink.write(segment)
+        else:
+            segment.write(sink, context)
+
+
+# a template compiled once into literal text and slots, rendering is
+# a walk over the segment list without touching the source again
+class Template:
+    segments: list
+    dependencies: list[Path]
+
+    def __init__(self, segments: list, dependencies: list[Path]) -> None:
+        self.segments = segments
+        self.dependencies = dependencies
+
+    def render(self, context: Context) -> str:
+        fragments = FragmentList()
+        write_segments(self.segments, fragments, context)
+        return "".join(fragments)
+
+    def write(self, sink: TextIO, context: Context) -> None:
+        write_segments(self.segments, sink, context)
+
+
+def compile_template(content: str, base_dir: Path | None = None) -> Template:
+    dependencies: list[Path] = []
+    segments = _compile(content, base_dir, dependencies, included=())
+    return Template(segments, dependencies)
+
+
+def _compile(
+    content: str,
+    base_dir: Path | None,
+    dependencies: list[Path],
+    included: tuple[Path, ...],
+) -> list:
+    root: list = []
+    # stack of (open block, the list new segments are appended to)
+    stack: list[tuple[Conditional | Loop | None, list]] = [(None, root)]
+
+    def append(segment) -> None:
+        target = stack[-1][1]
+        # adjacent literals are merged so rendering writes fewer fragments
+        if type(segment) is str and target and type(target[-1]) is str:
+            target[-1] += segment
+        elif segment != "":
+            target.append(segment)
+
+    last_index = 0
+    for match in TAG_PATTERN.finditer(content):
+        append(content[last_index : match.start()])
+        last_index = match.end()
+
+        variable, statement = match.groups()
+        if variable is not None:
+            append(Variable(variable))
+            continue
+
+        if include := INCLUDE_PATTERN.fullmatch(statement):
+            if base_dir is None:
+                raise TemplateSyntaxError("include used in a template without a path")
+            path = (base_dir / include.group(1)).resolve()
+            if path in included:
+                raise TemplateSyntaxError(f"recursive include of {path}")
+            dependencies.append(path)
+            for segment in _compile(
+                path.read_text(encoding="utf-8"),
+                path.parent,
+                dependencies,
+                included + (path,),
+            ):
+                append(segment)
+        elif condition := IF_PATTERN.fullmatch(statement):
+            block = Conditional(Variable(condition.group(1)))
+            append(block)
+            stack.append((block, block.body))
+        elif loop := FOR_PATTERN.fullmatch(statement):
+            block = Loop(loop.group(1), Variable(loop.group(2)))
+            append(block)
+            stack.append((block, block.body))
+        elif statement == "else":
+            block, _ = stack[-1]
+            if not isinstance(block, Conditional):
+                raise TemplateSyntaxError("else outside of an if block")
+            stack[-1] = (block, block.else_body)
+        elif statement in ("endif", "endfor"):
+            block, _ = stack.pop() if len(stack) > 1 else (None, root)
+            expected = Conditional if statement == "endif" else Loop
+            if not isinstance(block, expected):
+                raise TemplateSyntaxError(f"unexpected {statement}")
+        else:
+            raise TemplateSyntaxError(f"unknown template statement: {statement}")
+
+    append(content[last_index:])
+
+    if len(stack) > 1:
+        raise TemplateSyntaxError("unclosed if or for block")
+
+    return root
+
+
+# compiled templates keyed by path, an entry is reused for as long as the
+# template file keeps the same mtime and size
+_template_cache: dict[Path, tuple[tuple[int, int], Template]] = {}
+
+
+def load_template(path: Path) -> Template:
+    stat = path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _template_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    template = compile_template(path.read_text(encoding="utf-8"), path.parent)
+    _template_cache[path] = (key, template)
+    return template
+
+
+def clear_template_cache() -> None:
+    _template_cache.clear()
+
+
+# hash of the template and every partial it includes, used to decide
+# whether the pages have to be rebuilt
+def template_fingerprint(path: Path) -> str:
+    digest = hashlib.sha256(path.read_bytes())
+    for dependency in load_template(path).dependencies:
+        digest.update(dependency.read_bytes())
+    return digest.hexdigest()
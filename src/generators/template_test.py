@@ -0,0 +1,122 @@
+import io
+
+import pytest
+
+from errors.syntax import TemplateSyntaxError
+from generators.template import compile_template, load_template, template_fingerprint
+from nodes.leafnode import LeafNode
+
+
+def test_literal_text_only():
+    assert compile_template("<p>static</p>").render({}) == "<p>static</p>"
+
+
+def test_variables_and_dotted_lookup():
+    template = compile_template("{{ Title }} by {{ post.author }}")
+
+    assert template.render({"Title": "Hi", "post": {"author": "tom"}}) == "Hi by tom"
+
+
+def test_missing_variable_raises():
+    with pytest.raises(KeyError, match="Missing variable: Title"):
+        compile_template("{{ Title }}").render({})
+
+
+def test_adjacent_literals_are_merged(tmp_path):
+    (tmp_path / "head.html").write_text("<head>", encoding="utf-8")
+    template = compile_template('{% include "head.html" %}<body>', tmp_path)
+
+    assert template.segments == ["<head><body>"]
+
+
+def test_conditionals():
+    template = compile_template("{% if Draft %}draft{% else %}live{% endif %}")
+
+    assert template.render({"Draft": True}) == "draft"
+    assert template.render({"Draft": ""}) == "live"
+    assert template.render({}) == "live"
+
+
+def test_loops():
+    template = compile_template(
+        "<ul>{% for tag in Tags %}<li>{{ tag.name }}</li>{% endfor %}</ul>"
+    )
+
+    assert (
+        template.render({"Tags": [{"name": "a"}, {"name": "b"}]})
+        == "<ul><li>a</li><li>b</li></ul>"
+    )
+    assert template.render({}) == "<ul></ul>"
+
+
+def test_includes_resolve_relative_to_template(tmp_path):
+    partials = tmp_path / "partials"
+    partials.mkdir()
+    (partials / "header.html").write_text(
+        '<h1>{{ Title }}</h1>{% include "nav.html" %}', encoding="utf-8"
+    )
+    (partials / "nav.html").write_text("<nav></nav>", encoding="utf-8")
+    (tmp_path / "template.html").write_text(
+        '{% include "partials/header.html" %}{{ Content }}', encoding="utf-8"
+    )
+
+    template = load_template(tmp_path / "template.html")
+
+    assert template.render({"Title": "t", "Content": "c"}) == "<h1>t</h1><nav></nav>c"
+    assert template.dependencies == [
+        (partials / "header.html").resolve(),
+        (partials / "nav.html").resolve(),
+    ]
+
+
+def test_recursive_include_is_rejected(tmp_path):
+    (tmp_path / "a.html").write_text('{% include "a.html" %}', encoding="utf-8")
+
+    with pytest.raises(TemplateSyntaxError, match="recursive include"):
+        load_template(tmp_path / "a.html")
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "{% if A %}never closed",
+        "{% endif %}",
+        "{% for x in Xs %}{% endif %}",
+        "{% else %}",
+        "{% unknown %}",
+    ],
+)
+def test_syntax_errors(source):
+    with pytest.raises(TemplateSyntaxError):
+        compile_template(source)
+
+
+def test_write_streams_html_nodes():
+    template = compile_template("<body>{{ Content }}</body>")
+    sink = io.StringIO()
+
+    template.write(sink, {"Content": LeafNode("hi", "b")})
+
+    assert sink.getvalue() == "<body><b>hi</b></body>"
+
+
+def test_load_template_is_cached_until_file_changes(tmp_path):
+    path = tmp_path / "template.html"
+    path.write_text("one", encoding="utf-8")
+
+    first = load_template(path)
+    assert load_template(path) is first
+
+    path.write_text("second", encoding="utf-8")
+    assert load_template(path).render({}) == "second"
+
+
+def test_fingerprint_covers_partials(tmp_path):
+    (tmp_path / "footer.html").write_text("<footer>", encoding="utf-8")
+    path = tmp_path / "template.html"
+    path.write_text('{% include "footer.html" %}', encoding="utf-8")
+
+    before = template_fingerprint(path)
+    (tmp_path / "footer.html").write_text("<footer />", encoding="utf-8")
+
+    assert template_fingerprint(path) != before
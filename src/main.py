@@ -1,9 +1,168 @@
+import argparse
+
+from pathlib import Path
+
 from build import setup_static_content, build
+from constants import (
+    DEPLOYED_STATE_PATH,
+    DEST_GENERATIONS_DIR_PATH,
+    DEST_STATIC_DIR_PATH,
+    GZIP_LEVEL,
+    KEEP_GENERATIONS,
+    MANIFEST_FILE_PATH,
+    RENDER_CACHE_DIR_PATH,
+    ZSTD_LEVEL,
+)
+from generators.deploy import save_json
+from generators.manifest import BuildManifest
+from generators.precompress import compression_levels
+from generators.render_cache import RenderCache
+from utils.files.generations import OutputGenerations
+from utils.files.sync import SyncMode
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the static site")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages, 0 uses every core",
+    )
+    parser.add_argument(
+        "--static-mode",
+        choices=[mode.value for mode in SyncMode],
+        default=SyncMode.COPY.value,
+        help="how changed static files are placed into the output directory",
+    )
+    parser.add_argument(
+        "--hash-static",
+        action="store_true",
+        help="compare static files by content hash when their mtime differs",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="do not read or write the on-disk render cache",
+    )
+    parser.add_argument(
+        "--restore-cache",
+        type=Path,
+        metavar="ARCHIVE",
+        help="unpack a render cache tarball before building",
+    )
+    parser.add_argument(
+        "--save-cache",
+        type=Path,
+        metavar="ARCHIVE",
+        help="pack the render cache into a tarball after building",
+    )
+    profiling = parser.add_mutually_exclusive_group()
+    profiling.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every render stage per page and write a json report",
+    )
+    profiling.add_argument(
+        "--memprofile",
+        action="store_true",
+        help="trace peak and net allocations per page and stage, with rss and top call sites",
+    )
+    parser.add_argument(
+        "--cprofile",
+        action="store_true",
+        help="with --profile, also merge cProfile stats from every worker",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of pages, functions and call sites listed in the profile",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="collapse whitespace and strip comments from the generated html",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="write .gz (and .zst where available) variants of changed text outputs",
+    )
+    parser.add_argument("--gzip-level", type=int, default=GZIP_LEVEL, metavar="N")
+    parser.add_argument("--zstd-level", type=int, default=ZSTD_LEVEL, metavar="N")
+    parser.add_argument(
+        "--keep-generations",
+        type=int,
+        default=KEEP_GENERATIONS,
+        metavar="N",
+        help="number of published output generations kept for rollback",
+    )
+    parser.add_argument(
+        "--mark-deployed",
+        action="store_true",
+        help="record the current output as deployed, later deploy diffs start from it",
+    )
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="point the output back at the previous generation and exit",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    generations = OutputGenerations(
+        DEST_STATIC_DIR_PATH, DEST_GENERATIONS_DIR_PATH, keep=args.keep_generations
+    )
+    if args.rollback:
+        generations.rollback(MANIFEST_FILE_PATH)
+        return
+    if args.mark_deployed:
+        state = BuildManifest.load(MANIFEST_FILE_PATH).output_state(DEST_STATIC_DIR_PATH)
+        save_json(DEPLOYED_STATE_PATH, state)
+        print(f"Marked {len(state)} files as deployed in {DEPLOYED_STATE_PATH}")
+        return
+
+    cache = RenderCache(RENDER_CACHE_DIR_PATH)
+    if args.restore_cache is not None:
+        cache.unpack(args.restore_cache)
 
+    # everything is built into a staging generation and only goes live
+    # once the whole site is there
+    staging = generations.stage()
+    try:
+        static_stats = setup_static_content(
+            mode=SyncMode(args.static_mode),
+            use_hash=args.hash_static,
+            output_dir=staging,
+        )
+        build(
+            jobs=args.jobs,
+            use_cache=not args.no_cache,
+            profile=args.profile,
+            cprofile=args.cprofile,
+            profile_top=args.profile_top,
+            memprofile=args.memprofile,
+            output_dir=staging,
+            static_stats=static_stats,
+            minify=args.minify,
+            precompress_levels=(
+                compression_levels(args.gzip_level, args.zstd_level)
+                if args.precompress
+                else {}
+            ),
+        )
+    except BaseException:
+        generations.discard(staging)
+        raise
+    generations.publish(staging, MANIFEST_FILE_PATH)
 
-def main() -> None:
-    setup_static_content()
-    build()
+    if args.save_cache is not None:
+        cache.pack(args.save_cache)
 
 
 if __name__ == "__main__":
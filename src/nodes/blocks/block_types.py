@@ -1,6 +1,9 @@
 import re
 from enum import Enum
 
+HEADING_PATTERN = re.compile(r"#{1,6} ")
+ORDERED_ITEM_PATTERN = re.compile(r"(\d+)\. ")
+
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -11,27 +14,102 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
-def block_to_blocktype(markdown: str) -> BlockType:
-    lines = markdown.split("\n")
+# a typed block together with the source lines (1 based, inclusive) it came from
+class Block:
+    __slots__ = ("block_type", "lines", "start_line", "end_line")
+
+    block_type: BlockType
+    lines: list[str]
+    start_line: int
+    end_line: int
+
+    def __init__(
+        self,
+        block_type: BlockType,
+        lines: list[str],
+        start_line: int = 1,
+        end_line: int | None = None,
+    ) -> None:
+        self.block_type = block_type
+        self.lines = lines
+        self.start_line = start_line
+        self.end_line = end_line if end_line is not None else start_line + len(lines) - 1
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def __eq__(self, value: object) -> bool:
+        return (
+            (
+                self.block_type == value.block_type
+                and self.lines == value.lines
+                and self.start_line == value.start_line
+                and self.end_line == value.end_line
+            )
+            if isinstance(value, Block)
+            else NotImplemented
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"Block({self.block_type.value},{self.start_line}-{self.end_line},"
+            f"{self.lines!r})"
+        )
+
+
+# collects the lines of a block and keeps track of which line based block
+# types are still possible, so the type is known once the last line is added
+class BlockClassifier:
+    __slots__ = ("lines", "quote", "unordered", "ordered")
 
-    if markdown.startswith("```") and markdown.endswith("```") and len(lines) >= 2:
-        return BlockType.CODE
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+        self.quote = True
+        self.unordered = True
+        self.ordered = True
 
-    if re.match(r"^#{1,6} ", markdown):
-        return BlockType.HEADING
+    def add(self, line: str) -> None:
+        self.lines.append(line)
 
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
+        if self.quote and not line.startswith(">"):
+            self.quote = False
 
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.UNORDERED_LIST
+        if self.unordered and not line.startswith("- "):
+            self.unordered = False
 
-    ordered = True
-    for i, line in enumerate(lines, start=1):
-        if not line.startswith(f"{i}. "):
-            ordered = False
-            break
-    if ordered:
-        return BlockType.ORDERED_LIST
+        if self.ordered:
+            match = ORDERED_ITEM_PATTERN.match(line)
+            if match is None or match.group(1) != str(len(self.lines)):
+                self.ordered = False
 
-    return BlockType.PARAGRAPH
+    def block_type(self) -> BlockType:
+        lines = self.lines
+
+        if (
+            len(lines) >= 2
+            and lines[0].startswith("```")
+            and lines[-1].endswith("```")
+        ):
+            return BlockType.CODE
+
+        if HEADING_PATTERN.match(lines[0]):
+            return BlockType.HEADING
+
+        if self.quote:
+            return BlockType.QUOTE
+
+        if self.unordered:
+            return BlockType.UNORDERED_LIST
+
+        if self.ordered:
+            return BlockType.ORDERED_LIST
+
+        return BlockType.PARAGRAPH
+
+
+def block_to_blocktype(markdown: str) -> BlockType:
+    classifier = BlockClassifier()
+    for line in markdown.split("\n"):
+        classifier.add(line)
+    return classifier.block_type()
@@ -1,7 +1,12 @@
-from typing import List, Dict
+import io
+from typing import List, Dict, TextIO
 
 
 class HTMLNode:
+    # slots drop the per instance __dict__, subclasses declare empty slots
+    # so that they stay compact as well
+    __slots__ = ("tag", "value", "children", "props")
+
     tag: str | None
     value: str | None
     children: List["HTMLNode"] | None
@@ -24,26 +29,28 @@ class HTMLNode:
     # it returns the value,
     # otherwise it returns the tag with the children and props
     def to_html(self) -> str:
+        sink = io.StringIO()
+        self.write_html(sink)
+        return sink.getvalue()
+
+    # streams the html for the node into the sink fragment by fragment,
+    # so no intermediate string is built for any subtree
+    def write_html(self, sink: TextIO) -> None:
         if self.tag is None:
-            return self.value or ""
+            sink.write(self.value or "")
+            return
 
-        props_str = ""
-        if self.props:
-            props_str = self.stringified_props()
+        sink.write(f"<{self.tag}{self.stringified_props()}>")
 
-        children_str = ""
         if self.children:
-            children_str = self.stringified_children()
+            for child in self.children:
+                child.write_html(sink)
 
         # Include value if it exists, after children
-        content_str = children_str
         if self.value:
-            content_str += self.value
+            sink.write(self.value)
 
-        return self.to_string_rep(
-            props_str,
-            content_str,
-        )
+        sink.write(f"</{self.tag}>")
 
     # helper method to convert props dict to string
     def stringified_props(self) -> str:
@@ -1,10 +1,12 @@
-from typing import Dict, override
+from typing import Dict, TextIO, override
 from nodes.htmlnode import HTMLNode
 
 
 # this is a leaf node that does not contain
 # another HTMLnode, it only contains a value, and it does not have a tag or props
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         value: str,
@@ -25,7 +27,11 @@ class LeafNode(HTMLNode):
         if self.tag is None:
             return self.value
 
-        return super().to_html()
+        return self.to_string_rep(self.stringified_props(), self.value)
+
+    # a leaf is small enough that rendering it whole is the cheapest way
+    def write_html(self, sink: TextIO) -> None:
+        sink.write(self.to_html())
 
     @override
     def __repr__(self) -> str:
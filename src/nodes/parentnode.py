@@ -1,8 +1,10 @@
 from nodes.htmlnode import HTMLNode
-from typing import List, Dict
+from typing import List, Dict, TextIO
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     # constrcutor
     def __init__(
         self,
@@ -10,29 +12,21 @@ class ParentNode(HTMLNode):
         children: List["HTMLNode"],
         props: Dict[str, str] | None = None,
     ) -> None:
-        self.tag = tag
-        self.children = children
-        self.props = props
+        super().__init__(
+            tag,
+            value=None,
+            children=children,
+            props=props,
+        )
 
-    def to_html(self) -> str:
+    def write_html(self, sink: TextIO) -> None:
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
 
         if self.children is None:
             raise ValueError("ParentNode must have children")
 
-        if self.tag is None:
-            return self.value or ""
-
-        props_str = ""
-        if self.props:
-            props_str = self.stringified_props()
-
-        children_str = ""
-        if self.children:
-            children_str = self.stringified_children()
-
-        return self.to_string_rep(
-            props_str,
-            children_str,
-        )
+        sink.write(f"<{self.tag}{self.stringified_props()}>")
+        for child in self.children:
+            child.write_html(sink)
+        sink.write(f"</{self.tag}>")
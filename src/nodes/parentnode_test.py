@@ -1,3 +1,5 @@
+import io
+
 from nodes.parentnode import ParentNode
 from nodes.leafnode import LeafNode
 
@@ -30,3 +32,27 @@ def test_to_html_with_grandchildren():
     )
 
     assert parent_node.to_html() == "<div><span><b>grandchild</b></span></div>"
+
+
+def test_write_html_streams_to_sink():
+    parent_node = ParentNode(
+        tag="p",
+        children=[
+            LeafNode(value="plain "),
+            LeafNode(tag="a", value="link", props={"href": "/x"}),
+        ],
+    )
+    sink = io.StringIO()
+
+    parent_node.write_html(sink)
+
+    assert sink.getvalue() == '<p>plain <a href="/x">link</a></p>'
+    assert sink.getvalue() == parent_node.to_html()
+
+
+def test_nodes_are_slotted():
+    parent_node = ParentNode(tag="div", children=[LeafNode(value="x")])
+
+    assert parent_node.value is None
+    assert not hasattr(parent_node, "__dict__")
+    assert not hasattr(parent_node.children[0], "__dict__")
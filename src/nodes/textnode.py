@@ -11,9 +11,14 @@ class TextType(Enum):
 
 
 class TextNode:
+    # slots drop the per instance __dict__, a long page creates tens of
+    # thousands of these
+    __slots__ = ("text", "text_type", "url", "title")
+
     text: str
     text_type: TextType
     url: str | None
+    title: str | None
 
     # constrcutor
     def __init__(
@@ -21,10 +26,12 @@ class TextNode:
         text: str,
         text_type: TextType,
         url: str | None = None,
+        title: str | None = None,
     ) -> None:
         self.text = text
         self.text_type = text_type
         self.url = url
+        self.title = title
 
     # equality check operators enabled classinstanc1 == classinstance2 check for
     # testing
@@ -34,6 +41,7 @@ class TextNode:
                 self.text == value.text
                 and self.text_type == value.text_type
                 and self.url == value.url
+                and self.title == value.title
             )
             if isinstance(value, TextNode)
             else NotImplemented
@@ -12,3 +12,7 @@ class TestTextNode:
         node2 = TextNode("This is a text node", TextType.PLAIN)
 
         assert node2 != node
+
+    def test_has_no_instance_dict(self) -> None:
+        node = TextNode("This is a text node", TextType.BOLD_TEXT)
+        assert not hasattr(node, "__dict__")
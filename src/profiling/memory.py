@@ -0,0 +1,131 @@
+import os
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator
+
+from profiling.stages import STAGES
+
+# number of allocating call sites kept per page
+SITE_LIMIT = 20
+
+# allocations made by the profiler itself are not the page's
+SITE_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+# resident set size of this process right now, in bytes
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # no procfs, the high water mark is the closest we can get
+        return max_rss()
+
+
+# highest resident set size this process ever reached, in bytes
+def max_rss() -> int:
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macos bytes
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+class MemoryFrame:
+    __slots__ = ("base", "peak")
+
+    base: int
+    peak: int
+
+    def __init__(self, base: int) -> None:
+        self.base = base
+        self.peak = base
+
+
+# peak and net traced allocation of every stage of rendering one page.
+# tracemalloc only keeps one global peak, so every measured stage resets it
+# on the way in and hands its own peak up to the enclosing stage on the way
+# out, which keeps nested stages (inline parsing inside the node build) right
+class StageMemory:
+    peaks: dict[str, int]
+    nets: dict[str, int]
+    rss: int
+    snapshot: tracemalloc.Snapshot | None
+
+    def __init__(self, snapshot_stage: str = "serialize") -> None:
+        self.peaks = dict.fromkeys(STAGES, 0)
+        self.nets = dict.fromkeys(STAGES, 0)
+        self.rss = 0
+        self.snapshot = None
+        self.snapshot_stage = snapshot_stage
+        self.frames: list[MemoryFrame] = []
+
+    def enter(self) -> MemoryFrame:
+        current, peak = tracemalloc.get_traced_memory()
+        if self.frames:
+            self.frames[-1].peak = max(self.frames[-1].peak, peak)
+        tracemalloc.reset_peak()
+
+        frame = MemoryFrame(current)
+        self.frames.append(frame)
+        return frame
+
+    # returns the peak and net bytes allocated while the frame was open
+    def exit(self, frame: MemoryFrame) -> tuple[int, int]:
+        current, peak = tracemalloc.get_traced_memory()
+        self.frames.pop()
+        frame.peak = max(frame.peak, peak)
+        if self.frames:
+            self.frames[-1].peak = max(self.frames[-1].peak, frame.peak)
+        tracemalloc.reset_peak()
+
+        # rss is only sampled between top level stages, reading it for every
+        # inline span would cost more than the span itself
+        if len(self.frames) <= 1:
+            self.rss = max(self.rss, current_rss())
+        return frame.peak - frame.base, current - frame.base
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        frame = self.enter()
+        try:
+            yield
+        finally:
+            peak, net = self.exit(frame)
+            self.peaks[stage] = max(self.peaks[stage], peak)
+            self.nets[stage] += net
+
+            # the whole node tree is still alive once the page is
+            # serialized, which is where most pages peak
+            if stage == self.snapshot_stage and self.snapshot is None:
+                self.snapshot = tracemalloc.take_snapshot()
+
+
+# the call sites that grew the most between two snapshots,
+# as (file:line, bytes, blocks)
+def top_sites(
+    snapshot: tracemalloc.Snapshot,
+    baseline: tracemalloc.Snapshot,
+    limit: int = SITE_LIMIT,
+) -> list[tuple[str, int, int]]:
+    stats = snapshot.filter_traces(SITE_FILTERS).compare_to(
+        baseline.filter_traces(SITE_FILTERS), "lineno"
+    )
+    sites = []
+    for stat in stats:
+        if stat.size_diff <= 0:
+            continue
+        frame = stat.traceback[0]
+        sites.append((f"{frame.filename}:{frame.lineno}", stat.size_diff, stat.count_diff))
+        if len(sites) == limit:
+            break
+    return sites
@@ -0,0 +1,55 @@
+import tracemalloc
+
+from profiling.memory import StageMemory, current_rss
+
+
+def test_nested_stage_peaks_reach_the_outer_stage():
+    memory = StageMemory()
+    tracemalloc.start()
+    try:
+        with memory.measure("node_build"):
+            with memory.measure("inline_parse"):
+                temporary = bytearray(512 * 1024)
+                del temporary
+            kept = bytearray(64 * 1024)
+    finally:
+        tracemalloc.stop()
+
+    assert memory.peaks["inline_parse"] >= 512 * 1024
+    assert memory.nets["inline_parse"] < 64 * 1024
+    # the outer peak includes what the inner stage allocated and freed
+    assert memory.peaks["node_build"] >= 512 * 1024
+    assert 64 * 1024 <= memory.nets["node_build"] < 128 * 1024
+    assert len(kept) == 64 * 1024
+
+
+def test_repeated_stages_keep_the_largest_peak_and_sum_the_net():
+    memory = StageMemory()
+    kept = []
+    tracemalloc.start()
+    try:
+        for size in (32 * 1024, 256 * 1024):
+            with memory.measure("inline_parse"):
+                kept.append(bytearray(size))
+    finally:
+        tracemalloc.stop()
+
+    assert 256 * 1024 <= memory.peaks["inline_parse"] < 288 * 1024
+    assert memory.nets["inline_parse"] >= 288 * 1024
+
+
+def test_snapshot_taken_after_serialize():
+    memory = StageMemory()
+    tracemalloc.start()
+    try:
+        with memory.measure("node_build"):
+            pass
+        assert memory.snapshot is None
+        with memory.measure("serialize"):
+            pass
+    finally:
+        tracemalloc.stop()
+
+    assert memory.snapshot is not None
+    assert memory.rss > 0
+    assert current_rss() > 0
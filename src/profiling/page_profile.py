@@ -0,0 +1,96 @@
+import cProfile
+import hashlib
+import os
+import tracemalloc
+from pathlib import Path
+
+from generators.page_gen import PageWrite, generate_page
+from profiling import stages
+from profiling.memory import StageMemory, current_rss, max_rss, top_sites
+from profiling.stages import StageTimes
+
+
+# renders a page through generate_page, the same parse and write path as a
+# normal build, with the stages timed from inside it. the render cache and
+# block memo are bypassed so the numbers show the full cost of every stage.
+# returns the stage times and what the write did, for the manifest
+def profile_page(
+    from_path: Path,
+    template_path: Path,
+    dest_path: Path,
+    cprofile_dir: Path | None = None,
+    previous_hash: str | None = None,
+    minify: bool = False,
+) -> tuple[dict[str, float], PageWrite]:
+    print(f"Profiling page {from_path} -> {dest_path}.....")
+
+    profiler = cProfile.Profile() if cprofile_dir is not None else None
+    times = StageTimes()
+    stages.active = times
+    if profiler is not None:
+        profiler.enable()
+
+    try:
+        page_write = generate_page(
+            from_path, template_path, dest_path, previous_hash=previous_hash, minify=minify
+        )
+    finally:
+        stages.active = None
+        if profiler is not None:
+            profiler.disable()
+
+    if profiler is not None and cprofile_dir is not None:
+        cprofile_dir.mkdir(parents=True, exist_ok=True)
+        name = hashlib.sha256(str(from_path).encode()).hexdigest()[:16]
+        profiler.dump_stats(cprofile_dir / f"{name}.prof")
+
+    return times.times, page_write
+
+
+# renders a page the same way as profile_page but traces its allocations
+# instead of timing it. returns the peak and net bytes per stage, the peak
+# of the whole page, the rss sampled between stages and the call sites
+# holding the most memory once the page is serialized
+def memprofile_page(
+    from_path: Path,
+    template_path: Path,
+    dest_path: Path,
+    previous_hash: str | None = None,
+    minify: bool = False,
+) -> tuple[dict, PageWrite]:
+    print(f"Memory profiling page {from_path} -> {dest_path}.....")
+
+    memory = StageMemory()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    rss_before = current_rss()
+
+    page = memory.enter()
+    stages.active = memory
+    try:
+        page_write = generate_page(
+            from_path, template_path, dest_path, previous_hash=previous_hash, minify=minify
+        )
+    finally:
+        stages.active = None
+        peak, net = memory.exit(page)
+        if not was_tracing:
+            tracemalloc.stop()
+
+    snapshot = memory.snapshot
+    page_memory = {
+        "peak": peak,
+        "net": net,
+        "rss_before": rss_before,
+        "rss": max(memory.rss, rss_before),
+        "max_rss": max_rss(),
+        "worker": os.getpid(),
+        "stages": {
+            stage: {"peak": memory.peaks[stage], "net": memory.nets[stage]}
+            for stage in memory.peaks
+        },
+        "sites": top_sites(snapshot, baseline) if snapshot is not None else [],
+    }
+    return page_memory, page_write
@@ -0,0 +1,129 @@
+import json
+import pstats
+from pathlib import Path
+
+from profiling.stages import STAGES
+
+
+def build_report(pages: list[tuple[Path, dict[str, float]]]) -> dict:
+    totals = dict.fromkeys(STAGES, 0.0)
+    page_entries = []
+
+    for source, times in pages:
+        for stage, seconds in times.items():
+            totals[stage] += seconds
+        page_entries.append(
+            {
+                "source": str(source),
+                "total": sum(times.values()),
+                "stages": times,
+            }
+        )
+
+    page_entries.sort(key=lambda entry: entry["total"], reverse=True)
+    return {
+        "pages": page_entries,
+        "totals": totals,
+        "total": sum(totals.values()),
+    }
+
+
+def write_report(report: dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=1), encoding="utf-8")
+
+
+def format_report(report: dict, top: int = 10) -> str:
+    total = report["total"] or 1.0
+    lines = ["Stage totals:"]
+    for stage, seconds in report["totals"].items():
+        lines.append(f"  {stage:<13}{seconds * 1000:>10.2f} ms  {seconds / total:>6.1%}")
+
+    lines.append(f"Slowest {min(top, len(report['pages']))} pages:")
+    header = "  " + f"{'total ms':>10}" + "".join(f"{stage[:9]:>10}" for stage in STAGES)
+    lines.append(header + "  source")
+    for entry in report["pages"][:top]:
+        row = f"  {entry['total'] * 1000:>10.2f}"
+        row += "".join(f"{entry['stages'][stage] * 1000:>10.2f}" for stage in STAGES)
+        lines.append(f"{row}  {entry['source']}")
+
+    return "\n".join(lines)
+
+
+def build_memory_report(pages: list[tuple[Path, dict]], site_limit: int = 20) -> dict:
+    stage_totals = {stage: {"peak": 0, "net": 0} for stage in STAGES}
+    sites: dict[str, list[int]] = {}
+    workers: dict[str, int] = {}
+    page_entries = []
+
+    for source, memory in pages:
+        for stage, usage in memory["stages"].items():
+            stage_totals[stage]["peak"] = max(stage_totals[stage]["peak"], usage["peak"])
+            stage_totals[stage]["net"] += usage["net"]
+        for site, size, count in memory["sites"]:
+            totals = sites.setdefault(site, [0, 0])
+            totals[0] += size
+            totals[1] += count
+        worker = str(memory["worker"])
+        workers[worker] = max(workers.get(worker, 0), memory["max_rss"])
+        page_entries.append({"source": str(source), **memory})
+
+    page_entries.sort(key=lambda entry: entry["peak"], reverse=True)
+    top_sites = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)
+    return {
+        "pages": page_entries,
+        "stages": stage_totals,
+        "sites": [
+            {"site": site, "size": size, "count": count}
+            for site, (size, count) in top_sites[:site_limit]
+        ],
+        # highest rss each worker process reached, the number that
+        # decides how many workers fit on a runner
+        "workers": workers,
+        "peak": max((entry["peak"] for entry in page_entries), default=0),
+    }
+
+
+def format_memory_report(report: dict, top: int = 10) -> str:
+    kib = 1024
+    lines = ["Stage memory (largest peak of any page, net summed over pages):"]
+    for stage, usage in report["stages"].items():
+        lines.append(
+            f"  {stage:<13}{usage['peak'] / kib:>12.1f} KiB peak"
+            f"{usage['net'] / kib:>12.1f} KiB net"
+        )
+
+    lines.append(f"Largest {min(top, len(report['pages']))} pages:")
+    header = f"  {'peak KiB':>10}{'net KiB':>10}{'rss MiB':>10}"
+    header += "".join(f"{stage[:9]:>10}" for stage in STAGES)
+    lines.append(header + "  source")
+    for entry in report["pages"][:top]:
+        row = f"  {entry['peak'] / kib:>10.1f}{entry['net'] / kib:>10.1f}"
+        row += f"{entry['rss'] / kib / kib:>10.1f}"
+        row += "".join(f"{entry['stages'][stage]['peak'] / kib:>10.1f}" for stage in STAGES)
+        lines.append(f"{row}  {entry['source']}")
+
+    lines.append(f"Top {min(top, len(report['sites']))} allocating call sites:")
+    for site in report["sites"][:top]:
+        lines.append(f"  {site['size'] / kib:>10.1f} KiB {site['count']:>8} blocks  {site['site']}")
+
+    lines.append("Peak rss per worker:")
+    for worker, rss in sorted(report["workers"].items()):
+        lines.append(f"  pid {worker:<10}{rss / kib / kib:>10.1f} MiB")
+    return "\n".join(lines)
+
+
+# merges the per page cProfile dumps written by the workers into one file
+def merge_cprofile(cprofile_dir: Path, output_path: Path) -> pstats.Stats | None:
+    dumps = sorted(cprofile_dir.glob("*.prof"))
+    if not dumps:
+        return None
+
+    merged = pstats.Stats(str(dumps[0]))
+    for dump in dumps[1:]:
+        merged.add(str(dump))
+    merged.dump_stats(output_path)
+
+    for dump in dumps:
+        dump.unlink()
+    return merged
@@ -0,0 +1,106 @@
+import json
+import time
+from pathlib import Path
+
+from profiling.report import (
+    build_memory_report,
+    build_report,
+    format_memory_report,
+    format_report,
+    write_report,
+)
+from profiling.stages import STAGES, StageTimes
+
+
+def stage_times(**seconds):
+    times = dict.fromkeys(STAGES, 0.0)
+    times.update(seconds)
+    return times
+
+
+def test_measure_accumulates():
+    times = StageTimes()
+
+    with times.measure("read"):
+        pass
+    with times.measure("read"):
+        pass
+
+    assert times.times["read"] > 0
+    assert times.total() == times.times["read"]
+
+
+def test_nested_stages_count_only_their_own_time():
+    times = StageTimes()
+
+    with times.measure("template"):
+        with times.measure("write"):
+            time.sleep(0.01)
+
+    assert times.times["write"] >= 0.01
+    assert times.times["template"] < times.times["write"]
+
+
+def test_report_sorts_pages_and_sums_stages(tmp_path):
+    report = build_report(
+        [
+            (Path("fast.md"), stage_times(read=0.001, write=0.001)),
+            (Path("slow.md"), stage_times(read=0.002, inline_parse=0.01)),
+        ]
+    )
+
+    assert [page["source"] for page in report["pages"]] == ["slow.md", "fast.md"]
+    assert report["totals"]["read"] == 0.003
+    assert round(report["total"], 6) == 0.014
+
+    write_report(report, tmp_path / "profile.json")
+    assert json.loads((tmp_path / "profile.json").read_text()) == report
+
+
+def test_format_report_lists_top_pages():
+    report = build_report(
+        [(Path(f"page{i}.md"), stage_times(read=i / 1000)) for i in range(5)]
+    )
+
+    table = format_report(report, top=2)
+
+    assert "Slowest 2 pages:" in table
+    assert "page4.md" in table and "page3.md" in table
+    assert "page0.md" not in table
+
+
+def page_memory(peak, worker=1, sites=()):
+    return {
+        "peak": peak,
+        "net": peak // 2,
+        "rss_before": 1024,
+        "rss": 2048,
+        "max_rss": peak * 10,
+        "worker": worker,
+        "stages": {stage: {"peak": peak, "net": 1} for stage in STAGES},
+        "sites": list(sites),
+    }
+
+
+def test_memory_report_merges_pages_sites_and_workers():
+    report = build_memory_report(
+        [
+            (Path("small.md"), page_memory(100, worker=1, sites=[("a.py:1", 10, 1)])),
+            (Path("big.md"), page_memory(900, worker=2, sites=[("a.py:1", 5, 2), ("b.py:2", 30, 3)])),
+            (Path("mid.md"), page_memory(500, worker=1)),
+        ]
+    )
+
+    assert [page["source"] for page in report["pages"]] == ["big.md", "mid.md", "small.md"]
+    assert report["stages"]["read"] == {"peak": 900, "net": 3}
+    assert report["sites"] == [
+        {"site": "b.py:2", "size": 30, "count": 3},
+        {"site": "a.py:1", "size": 15, "count": 3},
+    ]
+    assert report["workers"] == {"1": 5000, "2": 9000}
+    assert report["peak"] == 900
+
+    table = format_memory_report(report, top=1)
+    assert "Largest 1 pages:" in table
+    assert "big.md" in table and "mid.md" not in table
+    assert "b.py:2" in table
@@ -0,0 +1,61 @@
+import time
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from typing import Iterator, Protocol
+
+STAGES = (
+    "read",
+    "title",
+    "block_parse",
+    "inline_parse",
+    "node_build",
+    "serialize",
+    "template",
+    "minify",
+    "write",
+)
+
+
+# wall clock seconds spent in each stage of rendering one page. stages nest
+# (the page is parsed, serialized and written while the template streams),
+# a stage only counts its own time and the nested ones are taken back out
+class StageTimes:
+    times: dict[str, float]
+
+    def __init__(self) -> None:
+        self.times = dict.fromkeys(STAGES, 0.0)
+        # time spent in stages nested inside each open one
+        self._nested: list[float] = []
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.times[stage] += elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def total(self) -> float:
+        return sum(self.times.values())
+
+
+# anything that can record a stage, the wall clock times above or the
+# allocations in profiling.memory
+class StageRecorder(Protocol):
+    def measure(self, stage: str) -> AbstractContextManager[None]: ...
+
+
+# the page being profiled in this process, None whenever profiling is off.
+# hot paths only check this for None, so a normal build pays nothing else
+active: StageRecorder | None = None
+
+
+# measures the stage on the active recorder, for code that runs once per
+# page or per buffer where an empty context manager costs nothing
+def measure(stage: str) -> AbstractContextManager[None]:
+    if active is None:
+        return nullcontext()
+    return active.measure(stage)
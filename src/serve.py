@@ -0,0 +1,71 @@
+import argparse
+from pathlib import Path
+
+from constants import (
+    DEST_STATIC_DIR_PATH,
+    MANIFEST_FILE_PATH,
+    SERVER_CACHE_MAX_BYTES,
+    SERVER_CACHE_MAX_FILE_BYTES,
+)
+from generators.memory_output import MemoryOutput
+from server.build_hashes import BuildHashes
+from server.file_cache import FileCache
+from server.live_reload import LiveReload
+from server.static_server import StaticServer
+
+
+def make_server(
+    root: Path = DEST_STATIC_DIR_PATH,
+    bind: str = "",
+    port: int = 8888,
+    cache_bytes: int = SERVER_CACHE_MAX_BYTES,
+    quiet: bool = False,
+    live_reload: LiveReload | None = None,
+    memory: MemoryOutput | None = None,
+) -> StaticServer:
+    # the manifest hashes describe the built output, not the sources an
+    # in memory build serves its static files from
+    hashes = None if memory is not None else BuildHashes(MANIFEST_FILE_PATH, DEST_STATIC_DIR_PATH)
+    return StaticServer(
+        (bind, port),
+        root=root,
+        cache=FileCache(cache_bytes, min(cache_bytes, SERVER_CACHE_MAX_FILE_BYTES)),
+        hashes=hashes,
+        quiet=quiet,
+        live_reload=live_reload,
+        memory=memory,
+    )
+
+
+def serve(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the built site")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--bind", default="", help="address to listen on, all by default")
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        default=DEST_STATIC_DIR_PATH,
+        help="directory (or generation symlink) to serve",
+    )
+    parser.add_argument(
+        "--cache-bytes",
+        type=int,
+        default=SERVER_CACHE_MAX_BYTES,
+        help="memory used to keep hot files, 0 disables the cache",
+    )
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.directory, args.bind, args.port, args.cache_bytes, args.quiet)
+    host, port = server.server_address[:2]
+    print(f"Serving {args.directory} on http://{host or 'localhost'}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopped serving")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    serve()
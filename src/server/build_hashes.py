@@ -0,0 +1,43 @@
+import threading
+from pathlib import Path
+
+from generators.manifest import BuildManifest
+
+
+# the content hashes recorded by the last build, looked up by path relative
+# to the output root. the manifest is read again whenever it changes on disk
+class BuildHashes:
+    manifest_path: Path
+    output_root: Path
+
+    def __init__(self, manifest_path: Path, output_root: Path) -> None:
+        self.manifest_path = manifest_path
+        self.output_root = output_root
+        self.state: dict[str, dict] = {}
+        self.version: tuple[int, int] | None = None
+        self.lock = threading.Lock()
+
+    def reload(self) -> None:
+        try:
+            stat = self.manifest_path.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            version = None
+
+        with self.lock:
+            if version == self.version:
+                return
+            self.version = version
+            self.state = (
+                BuildManifest.load(self.manifest_path).output_state(self.output_root)
+                if version is not None
+                else {}
+            )
+
+    # the recorded hash, as long as the file still has the recorded size
+    def get(self, relative: str, size: int) -> str | None:
+        self.reload()
+        entry = self.state.get(relative)
+        if entry is None or entry["size"] != size:
+            return None
+        return entry["hash"]
@@ -0,0 +1,59 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import BinaryIO
+
+
+# size bounded lru of small, frequently served files, shared by every
+# request thread. entries are keyed by real path and only used while the
+# file still has the same inode, size and mtime, so a rebuild or a
+# generation switch never serves stale bytes
+class FileCache:
+    max_bytes: int
+    max_file_bytes: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_bytes: int, max_file_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self.entries: OrderedDict[str, tuple[tuple[int, int, int], bytes]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def cacheable(self, stat: os.stat_result) -> bool:
+        return stat.st_size <= self.max_file_bytes
+
+    # returns the contents of the open file, from memory when they are
+    # still current. stat has to describe the open file
+    def read(self, path: str, stat: os.stat_result, file: BinaryIO) -> bytes:
+        version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                self.entries.move_to_end(path)
+                return entry[1]
+            self.misses += 1
+
+        file.seek(0)
+        data = file.read()
+
+        with self.lock:
+            previous = self.entries.pop(path, None)
+            if previous is not None:
+                self.size -= len(previous[1])
+            if len(data) <= self.max_bytes:
+                self.entries[path] = (version, data)
+                self.size += len(data)
+                while self.size > self.max_bytes:
+                    _, (_, evicted) = self.entries.popitem(last=False)
+                    self.size -= len(evicted)
+        return data
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
@@ -0,0 +1,71 @@
+import re
+from email.utils import formatdate, parsedate_to_datetime
+
+from constants import VARIANT_SUFFIXES
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+
+# content codings we look for next to a file, best first
+PRECOMPRESSED_SUFFIXES = tuple(VARIANT_SUFFIXES.items())
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def parse_http_date(value: str) -> float | None:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+# true when an If-None-Match header matches the etag. weak comparison is
+# used, as the spec asks for conditional GETs
+def etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+# the single byte range asked for as (start, end) inclusive, None to serve the
+# whole file (no header, several ranges or syntax we do not support) and
+# ValueError when the range cannot be satisfied
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    if not header:
+        return None
+    match = RANGE_PATTERN.fullmatch(header.strip())
+    if match is None:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range, the last n bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("unsatisfiable range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("unsatisfiable range")
+    return start, min(end, size - 1)
+
+
+# content codings the client accepts, ignoring those it explicitly refuses
+def accepted_encodings(header: str | None) -> set[str]:
+    accepted = set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip().removeprefix("q=")
+        if params and quality.replace(".", "", 1).isdigit() and float(quality) == 0:
+            continue
+        accepted.add(coding)
+    return accepted
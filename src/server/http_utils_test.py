@@ -0,0 +1,34 @@
+import pytest
+
+from server.http_utils import accepted_encodings, etag_matches, parse_range
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=-500", 100) == (0, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    # several ranges are answered with the whole file
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("items=0-1", 100) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=100-", "bytes=10-5", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 100)
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br, zstd") == {"gzip", "deflate", "br", "zstd"}
+    assert accepted_encodings("gzip;q=0, zstd;q=0.5") == {"zstd"}
+    assert accepted_encodings(None) == set()
@@ -0,0 +1,89 @@
+import json
+import queue
+import re
+import threading
+
+# url of the server-sent event stream the client script listens to
+LIVE_RELOAD_PATH = "/__livereload"
+
+# seconds between keep alive comments on an idle event stream
+KEEPALIVE_SECONDS = 15.0
+
+BODY_CLOSE_PATTERN = re.compile(rb"</body\s*>", re.IGNORECASE)
+
+# reloads the tab only when its own page changed or it uses a changed asset,
+# changed stylesheets are swapped in place without a reload
+CLIENT_SCRIPT = """<script>
+(() => {
+  const source = new EventSource("%s");
+  const page = decodeURI(location.pathname.endsWith("/")
+    ? location.pathname + "index.html"
+    : location.pathname);
+  source.onmessage = (event) => {
+    const paths = JSON.parse(event.data).paths.map((path) => "/" + path);
+    let reload = paths.includes(page);
+    for (const path of paths) {
+      if (path.endsWith(".css")) {
+        for (const link of document.querySelectorAll('link[rel="stylesheet"]')) {
+          const url = new URL(link.href, location.href);
+          if (url.pathname === path) {
+            url.searchParams.set("livereload", Date.now());
+            link.href = url.href;
+          }
+        }
+      } else if (!path.endsWith(".html")) {
+        const name = CSS.escape(path.slice(1));
+        reload ||= document.querySelector(`[src$="${name}"], [href$="${name}"]`) !== null;
+      }
+    }
+    if (reload) location.reload();
+  };
+})();
+</script>
+""" % LIVE_RELOAD_PATH
+
+
+# puts the client script right before the closing body tag,
+# or at the end of documents that do not have one
+def inject_client(html: bytes) -> bytes:
+    script = CLIENT_SCRIPT.encode("utf-8")
+    closing = None
+    for closing in BODY_CLOSE_PATTERN.finditer(html):
+        pass
+    if closing is None:
+        return html + script
+    return html[: closing.start()] + script + html[closing.start() :]
+
+
+# fans the output paths changed by each rebuild out to every open event
+# stream. every stream has its own queue, None tells it to finish
+class LiveReload:
+    def __init__(self) -> None:
+        self.subscribers: list[queue.Queue[str | None]] = []
+        self.lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue[str | None]:
+        events: queue.Queue[str | None] = queue.Queue()
+        with self.lock:
+            self.subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events: queue.Queue[str | None]) -> None:
+        with self.lock:
+            if events in self.subscribers:
+                self.subscribers.remove(events)
+
+    # paths are relative to the output root, like "blog/post/index.html"
+    def publish(self, paths: list[str]) -> None:
+        if not paths:
+            return
+        message = json.dumps({"paths": paths})
+        with self.lock:
+            for events in self.subscribers:
+                events.put(message)
+
+    def close(self) -> None:
+        with self.lock:
+            for events in self.subscribers:
+                events.put(None)
+            self.subscribers.clear()
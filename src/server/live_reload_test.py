@@ -0,0 +1,38 @@
+import json
+
+from server.live_reload import CLIENT_SCRIPT, LiveReload, inject_client
+
+
+def test_client_goes_before_the_last_closing_body_tag():
+    html = b"<body><pre></body></pre></BODY >"
+    injected = inject_client(html)
+
+    assert injected == b"<body><pre></body></pre>" + CLIENT_SCRIPT.encode() + b"</BODY >"
+
+
+def test_client_is_appended_without_a_body_tag():
+    assert inject_client(b"<h1>hi</h1>") == b"<h1>hi</h1>" + CLIENT_SCRIPT.encode()
+
+
+def test_every_subscriber_gets_each_change():
+    live_reload = LiveReload()
+    first, second = live_reload.subscribe(), live_reload.subscribe()
+
+    live_reload.publish(["blog/post.html", "index.css"])
+    live_reload.publish([])
+
+    for events in (first, second):
+        assert json.loads(events.get_nowait()) == {"paths": ["blog/post.html", "index.css"]}
+        assert events.empty()
+
+
+def test_unsubscribed_and_closed_streams():
+    live_reload = LiveReload()
+    gone, open_ = live_reload.subscribe(), live_reload.subscribe()
+    live_reload.unsubscribe(gone)
+
+    live_reload.close()
+
+    assert gone.empty()
+    assert open_.get_nowait() is None
+    assert live_reload.subscribers == []
@@ -0,0 +1,405 @@
+import mimetypes
+import os
+import posixpath
+import queue
+import stat as stat_module
+from collections.abc import Callable
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import BinaryIO
+from urllib.parse import unquote, urlsplit
+
+from generators.memory_output import MemoryOutput, MemoryPage
+from server.build_hashes import BuildHashes
+from server.file_cache import FileCache
+from server.live_reload import (
+    KEEPALIVE_SECONDS,
+    LIVE_RELOAD_PATH,
+    LiveReload,
+    inject_client,
+)
+from server.http_utils import (
+    PRECOMPRESSED_SUFFIXES,
+    accepted_encodings,
+    etag_matches,
+    http_date,
+    parse_http_date,
+    parse_range,
+)
+
+
+# a file picked to answer a request, either the file itself or one
+# of its precompressed variants
+class ResolvedFile:
+    path: str
+    relative: str
+    stat: os.stat_result
+    encoding: str | None
+
+    def __init__(
+        self,
+        path: str,
+        relative: str,
+        stat: os.stat_result,
+        encoding: str | None = None,
+    ) -> None:
+        self.path = path
+        self.relative = relative
+        self.stat = stat
+        self.encoding = encoding
+
+
+# threaded static file server. the root is resolved again for every request,
+# so switching the public symlink to a new generation takes effect at once.
+# pages of an in memory build are answered from the map before the root
+class StaticServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    root: Path
+    cache: FileCache
+    hashes: BuildHashes | None
+    quiet: bool
+    live_reload: LiveReload | None
+    memory: MemoryOutput | None
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        root: Path,
+        cache: FileCache,
+        hashes: BuildHashes | None = None,
+        quiet: bool = False,
+        live_reload: LiveReload | None = None,
+        memory: MemoryOutput | None = None,
+    ) -> None:
+        self.root = root
+        self.cache = cache
+        self.hashes = hashes
+        self.quiet = quiet
+        self.live_reload = live_reload
+        self.memory = memory
+        super().__init__(address, StaticRequestHandler)
+
+
+class StaticRequestHandler(BaseHTTPRequestHandler):
+    server: StaticServer
+    # keep alive, every response below carries a Content-Length
+    protocol_version = "HTTP/1.1"
+    # headers and body go out in separate writes, with nagle on every
+    # kept alive response would wait for the client's delayed ack
+    disable_nagle_algorithm = True
+    server_version = "ssg-gex"
+
+    def do_GET(self) -> None:
+        self.serve(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self.serve(send_body=False)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def serve(self, send_body: bool) -> None:
+        url_path = urlsplit(self.path).path
+        if url_path == LIVE_RELOAD_PATH and self.server.live_reload is not None:
+            self.stream_events(send_body)
+            return
+
+        resolved = self.resolve_memory(url_path) if self.server.memory is not None else None
+        if isinstance(resolved, tuple):
+            self.respond_memory(*resolved, send_body=send_body)
+            return
+        if resolved is None:
+            resolved = self.resolve(url_path)
+        if resolved is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        if isinstance(resolved, str):
+            # a directory asked for without its trailing slash
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", resolved)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        # pages served with the live reload client differ from the file on
+        # disk, so they are always sent whole and never precompressed
+        injects = self.injects_client(resolved.relative)
+        wants_range = "Range" in self.headers and not injects
+        if not wants_range and not injects:
+            resolved = self.precompressed(resolved)
+
+        # headers and body both come from the opened file, a page replaced
+        # mid request is served either completely old or completely new
+        try:
+            file = open(resolved.path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        with file:
+            resolved.stat = os.fstat(file.fileno())
+            if injects:
+                self.respond_injected(resolved, file, send_body)
+            else:
+                self.respond(resolved, file, wants_range, send_body)
+
+    def respond(
+        self,
+        resolved: ResolvedFile,
+        file: BinaryIO,
+        wants_range: bool,
+        send_body: bool,
+    ) -> None:
+        stat = resolved.stat
+        etag = self.etag(resolved)
+        headers = {
+            "Content-Type": self.content_type(resolved.relative),
+            "Last-Modified": http_date(stat.st_mtime),
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+        }
+        if resolved.encoding is not None:
+            headers["Content-Encoding"] = resolved.encoding
+
+        if self.not_modified(etag, stat.st_mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            for name in ("ETag", "Last-Modified", "Cache-Control", "Vary"):
+                self.send_header(name, headers[name])
+            self.end_headers()
+            return
+
+        start, end = 0, stat.st_size - 1
+        status = HTTPStatus.OK
+        if wants_range and self.range_applies(etag):
+            try:
+                byte_range = parse_range(self.headers["Range"], stat.st_size)
+            except ValueError:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{stat.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                status = HTTPStatus.PARTIAL_CONTENT
+                headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+
+        length = end - start + 1
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+        if send_body and length > 0:
+            self.send_body(resolved, file, start, length)
+
+    def injects_client(self, relative: str) -> bool:
+        return self.server.live_reload is not None and relative.endswith(".html")
+
+    def respond_injected(self, resolved: ResolvedFile, file: BinaryIO, send_body: bool) -> None:
+        stat = resolved.stat
+        etag = f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}-livereload"'
+        cache = self.server.cache
+
+        def body() -> bytes:
+            html = cache.read(resolved.path, stat, file) if cache.cacheable(stat) else file.read()
+            return inject_client(html)
+
+        self.respond_bytes(resolved.relative, body, etag, stat.st_mtime, send_body)
+
+    def respond_memory(self, relative: str, page: MemoryPage, send_body: bool) -> None:
+        if self.injects_client(relative):
+            etag = f'W/"{page.output_hash[:32]}-livereload"'
+            self.respond_bytes(
+                relative, lambda: inject_client(page.data), etag, page.mtime, send_body
+            )
+        else:
+            etag = f'"{page.output_hash[:32]}"'
+            self.respond_bytes(relative, lambda: page.data, etag, page.mtime, send_body)
+
+    # whole responses built in memory, the body is only produced when
+    # the client's copy turns out to be stale
+    def respond_bytes(
+        self,
+        relative: str,
+        body: Callable[[], bytes],
+        etag: str,
+        mtime: float,
+        send_body: bool,
+    ) -> None:
+        if self.not_modified(etag, mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+
+        data = body()
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.content_type(relative))
+        self.send_header("Last-Modified", http_date(mtime))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(data)
+
+    # server-sent events naming the output paths every rebuild changed. the
+    # stream has no length, it ends when the connection closes
+    def stream_events(self, send_body: bool) -> None:
+        live_reload = self.server.live_reload
+        self.close_connection = True
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        if not send_body or live_reload is None:
+            return
+
+        events = live_reload.subscribe()
+        try:
+            self.wfile.write(b"retry: 1000\n\n")
+            self.wfile.flush()
+            while True:
+                try:
+                    message = events.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    # also notices tabs that were closed in the meantime
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                if message is None:
+                    break
+                self.wfile.write(f"data: {message}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            live_reload.unsubscribe(events)
+
+    # the in memory page for the url path, or the url to redirect to when a
+    # page directory is asked for without its trailing slash
+    def resolve_memory(self, url_path: str) -> tuple[str, MemoryPage] | str | None:
+        memory = self.server.memory
+        relative = posixpath.normpath(unquote(url_path)).lstrip("/")
+        if relative in (".", ""):
+            relative = ""
+        elif (page := memory.get(relative)) is not None:
+            return relative, page
+
+        index = posixpath.join(relative, "index.html")
+        if (page := memory.get(index)) is None:
+            return None
+        if not url_path.endswith("/"):
+            return url_path + "/"
+        return index, page
+
+    # maps the url path onto a file below the root. returns None when there is
+    # no such file and the url to redirect to for a directory without slash
+    def resolve(self, url_path: str) -> ResolvedFile | str | None:
+        decoded = unquote(url_path)
+        relative = posixpath.normpath(decoded).lstrip("/")
+        if relative == ".":
+            relative = ""
+        if relative.startswith("..") or "\0" in relative:
+            return None
+
+        root = os.path.realpath(self.server.root)
+        path = os.path.join(root, relative)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if stat_module.S_ISDIR(stat.st_mode):
+            if not url_path.endswith("/"):
+                return url_path + "/"
+            relative = posixpath.join(relative, "index.html")
+            path = os.path.join(root, relative)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+
+        # symlinks inside the output must not lead out of it
+        if not os.path.realpath(path).startswith(root + os.sep):
+            return None
+        return ResolvedFile(path, relative, stat)
+
+    # swaps in a precompressed variant the client accepts, as long as it is
+    # at least as new as the file it was made from
+    def precompressed(self, resolved: ResolvedFile) -> ResolvedFile:
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            if encoding not in accepted:
+                continue
+            try:
+                stat = os.stat(resolved.path + suffix)
+            except OSError:
+                continue
+            if stat.st_mtime_ns >= resolved.stat.st_mtime_ns:
+                return ResolvedFile(resolved.path + suffix, resolved.relative, stat, encoding)
+        return resolved
+
+    # strong etags come from the content hash the build recorded, files the
+    # build knows nothing about get a weak one from their size and mtime
+    def etag(self, resolved: ResolvedFile) -> str:
+        stat = resolved.stat
+        suffix = f"-{resolved.encoding}" if resolved.encoding else ""
+        if self.server.hashes is not None and resolved.encoding is None:
+            build_hash = self.server.hashes.get(resolved.relative, stat.st_size)
+            if build_hash is not None:
+                return f'"{build_hash[:32]}"'
+        return f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}{suffix}"'
+
+    def not_modified(self, etag: str, mtime: float) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            since = parse_http_date(if_modified_since)
+            return since is not None and int(mtime) <= since
+        return False
+
+    # If-Range falls back to the whole file when the client's copy is stale
+    def range_applies(self, etag: str) -> bool:
+        if_range = self.headers.get("If-Range")
+        return if_range is None or if_range.strip() == etag
+
+    def content_type(self, relative: str) -> str:
+        content_type, _ = mimetypes.guess_type(relative)
+        content_type = content_type or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in (
+            "application/javascript",
+            "application/json",
+            "image/svg+xml",
+        ):
+            content_type += "; charset=utf-8"
+        return content_type
+
+    # small files come out of the lru, large ones go straight from the page
+    # cache to the socket with sendfile
+    def send_body(
+        self,
+        resolved: ResolvedFile,
+        file: BinaryIO,
+        start: int,
+        length: int,
+    ) -> None:
+        cache = self.server.cache
+        if cache.cacheable(resolved.stat):
+            data = cache.read(resolved.path, resolved.stat, file)
+            self.wfile.write(data[start : start + length])
+            return
+
+        self.wfile.flush()
+        self.connection.sendfile(file, offset=start, count=length)
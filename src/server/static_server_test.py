@@ -0,0 +1,284 @@
+import gzip
+import http.client
+import os
+import threading
+from email.utils import formatdate
+from pathlib import Path
+
+import pytest
+
+from generators.manifest import BuildManifest
+from generators.memory_output import MemoryOutput
+from server.build_hashes import BuildHashes
+from server.file_cache import FileCache
+from server.live_reload import CLIENT_SCRIPT, LIVE_RELOAD_PATH, LiveReload
+from server.static_server import StaticServer
+
+
+def write(path, content: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "public"
+    write(root / "index.html", b"<h1>home</h1>")
+    write(root / "blog" / "index.html", b"<h1>blog</h1>")
+    write(root / "index.css", b"body { color: red; }")
+    write(root / "big.bin", bytes(range(256)) * 64)
+    return root
+
+
+@pytest.fixture
+def request_site(site, tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    server = StaticServer(
+        ("127.0.0.1", 0),
+        root=site,
+        # big.bin is over the per file limit and goes through sendfile
+        cache=FileCache(max_bytes=1024 * 1024, max_file_bytes=4096),
+        hashes=BuildHashes(manifest_path, site),
+        quiet=True,
+    )
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+
+    def request(path, method="GET", headers=None):
+        connection = http.client.HTTPConnection(*server.server_address[:2])
+        connection.request(method, path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response, body
+
+    request.server = server
+    request.manifest_path = manifest_path
+    yield request
+    server.shutdown()
+    server.server_close()
+
+
+def test_serves_files_and_directory_indexes(request_site):
+    response, body = request_site("/")
+    assert response.status == 200
+    assert body == b"<h1>home</h1>"
+    assert response.headers["Content-Type"] == "text/html; charset=utf-8"
+
+    response, _ = request_site("/blog")
+    assert response.status == 301
+    assert response.headers["Location"] == "/blog/"
+
+    response, body = request_site("/blog/?page=2")
+    assert body == b"<h1>blog</h1>"
+
+
+def test_missing_and_escaping_paths_are_not_found(request_site, tmp_path):
+    (tmp_path / "secret.txt").write_text("secret")
+    os.symlink(tmp_path / "secret.txt", tmp_path / "public" / "leak.txt")
+
+    assert request_site("/nope.html")[0].status == 404
+    assert request_site("/../secret.txt")[0].status == 404
+    assert request_site("/%2e%2e/secret.txt")[0].status == 404
+    assert request_site("/leak.txt")[0].status == 404
+
+
+def test_head_has_headers_but_no_body(request_site):
+    response, body = request_site("/index.css", method="HEAD")
+    assert response.status == 200
+    assert response.headers["Content-Length"] == "20"
+    assert body == b""
+
+
+def test_conditional_requests(request_site):
+    response, _ = request_site("/index.css")
+    etag, last_modified = response.headers["ETag"], response.headers["Last-Modified"]
+    assert etag.startswith('W/"')
+
+    assert request_site("/index.css", headers={"If-None-Match": etag})[0].status == 304
+    assert request_site("/index.css", headers={"If-None-Match": '"other"'})[0].status == 200
+    assert request_site("/index.css", headers={"If-Modified-Since": last_modified})[0].status == 304
+    old = formatdate(0, usegmt=True)
+    assert request_site("/index.css", headers={"If-Modified-Since": old})[0].status == 200
+
+
+def test_etag_comes_from_build_hash(request_site, site):
+    manifest = BuildManifest()
+    manifest.record_static(Path("index.css"), "f" * 64, 20)
+    manifest.save(request_site.manifest_path)
+
+    response, _ = request_site("/index.css")
+    assert response.headers["ETag"] == '"' + "f" * 32 + '"'
+
+    # a file that no longer matches the recorded size is not trusted
+    write(site / "index.css", b"body {}")
+    response, _ = request_site("/index.css")
+    assert response.headers["ETag"].startswith('W/"')
+
+
+def test_range_requests(request_site):
+    response, body = request_site("/big.bin", headers={"Range": "bytes=256-511"})
+    assert response.status == 206
+    assert response.headers["Content-Range"] == "bytes 256-511/16384"
+    assert body == bytes(range(256))
+
+    response, body = request_site("/index.css", headers={"Range": "bytes=-4"})
+    assert response.status == 206
+    assert body == b"d; }"
+
+    response, _ = request_site("/index.css", headers={"Range": "bytes=100-"})
+    assert response.status == 416
+    assert response.headers["Content-Range"] == "bytes */20"
+
+    response, body = request_site(
+        "/index.css", headers={"Range": "bytes=0-3", "If-Range": '"stale"'}
+    )
+    assert response.status == 200
+    assert len(body) == 20
+
+
+def test_large_files_are_sent_whole(request_site):
+    response, body = request_site("/big.bin")
+    assert response.status == 200
+    assert body == bytes(range(256)) * 64
+
+
+def test_precompressed_variant_is_served_when_accepted(request_site, site):
+    write(site / "index.html.gz", gzip.compress(b"<h1>home</h1>"))
+
+    response, body = request_site("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == b"<h1>home</h1>"
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response, body = request_site("/")
+    assert "Content-Encoding" not in response.headers
+    assert body == b"<h1>home</h1>"
+
+
+def test_hot_files_are_cached_until_they_change(request_site, site):
+    request_site("/index.css")
+    request_site("/index.css")
+    cache = request_site.server.cache
+    assert cache.hits >= 1
+
+    # replaced like the build does, through a rename
+    write(site / ".tmp", b"body { color: blue; }")
+    os.replace(site / ".tmp", site / "index.css")
+    assert request_site("/index.css")[1] == b"body { color: blue; }"
+
+
+def test_follows_a_switched_generation_symlink(tmp_path):
+    first, second = tmp_path / "gen-1", tmp_path / "gen-2"
+    write(first / "index.html", b"one")
+    write(second / "index.html", b"two")
+    live = tmp_path / "live"
+    os.symlink(first, live)
+
+    server = StaticServer(("127.0.0.1", 0), root=live, cache=FileCache(1024, 1024), quiet=True)
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+    try:
+        def get():
+            connection = http.client.HTTPConnection(*server.server_address[:2])
+            connection.request("GET", "/")
+            return connection.getresponse().read()
+
+        assert get() == b"one"
+        os.symlink(second, tmp_path / "link-tmp")
+        os.replace(tmp_path / "link-tmp", live)
+        assert get() == b"two"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def live_site(site):
+    live_reload = LiveReload()
+    server = StaticServer(
+        ("127.0.0.1", 0),
+        root=site,
+        cache=FileCache(1024 * 1024, 4096),
+        quiet=True,
+        live_reload=live_reload,
+    )
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+    yield server
+    live_reload.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_pages_get_the_live_reload_client(live_site, site):
+    write(site / "index.html.gz", gzip.compress(b"<h1>home</h1>"))
+    connection = http.client.HTTPConnection(*live_site.server_address[:2])
+
+    connection.request("GET", "/", headers={"Accept-Encoding": "gzip", "Range": "bytes=0-3"})
+    response = connection.getresponse()
+    body = response.read()
+    assert response.status == 200
+    assert "Content-Encoding" not in response.headers
+    assert body == b"<h1>home</h1>" + CLIENT_SCRIPT.encode()
+
+    connection.request("GET", "/", headers={"If-None-Match": response.headers["ETag"]})
+    response = connection.getresponse()
+    response.read()
+    assert response.status == 304
+
+    connection.request("GET", "/index.css")
+    assert connection.getresponse().read() == b"body { color: red; }"
+    connection.close()
+
+
+def test_event_stream_names_changed_outputs(live_site):
+    connection = http.client.HTTPConnection(*live_site.server_address[:2], timeout=5)
+    connection.request("GET", LIVE_RELOAD_PATH)
+    response = connection.getresponse()
+    assert response.headers["Content-Type"] == "text/event-stream"
+    assert response.readline() == b"retry: 1000\n"
+    assert response.readline() == b"\n"
+
+    live_site.live_reload.publish(["index.css"])
+    assert response.readline() == b'data: {"paths": ["index.css"]}\n'
+
+    live_site.live_reload.close()
+    assert response.read() == b"\n"
+    connection.close()
+
+
+def test_memory_pages_are_served_before_the_root(tmp_path):
+    static = tmp_path / "static"
+    write(static / "index.css", b"body {}")
+    memory = MemoryOutput(tmp_path / "public")
+    memory.put(tmp_path / "public" / "blog" / "index.html", b"<h1>blog</h1>", "abc")
+    server = StaticServer(
+        ("127.0.0.1", 0), root=static, cache=FileCache(1024, 1024), quiet=True, memory=memory
+    )
+    threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    ).start()
+    try:
+        connection = http.client.HTTPConnection(*server.server_address[:2])
+
+        def get(path, headers=None):
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+
+        response, body = get("/blog/")
+        assert body == b"<h1>blog</h1>"
+        assert response.headers["ETag"] == '"abc"'
+        assert get("/blog/index.html")[1] == b"<h1>blog</h1>"
+        assert get("/blog/", {"If-None-Match": '"abc"'})[0].status == 304
+        assert get("/blog")[0].headers["Location"] == "/blog/"
+        assert get("/index.css")[1] == b"body {}"
+        assert get("/missing.html")[0].status == 404
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
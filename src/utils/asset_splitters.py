@@ -1,13 +1,14 @@
 from enum import Enum
 import re
-from typing import List
+from typing import List, NamedTuple
 
 from nodes.textnode import TextNode, TextType
 
-IMAGE_PATTERN = re.compile(r"!\[((?:[^\[\]]+|\[[^\[\]]*\])*)\]\(([^()\s]+)\)")
-LINK_PATTERN = re.compile(
-    r"(?<!!)\[((?:[^\[\]]+|\[[^\[\]]*\])*)\]\(([^()\s]+)\)",
-)
+BRACKET_PATTERN = re.compile(r"[\[\]]")
+# a destination runs up to the first whitespace or parenthesis
+DESTINATION_PATTERN = re.compile(r"[^()\s]*")
+WHITESPACE_PATTERN = re.compile(r"\s*")
+TITLE_QUOTES = ('"', "'")
 
 
 class AssetType(Enum):
@@ -19,6 +20,62 @@ def isImageAsset(type: AssetType) -> bool:
     return type is AssetType.IMAGE
 
 
+class AssetMatch(NamedTuple):
+    label: str
+    url: str
+    title: str | None
+    end: int
+
+
+# matches [label](url "title") without regex backtracking. the brackets of
+# the whole text are paired up once with a stack, so finding the end of a
+# label is a lookup no matter how many brackets are left open. everything
+# after the label is scanned forward only, and the spans scanned for two
+# different labels never overlap, which keeps a whole text linear
+class AssetScanner:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self._closing: dict[int, int] | None = None
+
+    def closing_bracket(self, open_index: int) -> int:
+        if self._closing is None:
+            self._closing = {}
+            open_brackets = []
+            for bracket in BRACKET_PATTERN.finditer(self.text):
+                if bracket.group() == "[":
+                    open_brackets.append(bracket.start())
+                elif open_brackets:
+                    self._closing[open_brackets.pop()] = bracket.start()
+        return self._closing.get(open_index, -1)
+
+    # open_index points at the "[" of the label, the "!" of an image
+    # is left to the caller
+    def match(self, open_index: int) -> AssetMatch | None:
+        text = self.text
+        close = self.closing_bracket(open_index)
+        if close == -1 or not text.startswith("(", close + 1):
+            return None
+
+        destination = DESTINATION_PATTERN.match(text, close + 2)
+        url = destination.group()
+        if not url:
+            return None
+
+        title = None
+        pos = WHITESPACE_PATTERN.match(text, destination.end()).end()
+        if pos > destination.end() and text[pos : pos + 1] in TITLE_QUOTES:
+            title_end = text.find(text[pos], pos + 1)
+            if title_end == -1:
+                return None
+            title = text[pos + 1 : title_end]
+            pos = WHITESPACE_PATTERN.match(text, title_end + 1).end()
+
+        if not text.startswith(")", pos):
+            return None
+
+        return AssetMatch(text[open_index + 1 : close], url, title, pos + 1)
+
+
 def split_asset_nodes(
     old_nodes: List[TextNode],
     asset_type: AssetType,
@@ -26,7 +83,6 @@ def split_asset_nodes(
     new_nodes = []
 
     is_image_asset = isImageAsset(asset_type)
-    pattern = IMAGE_PATTERN if is_image_asset else LINK_PATTERN
 
     asset_enum_type = TextType.IMAGE_TEXT if is_image_asset else TextType.LINK_TEXT
 
@@ -36,12 +92,19 @@ def split_asset_nodes(
             continue
 
         text = node.text
+        scanner = AssetScanner(text)
         last_index = 0
+        pos = text.find("[")
 
-        for match in pattern.finditer(text):
-            start, end = match.span()
-            alt_text, url = match.groups()
+        while pos != -1:
+            # images are the same syntax behind a "!", links must not have one
+            is_image = pos > 0 and text[pos - 1] == "!"
+            match = scanner.match(pos) if is_image == is_image_asset else None
+            if match is None:
+                pos = text.find("[", pos + 1)
+                continue
 
+            start = pos - 1 if is_image else pos
             if start > last_index:
                 new_nodes.append(
                     TextNode(text=text[last_index:start], text_type=TextType.PLAIN)
@@ -49,13 +112,15 @@ def split_asset_nodes(
 
             new_nodes.append(
                 TextNode(
-                    text=alt_text,
+                    text=match.label,
                     text_type=asset_enum_type,
-                    url=url,
+                    url=match.url,
+                    title=match.title,
                 )
             )
 
-            last_index = end
+            last_index = match.end
+            pos = text.find("[", last_index)
 
         if last_index < len(text):
             new_nodes.append(
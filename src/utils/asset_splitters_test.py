@@ -1,6 +1,9 @@
+import random
+
 from nodes.textnode import TextNode
-from utils.asset_splitters import AssetType, split_asset_nodes
+from utils.asset_splitters import AssetScanner, AssetType, split_asset_nodes
 from nodes.textnode import TextType
+from utils.text_to_nodes import text_to_nodes
 
 
 def test_split_images():
@@ -107,3 +110,81 @@ def test_split_links_no_links():
     assert new_nodes == [
         TextNode("absolutely no links here", TextType.PLAIN),
     ]
+
+
+def test_split_links_nested_brackets():
+    node = TextNode("see [a [b [c]] d](url) now", TextType.PLAIN)
+
+    assert split_asset_nodes([node], asset_type=AssetType.LINK) == [
+        TextNode("see ", TextType.PLAIN),
+        TextNode("a [b [c]] d", TextType.LINK_TEXT, "url"),
+        TextNode(" now", TextType.PLAIN),
+    ]
+
+
+def test_split_links_unbalanced_open_bracket():
+    node = TextNode("[[a](url)", TextType.PLAIN)
+
+    assert split_asset_nodes([node], asset_type=AssetType.LINK) == [
+        TextNode("[", TextType.PLAIN),
+        TextNode("a", TextType.LINK_TEXT, "url"),
+    ]
+
+
+def test_split_links_with_title():
+    node = TextNode('[a](url "the title") and [b](url2 \'other\')', TextType.PLAIN)
+
+    assert split_asset_nodes([node], asset_type=AssetType.LINK) == [
+        TextNode("a", TextType.LINK_TEXT, "url", "the title"),
+        TextNode(" and ", TextType.PLAIN),
+        TextNode("b", TextType.LINK_TEXT, "url2", "other"),
+    ]
+
+
+def test_split_images_with_title():
+    node = TextNode('![alt](img.png "caption")', TextType.PLAIN)
+
+    assert split_asset_nodes([node], asset_type=AssetType.IMAGE) == [
+        TextNode("alt", TextType.IMAGE_TEXT, "img.png", "caption"),
+    ]
+
+
+def test_split_links_rejects_malformed_destinations():
+    for text in [
+        "[a](url",
+        "[a]()",
+        "[a] (url)",
+        "[a](url title)",
+        '[a](url "unclosed)',
+    ]:
+        node = TextNode(text, TextType.PLAIN)
+        assert split_asset_nodes([node], asset_type=AssetType.LINK) == [node]
+
+
+def test_scanner_pairs_brackets():
+    scanner = AssetScanner("[a[b]c]]x[")
+
+    assert scanner.closing_bracket(0) == 6
+    assert scanner.closing_bracket(2) == 4
+    assert scanner.closing_bracket(9) == -1
+
+
+# random soup of the characters the scanner cares about, every match it
+# reports has to be well formed and point back into the text
+def test_fuzz_scanner_matches_are_well_formed():
+    rng = random.Random(1234)
+    alphabet = "[]()!\"' ax"
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        scanner = AssetScanner(text)
+        for index, char in enumerate(text):
+            if char != "[" or (match := scanner.match(index)) is None:
+                continue
+
+            assert text.startswith(f"[{match.label}](", index)
+            assert match.url and not any(c in match.url for c in "() \t")
+            assert text[match.end - 1] == ")"
+
+        text_to_nodes(text)
+        split_asset_nodes([TextNode(text, TextType.PLAIN)], AssetType.LINK)
+
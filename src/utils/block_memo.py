@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Callable
+
+from nodes.blocks.block_types import Block, BlockType
+from nodes.htmlnode import HTMLNode
+from nodes.leafnode import LeafNode
+
+
+# size bounded lru memo of rendered blocks, shared by every page rendered in
+# the same process. identical blocks (disclaimers, bios, install snippets)
+# are converted and serialized once and then reused as raw html leaves
+class BlockMemo:
+    max_bytes: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self.entries: OrderedDict[tuple[BlockType, str], str] = OrderedDict()
+
+    def render(self, block: Block, convert: Callable[[Block], HTMLNode]) -> HTMLNode:
+        key = (block.block_type, block.text)
+
+        fragment = self.entries.get(key)
+        if fragment is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return LeafNode(fragment)
+
+        self.misses += 1
+        fragment = convert(block).to_html()
+
+        entry_size = len(key[1]) + len(fragment)
+        if entry_size <= self.max_bytes:
+            self.entries[key] = fragment
+            self.size += entry_size
+            while self.size > self.max_bytes:
+                (_, text), evicted = self.entries.popitem(last=False)
+                self.size -= len(text) + len(evicted)
+
+        return LeafNode(fragment)
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
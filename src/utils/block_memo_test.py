@@ -0,0 +1,52 @@
+from nodes.blocks.block_types import Block, BlockType
+from utils.block_memo import BlockMemo
+from utils.markdown_to_html_nodes import block_to_html_node, markdown_to_html_nodes
+
+
+def paragraph(text):
+    return Block(BlockType.PARAGRAPH, [text])
+
+
+def test_repeated_block_is_a_hit():
+    memo = BlockMemo(max_bytes=1024)
+
+    first = memo.render(paragraph("same **text**"), block_to_html_node)
+    second = memo.render(paragraph("same **text**"), block_to_html_node)
+
+    assert first.to_html() == second.to_html() == "<p>same <b>text</b></p>"
+    assert (memo.hits, memo.misses) == (1, 1)
+    assert memo.hit_rate() == 0.5
+
+
+def test_block_type_is_part_of_the_key():
+    memo = BlockMemo(max_bytes=1024)
+
+    memo.render(Block(BlockType.PARAGRAPH, ["- a"]), block_to_html_node)
+    node = memo.render(Block(BlockType.UNORDERED_LIST, ["- a"]), block_to_html_node)
+
+    assert node.to_html() == "<ul><li>a</li></ul>"
+    assert memo.hits == 0
+
+
+def test_memo_stays_within_size_bound():
+    memo = BlockMemo(max_bytes=40)
+
+    for i in range(10):
+        memo.render(paragraph(f"block {i}"), block_to_html_node)
+
+    assert memo.size <= 40
+    assert len(memo.entries) < 10
+
+    memo.render(paragraph("block 9"), block_to_html_node)
+    assert memo.hits == 1
+
+
+def test_memoized_render_matches_plain_render():
+    markdown = "# T\n\nshared\n\n- a\n- b\n\nshared\n\n```\ncode\n```"
+    memo = BlockMemo(max_bytes=1024)
+
+    assert (
+        markdown_to_html_nodes(markdown, memo=memo).to_html()
+        == markdown_to_html_nodes(markdown).to_html()
+    )
+    assert memo.hits == 1
@@ -1,9 +1,16 @@
+from typing import Iterable
+
+
 # this function take the markdown files and extract the title from it, the title is the first line that starts with "# "
 def extract_title_h1(markdown: str) -> str:
-    markdownlines = markdown.strip().splitlines()
+    return extract_title_h1_from_lines(markdown.strip().splitlines())
+
 
-    for line in markdownlines:
+# same as extract_title_h1 but stops reading as soon as the title is found,
+# so it can be fed the lines of an open file
+def extract_title_h1_from_lines(lines: Iterable[str]) -> str:
+    for line in lines:
         if line.strip().startswith("# "):
-            return line.strip("# ").strip()
+            return line.strip().strip("# ").strip()
 
     raise Exception("title string not found")
@@ -0,0 +1,126 @@
+import os
+import shutil
+from pathlib import Path
+
+from utils.files.sync import scan_files
+
+GENERATION_PREFIX = "gen-"
+
+
+# the live output directory is a symlink to one of several generation
+# directories kept next to it. a build fills a new staging generation,
+# seeded with hardlinks to the files of the live one, and goes live with a
+# single atomic symlink replace, so anything serving the live path never sees
+# a half built site. the last few generations are kept for instant rollback
+class OutputGenerations:
+    live: Path
+    root: Path
+    keep: int
+
+    def __init__(self, live: Path, root: Path, keep: int = 3) -> None:
+        self.live = live
+        self.root = root
+        self.keep = max(1, keep)
+
+    def generations(self) -> list[Path]:
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            path
+            for path in self.root.iterdir()
+            if path.is_dir() and path.name.startswith(GENERATION_PREFIX)
+        )
+
+    def current(self) -> Path | None:
+        if not self.live.is_symlink():
+            return None
+        target = self.live.resolve()
+        generation = self.root / target.name
+        if not target.is_dir() or target.parent != self.root.resolve():
+            return None
+        return generation
+
+    # sidecar copy of the build manifest that matches a generation, restored
+    # on rollback so the next build knows what the live pages were built from
+    def manifest_path(self, generation: Path) -> Path:
+        return generation.with_name(f"{generation.name}.manifest.json")
+
+    # creates the next generation directory with every file of the live
+    # output hardlinked into it. writers must replace files instead of
+    # writing into them, or they would change the live generation too
+    def stage(self) -> Path:
+        existing = self.generations()
+        number = int(existing[-1].name.removeprefix(GENERATION_PREFIX)) + 1 if existing else 1
+        staging = self.root / f"{GENERATION_PREFIX}{number:06d}"
+        staging.mkdir(parents=True)
+
+        if self.live.is_dir():
+            for relative in scan_files(self.live):
+                source, target = self.live / relative, staging / relative
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(source, target)
+                except OSError:
+                    shutil.copy2(source, target)
+        return staging
+
+    # makes the staged generation the live one and drops old generations
+    def publish(self, staging: Path, manifest_path: Path | None = None) -> None:
+        if manifest_path is not None and manifest_path.exists():
+            shutil.copy2(manifest_path, self.manifest_path(staging))
+
+        self.switch(staging)
+        self.prune()
+        print(f"Published {staging} as {self.live}")
+
+    def discard(self, staging: Path) -> None:
+        print(f"Discarding staged output {staging}")
+        shutil.rmtree(staging, ignore_errors=True)
+
+    # points the live symlink at the generation before the current one and
+    # puts back the manifest it was built with
+    def rollback(self, manifest_path: Path | None = None) -> Path:
+        generations = self.generations()
+        current = self.current()
+        older = [path for path in generations if current is None or path < current]
+        if not older:
+            raise ValueError("No older generation to roll back to")
+
+        target = older[-1]
+        self.switch(target)
+        if manifest_path is not None:
+            sidecar = self.manifest_path(target)
+            if sidecar.exists():
+                shutil.copy2(sidecar, manifest_path)
+            else:
+                # unknown provenance, the next build renders everything again
+                manifest_path.unlink(missing_ok=True)
+        print(f"Rolled {self.live} back to {target}")
+        return target
+
+    def switch(self, generation: Path) -> None:
+        self.live.parent.mkdir(parents=True, exist_ok=True)
+        link = self.live.with_name(f".{self.live.name}.link-tmp")
+        link.unlink(missing_ok=True)
+        os.symlink(os.path.relpath(generation, self.live.parent), link)
+
+        # a plain directory from before generations existed cannot be
+        # replaced by a symlink in one step, move it out of the way first
+        legacy = None
+        if self.live.is_dir() and not self.live.is_symlink():
+            legacy = self.live.with_name(f".{self.live.name}.legacy")
+            shutil.rmtree(legacy, ignore_errors=True)
+            self.live.rename(legacy)
+
+        os.replace(link, self.live)
+        if legacy is not None:
+            shutil.rmtree(legacy)
+
+    # removes all but the newest generations, never the live one
+    def prune(self) -> None:
+        current = self.current()
+        for generation in self.generations()[: -self.keep]:
+            if generation == current:
+                continue
+            shutil.rmtree(generation)
+            self.manifest_path(generation).unlink(missing_ok=True)
@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from utils.files.generations import OutputGenerations
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+@pytest.fixture
+def generations(tmp_path):
+    return OutputGenerations(tmp_path / "public", tmp_path / ".generations", keep=2)
+
+
+def publish(generations, files):
+    staging = generations.stage()
+    for name, content in files.items():
+        target = staging / name
+        target.unlink(missing_ok=True)
+        write(target, content)
+    generations.publish(staging)
+    return staging
+
+
+def test_publish_points_live_at_the_staged_generation(generations):
+    staging = publish(generations, {"index.html": "one"})
+
+    assert generations.live.is_symlink()
+    assert generations.current() == staging
+    assert (generations.live / "index.html").read_text() == "one"
+
+
+def test_staging_is_seeded_with_hardlinks_and_leaves_live_alone(generations):
+    first = publish(generations, {"index.html": "one", "blog/post.html": "post"})
+
+    staging = generations.stage()
+    assert os.path.samefile(staging / "blog" / "post.html", first / "blog" / "post.html")
+
+    # replacing a file in staging must not touch the live generation
+    (staging / "index.html").unlink()
+    write(staging / "index.html", "two")
+    assert (generations.live / "index.html").read_text() == "one"
+
+    generations.publish(staging)
+    assert (generations.live / "index.html").read_text() == "two"
+    assert (generations.live / "blog" / "post.html").read_text() == "post"
+
+
+def test_discarded_staging_never_goes_live(generations):
+    first = publish(generations, {"index.html": "one"})
+
+    staging = generations.stage()
+    write(staging / "broken.html", "half")
+    generations.discard(staging)
+
+    assert not staging.exists()
+    assert generations.current() == first
+
+
+def test_old_generations_are_pruned(generations):
+    for i in range(4):
+        publish(generations, {"index.html": str(i)})
+
+    assert [path.name for path in generations.generations()] == ["gen-000003", "gen-000004"]
+
+
+def test_rollback_restores_previous_generation_and_manifest(generations, tmp_path):
+    manifest = tmp_path / "manifest.json"
+
+    manifest.write_text("first")
+    first = generations.stage()
+    write(first / "index.html", "one")
+    generations.publish(first, manifest)
+
+    manifest.write_text("second")
+    second = generations.stage()
+    (second / "index.html").unlink()
+    write(second / "index.html", "two")
+    generations.publish(second, manifest)
+
+    assert generations.rollback(manifest) == first
+    assert (generations.live / "index.html").read_text() == "one"
+    assert manifest.read_text() == "first"
+
+    with pytest.raises(ValueError):
+        generations.rollback(manifest)
+
+
+def test_plain_live_directory_is_migrated(generations):
+    write(generations.live / "index.html", "legacy")
+
+    staging = generations.stage()
+    assert (staging / "index.html").read_text() == "legacy"
+
+    generations.publish(staging)
+    assert generations.live.is_symlink()
+    assert (generations.live / "index.html").read_text() == "legacy"
@@ -0,0 +1,58 @@
+import hashlib
+from pathlib import Path
+from typing import BinaryIO
+
+from profiling import stages
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# hashes the file in fixed size chunks so big files never have to be
+# loaded into memory at once
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# text sink that encodes and hashes everything written to it on the way
+# to a binary file. small writes are batched, so every chunk is encoded,
+# hashed and written once
+class HashingWriter:
+    size: int
+
+    def __init__(self, sink: BinaryIO, buffer_size: int = 64 * 1024) -> None:
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._pending: list[str] = []
+        self._pending_size = 0
+
+    def write(self, text: str) -> int:
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with stages.measure("write"):
+            data = "".join(self._pending).encode("utf-8")
+            self._pending.clear()
+            self._pending_size = 0
+            self._digest.update(data)
+            self.size += len(data)
+            self.sink.write(data)
+
+    def hexdigest(self) -> str:
+        self.flush()
+        return self._digest.hexdigest()
@@ -0,0 +1,168 @@
+import os
+import shutil
+from enum import Enum
+from pathlib import Path
+
+from utils.files.hashing import hash_file
+
+# linux ioctl used to share the data blocks of two files (copy on write)
+FICLONE = 0x40049409
+
+
+class SyncMode(Enum):
+    COPY = "copy"
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+
+
+class SyncStats:
+    copied: list[Path]
+    unchanged: int
+    deleted: list[Path]
+    # relative path -> (content hash, size) of the files that were hashed
+    hashes: dict[Path, tuple[str, int]]
+
+    def __init__(self) -> None:
+        self.copied = []
+        self.unchanged = 0
+        self.deleted = []
+        self.hashes = {}
+
+    def __repr__(self) -> str:
+        return (
+            f"SyncStats(copied={len(self.copied)},unchanged={self.unchanged},"
+            f"deleted={len(self.deleted)})"
+        )
+
+
+# relative path -> stat result for every file below root
+def scan_files(root: Path) -> dict[Path, os.stat_result]:
+    files = {}
+    if not root.is_dir():
+        return files
+
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file():
+                    files[Path(entry.path).relative_to(root)] = entry.stat()
+    return files
+
+
+# whether dest already holds the bytes of src, by size and mtime or, with
+# use_hash, by content when only the mtime differs
+def is_unchanged(
+    src: Path,
+    src_stat: os.stat_result,
+    dest: Path,
+    dest_stat: os.stat_result | None,
+    use_hash: bool,
+) -> bool:
+    if dest_stat is None or dest_stat.st_size != src_stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == src_stat.st_mtime_ns:
+        return True
+    return use_hash and hash_file(src) == hash_file(dest)
+
+
+# places src at dest through a temp file and a rename, so readers never see
+# a partially written file and an existing hardlink at dest is never written through
+def place_file(src: Path, dest: Path, mode: SyncMode) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.is_dir() and not dest.is_symlink():
+        shutil.rmtree(dest)
+
+    tmp = dest.with_name(f".{dest.name}.sync-tmp")
+    tmp.unlink(missing_ok=True)
+
+    if mode is SyncMode.HARDLINK:
+        try:
+            os.link(src, tmp)
+            os.replace(tmp, dest)
+            return
+        except OSError:
+            # cross device or unsupported filesystem, fall back to a copy
+            pass
+    elif mode is SyncMode.REFLINK:
+        try:
+            reflink(src, tmp)
+            shutil.copystat(src, tmp)
+            os.replace(tmp, dest)
+            return
+        except (OSError, ImportError):
+            tmp.unlink(missing_ok=True)
+
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dest)
+
+
+def reflink(src: Path, dest: Path) -> None:
+    import fcntl
+
+    with src.open("rb") as src_file, dest.open("wb") as dest_file:
+        fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+
+
+# makes dest mirror src, copying only files that are new or changed and
+# deleting only files that no longer exist in src. files listed in keep
+# (rendered pages) are never treated as orphans. every copied file is hashed,
+# and so is every unchanged file missing from known (relative paths whose
+# hash the caller already has), when known is given
+def sync_dir(
+    src: Path,
+    dest: Path,
+    keep: set[Path] | None = None,
+    use_hash: bool = False,
+    mode: SyncMode = SyncMode.COPY,
+    known: set[Path] | None = None,
+) -> SyncStats:
+    if not src.exists():
+        raise ValueError("Source static dir not found!")
+
+    dest.mkdir(parents=True, exist_ok=True)
+    keep = keep or set()
+    stats = SyncStats()
+
+    src_files = scan_files(src)
+    dest_files = scan_files(dest)
+
+    for relative, src_stat in sorted(src_files.items()):
+        source, target = src / relative, dest / relative
+        dest_stat = dest_files.get(relative)
+        if is_unchanged(source, src_stat, target, dest_stat, use_hash):
+            stats.unchanged += 1
+            if dest_stat.st_mtime_ns != src_stat.st_mtime_ns:
+                # same bytes, only the mtime drifted. dest may be a hardlink
+                # into the live generation, so it is replaced, not touched
+                place_file(source, target, mode)
+            if known is not None and relative not in known:
+                stats.hashes[relative] = (hash_file(target), src_stat.st_size)
+            continue
+
+        print(f"Copying file {source} -> {target}")
+        place_file(source, target, mode)
+        stats.copied.append(relative)
+        stats.hashes[relative] = (hash_file(target), src_stat.st_size)
+
+    for relative in sorted(dest_files.keys() - src_files.keys()):
+        target = dest / relative
+        if target in keep:
+            continue
+
+        print(f"Removing orphaned file {target}")
+        target.unlink()
+        stats.deleted.append(relative)
+
+    remove_empty_dirs(dest)
+    return stats
+
+
+def remove_empty_dirs(root: Path) -> None:
+    for directory, _, _ in sorted(os.walk(root), reverse=True):
+        path = Path(directory)
+        if path != root and not any(path.iterdir()):
+            path.rmdir()
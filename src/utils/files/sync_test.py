@@ -0,0 +1,123 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from utils.files.hashing import hash_file
+from utils.files.sync import SyncMode, sync_dir
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    src, dest = tmp_path / "static", tmp_path / "public"
+    write(src / "index.css", "body {}")
+    write(src / "images" / "a.png", "aaaa")
+    return src, dest
+
+
+def test_first_sync_copies_everything(dirs):
+    src, dest = dirs
+
+    stats = sync_dir(src, dest)
+
+    assert sorted(map(str, stats.copied)) == ["images/a.png", "index.css"]
+    assert (dest / "images" / "a.png").read_text() == "aaaa"
+
+
+def test_second_sync_copies_nothing(dirs):
+    src, dest = dirs
+    sync_dir(src, dest)
+
+    stats = sync_dir(src, dest)
+
+    assert stats.copied == []
+    assert stats.unchanged == 2
+
+
+def test_changed_file_is_copied(dirs):
+    src, dest = dirs
+    sync_dir(src, dest)
+
+    write(src / "index.css", "body { color: red }")
+    stats = sync_dir(src, dest)
+
+    assert list(map(str, stats.copied)) == ["index.css"]
+    assert (dest / "index.css").read_text() == "body { color: red }"
+
+
+def test_touched_file_is_skipped_with_hash(dirs):
+    src, dest = dirs
+    sync_dir(src, dest)
+    stat = (src / "index.css").stat()
+    os.utime(src / "index.css", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert sync_dir(src, dest, use_hash=True).copied == []
+    assert sync_dir(src, dest).copied == []
+
+
+def test_touched_file_leaves_a_hardlinked_copy_alone(dirs, tmp_path):
+    src, dest = dirs
+    sync_dir(src, dest)
+    # the live generation shares its inodes with the staged one
+    live = tmp_path / "live.css"
+    os.link(dest / "index.css", live)
+    live_mtime = live.stat().st_mtime_ns
+    stat = (src / "index.css").stat()
+    os.utime(src / "index.css", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    sync_dir(src, dest, use_hash=True)
+
+    assert live.stat().st_mtime_ns == live_mtime
+    assert (dest / "index.css").stat().st_mtime_ns == stat.st_mtime_ns + 10**9
+
+
+def test_orphans_are_deleted_but_kept_files_stay(dirs):
+    src, dest = dirs
+    sync_dir(src, dest)
+    write(dest / "old" / "gone.png", "x")
+    write(dest / "index.html", "<html>")
+
+    stats = sync_dir(src, dest, keep={dest / "index.html"})
+
+    assert list(map(str, stats.deleted)) == ["old/gone.png"]
+    assert not (dest / "old").exists()
+    assert (dest / "index.html").exists()
+
+
+def test_hardlink_mode_shares_inode(dirs):
+    src, dest = dirs
+
+    sync_dir(src, dest, mode=SyncMode.HARDLINK)
+
+    assert os.path.samefile(src / "index.css", dest / "index.css")
+
+
+def test_reflink_mode_falls_back_to_copy(dirs):
+    src, dest = dirs
+
+    sync_dir(src, dest, mode=SyncMode.REFLINK)
+
+    assert (dest / "index.css").read_text() == "body {}"
+
+
+def test_missing_source_raises(tmp_path):
+    with pytest.raises(ValueError):
+        sync_dir(tmp_path / "missing", tmp_path / "public")
+
+
+def test_copied_and_unknown_files_are_hashed(dirs):
+    src, dest = dirs
+
+    stats = sync_dir(src, dest)
+    assert sorted(map(str, stats.hashes)) == ["images/a.png", "index.css"]
+    assert stats.hashes[Path("index.css")] == (hash_file(src / "index.css"), len("body {}"))
+
+    # unchanged files are only hashed when the caller does not know them yet
+    stats = sync_dir(src, dest, known={Path("index.css")})
+    assert list(stats.hashes) == [Path("images/a.png")]
+    assert sync_dir(src, dest).hashes == {}
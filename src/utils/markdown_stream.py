@@ -0,0 +1,29 @@
+from pathlib import Path
+from typing import TextIO
+
+from utils.block_memo import BlockMemo
+from utils.extract_title import extract_title_h1_from_lines
+from utils.markdown_to_html_nodes import iter_html_nodes
+
+
+# markdown file that is rendered while it is being read, the file is consumed
+# line by line and every block is written out as soon as it is complete, so
+# memory is bounded by the largest block instead of the whole document
+class MarkdownFileStream:
+    path: Path
+    memo: BlockMemo | None
+
+    def __init__(self, path: Path, memo: BlockMemo | None = None) -> None:
+        self.path = path
+        self.memo = memo
+
+    def title(self) -> str:
+        with self.path.open(encoding="utf-8") as source:
+            return extract_title_h1_from_lines(source)
+
+    def write_html(self, sink: TextIO) -> None:
+        with self.path.open(encoding="utf-8") as source:
+            sink.write("<div>")
+            for node in iter_html_nodes(source, self.memo):
+                node.write_html(sink)
+            sink.write("</div>")
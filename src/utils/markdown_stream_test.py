@@ -0,0 +1,39 @@
+import io
+
+from benchmarks.synthetic import synthetic_markdown
+from generators import page_gen
+from utils.markdown_stream import MarkdownFileStream
+from utils.markdown_to_html_nodes import markdown_to_html_nodes
+
+
+def test_stream_matches_in_memory_render(tmp_path):
+    markdown = synthetic_markdown(300, seed=3)
+    source = tmp_path / "big.md"
+    source.write_text(markdown, encoding="utf-8")
+    sink = io.StringIO()
+
+    MarkdownFileStream(source).write_html(sink)
+
+    assert sink.getvalue() == markdown_to_html_nodes(markdown).to_html()
+
+
+def test_stream_title_stops_at_first_heading(tmp_path):
+    source = tmp_path / "page.md"
+    source.write_text("intro\n\n# The Title\n\n# Another", encoding="utf-8")
+
+    assert MarkdownFileStream(source).title() == "The Title"
+
+
+def test_generate_page_streams_large_sources(tmp_path, monkeypatch):
+    template = tmp_path / "template.html"
+    template.write_text("<title>{{ Title }}</title>{{ Content }}", encoding="utf-8")
+    source = tmp_path / "index.md"
+    source.write_text("# Big\n\n```\ncode\n\nmore\n```\n", encoding="utf-8")
+
+    monkeypatch.setattr(page_gen, "STREAMING_THRESHOLD_BYTES", 0)
+    page_gen.generate_page(from_path=source, template_path=template, dest_path=tmp_path)
+
+    assert (tmp_path / "index.html").read_text() == (
+        "<title>Big</title><div><h1>Big</h1>"
+        "<pre><code>code\n\nmore\n</code></pre></div>"
+    )
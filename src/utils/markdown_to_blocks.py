@@ -1,14 +1,74 @@
-import re
-from typing import List
+from typing import Iterable, Iterator, List
 
+from nodes.blocks.block_types import Block, BlockClassifier, BlockType
 
-def markdown_to_blocks(markdown: str) -> List[str]:
-    markdown = markdown.strip()
-    if not markdown:
-        return []
+FENCE = "```"
+
+
+# state machine over the source lines, every line is looked at exactly once.
+# blank lines end a block, except inside a code fence where they are kept,
+# and a fence line always starts a block of its own
+def iter_blocks(lines: Iterable[str]) -> Iterator[Block]:
+    classifier: BlockClassifier | None = None
+    start_line = 0
+    end_line = 0
+    # indentation of the opening fence, -1 while outside of a fence
+    fence_indent = -1
+
+    def finish(block_type: BlockType | None = None) -> Block:
+        assert classifier is not None
+        if block_type is None:
+            block_type = classifier.block_type()
+            classifier.lines[-1] = classifier.lines[-1].rstrip()
+        return Block(block_type, classifier.lines, start_line, end_line)
+
+    for number, line in enumerate(lines, start=1):
+        line = line.rstrip("\r\n")
+        stripped = line.lstrip(" ")
+
+        if fence_indent >= 0:
+            assert classifier is not None
+            end_line = number
+            if stripped.startswith(FENCE):
+                classifier.lines.append(stripped.rstrip())
+                yield finish(BlockType.CODE)
+                classifier = None
+                fence_indent = -1
+            else:
+                # code keeps its own indentation relative to the fence
+                indent = min(fence_indent, len(line) - len(stripped))
+                classifier.lines.append(line[indent:])
+            continue
+
+        if stripped.startswith(FENCE):
+            if classifier is not None:
+                yield finish()
+            classifier = BlockClassifier()
+            classifier.lines.append(stripped.rstrip())
+            start_line = end_line = number
+            fence_indent = len(line) - len(stripped)
+            continue
 
-    blocks = markdown.split(
-        sep="\n\n",
-    )
+        if not stripped or stripped.isspace():
+            if classifier is not None:
+                yield finish()
+                classifier = None
+            continue
 
-    return [re.sub(r"\n[ ]+", "\n", block.strip()) for block in blocks if block.strip()]
+        if classifier is None:
+            classifier = BlockClassifier()
+            start_line = number
+        classifier.add(stripped)
+        end_line = number
+
+    if classifier is not None:
+        # an unclosed fence runs to the end of the document
+        yield finish(BlockType.CODE if fence_indent >= 0 else None)
+
+
+def parse_blocks(markdown: str) -> List[Block]:
+    return list(iter_blocks(markdown.split("\n")))
+
+
+def markdown_to_blocks(markdown: str) -> List[str]:
+    return [block.text for block in iter_blocks(markdown.split("\n"))]
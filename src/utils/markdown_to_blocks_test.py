@@ -1,4 +1,5 @@
-from utils.markdown_to_blocks import markdown_to_blocks
+from nodes.blocks.block_types import Block, BlockType
+from utils.markdown_to_blocks import markdown_to_blocks, parse_blocks
 
 
 def test_markdown_to_blocks():
@@ -20,3 +21,49 @@ def test_markdown_to_blocks():
         "This is another paragraph with _italic_ text and `code` here\nThis is the same paragraph on a new line",
         "- This is a list\n- with items",
     ] == blocks
+
+
+def test_parse_blocks_line_ranges():
+    md = "# Title\n\nfirst line\nsecond line\n\n\n- item\n- item two\n"
+
+    assert parse_blocks(md) == [
+        Block(BlockType.HEADING, ["# Title"], 1, 1),
+        Block(BlockType.PARAGRAPH, ["first line", "second line"], 3, 4),
+        Block(BlockType.UNORDERED_LIST, ["- item", "- item two"], 7, 8),
+    ]
+
+
+def test_code_fence_keeps_blank_lines_and_indentation():
+    md = "intro\n\n  ```\n  def f():\n\n      return 1\n  ```\n\noutro"
+
+    blocks = parse_blocks(md)
+
+    assert blocks[1] == Block(
+        BlockType.CODE,
+        ["```", "def f():", "", "    return 1", "```"],
+        3,
+        7,
+    )
+    assert blocks[2] == Block(BlockType.PARAGRAPH, ["outro"], 9, 9)
+
+
+def test_fence_interrupts_paragraph():
+    md = "text before\n```\ncode\n```\ntext after"
+
+    assert [block.block_type for block in parse_blocks(md)] == [
+        BlockType.PARAGRAPH,
+        BlockType.CODE,
+        BlockType.PARAGRAPH,
+    ]
+
+
+def test_unclosed_fence_runs_to_the_end():
+    md = "```\ncode\n\nmore code"
+
+    assert parse_blocks(md) == [
+        Block(BlockType.CODE, ["```", "code", "", "more code"], 1, 4),
+    ]
+
+
+def test_whitespace_only_lines_separate_blocks():
+    assert markdown_to_blocks("one\n   \ntwo\n\t\nthree") == ["one", "two", "three"]
@@ -1,79 +1,112 @@
 from nodes.htmlnode import HTMLNode
 from nodes.parentnode import ParentNode
 from nodes.leafnode import LeafNode
-from utils.markdown_to_blocks import markdown_to_blocks
-from nodes.blocks.block_types import block_to_blocktype, BlockType
+from profiling import stages
+from utils.block_memo import BlockMemo
+from utils.markdown_to_blocks import iter_blocks
+from nodes.blocks.block_types import Block, BlockType, HEADING_PATTERN
 from utils.text_to_nodes import text_to_nodes
 from utils.text_to_html import text_node_to_html
 import re
+from typing import Iterable, Iterator
 
+ORDERED_ITEM_TEXT_PATTERN = re.compile(r"\d+\. (.+)")
 
-def markdown_to_html_nodes(markdown: str) -> HTMLNode:
-    markdown_blocks = markdown_to_blocks(markdown)
-    children = []
 
-    for block in markdown_blocks:
-        block_type = block_to_blocktype(block)
-        html_node = block_to_html_node(block, block_type)
-        children.append(html_node)
+def markdown_to_html_nodes(markdown: str, memo: BlockMemo | None = None) -> HTMLNode:
+    blocks: Iterable[Block] = iter_blocks(markdown.split("\n"))
+    if stages.active is not None:
+        # split up front while profiling, so the two stages are timed apart
+        with stages.active.measure("block_parse"):
+            blocks = list(blocks)
+
+    with stages.measure("node_build"):
+        children = list(blocks_to_html_nodes(blocks, memo))
 
     return ParentNode("div", children)
 
 
-def block_to_html_node(block: str, block_type: BlockType) -> HTMLNode:
-    match block_type:
+# lazily converts the lines into one html node per block, with a memo
+# repeated blocks come back as already rendered raw html leaves
+def iter_html_nodes(
+    lines: Iterable[str],
+    memo: BlockMemo | None = None,
+) -> Iterator[HTMLNode]:
+    return blocks_to_html_nodes(iter_blocks(lines), memo)
+
+
+def blocks_to_html_nodes(
+    blocks: Iterable[Block],
+    memo: BlockMemo | None = None,
+) -> Iterator[HTMLNode]:
+    for block in blocks:
+        if memo is None:
+            yield block_to_html_node(block)
+        else:
+            yield memo.render(block, block_to_html_node)
+
+
+# the block already carries its lines, so none of the converters below
+# have to split the block text again
+def block_to_html_node(block: Block) -> HTMLNode:
+    lines = block.lines
+    match block.block_type:
         case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
+            return paragraph_to_html_node(lines)
         case BlockType.HEADING:
-            return heading_to_html_node(block)
+            return heading_to_html_node(lines)
         case BlockType.CODE:
-            return code_to_html_node(block)
+            return code_to_html_node(lines)
 
         case BlockType.QUOTE:
-            return quote_to_html_node(block)
+            return quote_to_html_node(lines)
 
         case BlockType.UNORDERED_LIST:
-            return unordered_list_to_html_node(block)
+            return unordered_list_to_html_node(lines)
 
         case BlockType.ORDERED_LIST:
-            return ordered_list_to_html_node(block)
+            return ordered_list_to_html_node(lines)
 
 
 def text_to_children(text: str) -> list[HTMLNode]:
-    text_nodes = text_to_nodes(text)
+    if stages.active is None:
+        text_nodes = text_to_nodes(text)
+    else:
+        with stages.active.measure("inline_parse"):
+            text_nodes = text_to_nodes(text)
     return [text_node_to_html(node) for node in text_nodes]
 
 
-def paragraph_to_html_node(block: str) -> HTMLNode:
-    lines = block.split("\n")
+def paragraph_to_html_node(lines: list[str]) -> HTMLNode:
     text = " ".join(lines).strip()
     children = text_to_children(text)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block: str) -> HTMLNode:
-    match = re.match(r"^(#{1,6}) (.+)$", block)
+def heading_to_html_node(lines: list[str]) -> HTMLNode:
+    match = HEADING_PATTERN.match(lines[0])
     if not match:
         raise ValueError("Invalid heading format")
 
-    level = len(match.group(1))
-    text = match.group(2).strip()
+    level = match.end() - 1
+    text = " ".join([lines[0][match.end() :], *lines[1:]]).strip()
     children = text_to_children(text)
     return ParentNode(f"h{level}", children)
 
 
-def code_to_html_node(block: str) -> HTMLNode:
-    lines = block.split("\n")
-    if not (lines[0].startswith("```") and lines[-1].startswith("```")):
+def code_to_html_node(lines: list[str]) -> HTMLNode:
+    if not lines[0].startswith("```"):
         raise ValueError("Invalid code block format")
 
-    code_text = "\n".join(lines[1:-1]).strip()
+    # an unclosed fence has no closing line to drop
+    body = lines[1:-1] if len(lines) > 1 and lines[-1].startswith("```") else lines[1:]
+
+    code_text = "\n".join(body).strip("\n")
     code_node = LeafNode(code_text + "\n", "code")
     return ParentNode("pre", [code_node])
 
 
-def quote_to_html_node(block: str) -> HTMLNode:
-    lines = block.split("\n")
+def quote_to_html_node(lines: list[str]) -> HTMLNode:
     quote_lines = []
 
     for line in lines:
@@ -87,8 +120,7 @@ def quote_to_html_node(block: str) -> HTMLNode:
     return ParentNode("blockquote", children)
 
 
-def unordered_list_to_html_node(block: str) -> HTMLNode:
-    lines = block.split("\n")
+def unordered_list_to_html_node(lines: list[str]) -> HTMLNode:
     list_items = []
 
     for line in lines:
@@ -100,12 +132,11 @@ def unordered_list_to_html_node(block: str) -> HTMLNode:
     return ParentNode("ul", list_items)
 
 
-def ordered_list_to_html_node(block: str) -> HTMLNode:
-    lines = block.split("\n")
+def ordered_list_to_html_node(lines: list[str]) -> HTMLNode:
     list_items = []
 
     for line in lines:
-        match = re.match(r"^\d+\. (.+)$", line)
+        match = ORDERED_ITEM_TEXT_PATTERN.match(line)
         if match:
             text = match.group(1).strip()
             children = text_to_children(text)
@@ -33,3 +33,20 @@ def test_codeblock():
         html
         == "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>"
     )
+
+
+def test_codeblock_with_blank_lines():
+    md = "```\nfirst\n\nsecond\n```"
+
+    html = markdown_to_html_nodes(md).to_html()
+    assert html == "<div><pre><code>first\n\nsecond\n</code></pre></div>"
+
+
+def test_all_block_types():
+    md = "## Sub\n\n> quoted\n> more\n\n- a\n- b\n\n1. one\n2. two"
+
+    html = markdown_to_html_nodes(md).to_html()
+    assert html == (
+        "<div><h2>Sub</h2><blockquote>quoted more</blockquote>"
+        "<ul><li>a</li><li>b</li></ul><ol><li>one</li><li>two</li></ol></div>"
+    )
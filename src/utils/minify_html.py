@@ -0,0 +1,226 @@
+import io
+import re
+from typing import TextIO
+
+from profiling import stages
+
+# only the whitespace html collapses, a non breaking space is content
+WHITESPACE_PATTERN = re.compile(r"[ \t\n\r\f]+")
+
+# a start or end tag, quoted attribute values may contain ">"
+TAG = r"""<(/?)([A-Za-z][^\s/>]*)(?:[^>"']|"[^"]*"|'[^']*')*+>"""
+TAG_PATTERN = re.compile(TAG)
+TAG_SPLIT_PATTERN = re.compile(f"({TAG})")
+DECLARATION_PATTERN = re.compile(r"<[!?][^>]*>")
+
+# elements whose content is written out exactly as it came, up to their end tag
+VERBATIM_TAGS = {"pre", "code", "textarea", "script", "style"}
+
+# text and tags that need no special handling, everything up to the next
+# comment, declaration, verbatim element or unfinished tag
+PLAIN_RUN_PATTERN = re.compile(
+    r"""(?:[^<]++|<(?!(?i:pre|code|textarea|script|style)[\s/>])"""
+    r"""/?[A-Za-z][^\s/>]*(?:[^>"']|"[^"]*"|'[^']*')*+>)++"""
+)
+VERBATIM_END_PATTERNS = {
+    name: re.compile(rf"</{name}[\s/>]", re.IGNORECASE) for name in VERBATIM_TAGS
+}
+
+# elements around which whitespace never renders, so it is dropped
+# instead of being collapsed into a space
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "dd", "details",
+    "div", "dl", "dt", "figcaption", "figure", "footer", "form", "h1", "h2",
+    "h3", "h4", "h5", "h6", "head", "header", "hr", "html", "li", "link",
+    "main", "meta", "nav", "ol", "p", "section", "summary", "table", "tbody",
+    "td", "tfoot", "th", "thead", "title", "tr", "ul",
+}  # fmt: skip
+
+# a tag we cannot find the end of is given up on and passed through as
+# text once this much follows it, so bad markup never buffers a whole page
+MAX_TAG_CHARS = 64 * 1024
+
+
+# text sink that minifies html on its way to another sink: whitespace runs
+# collapse into one space (or vanish next to block elements), comments are
+# dropped and pre, code, textarea, script and style content is left alone.
+# small writes are batched like in HashingWriter, and only an unfinished
+# tag, comment or end tag is held back between batches, so the page is
+# never buffered as a whole
+class MinifyingWriter:
+    def __init__(self, sink: TextIO, buffer_size: int = 64 * 1024) -> None:
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self._chunks: list[str] = []
+        self._chunks_size = 0
+        self._pending = ""
+        # minified pieces of the current batch, written to the sink at once
+        self._out: list[str] = []
+        # end tag that closes the verbatim element we are in and how many
+        # trailing characters could be its start
+        self._verbatim_end: re.Pattern | None = None
+        self._verbatim_keep = 0
+        self._space = False
+        # true at the start and right after a block element tag
+        self._after_block = True
+
+    def write(self, text: str) -> int:
+        self._chunks.append(text)
+        self._chunks_size += len(text)
+        if self._chunks_size >= self.buffer_size:
+            self._process(final=False)
+        return len(text)
+
+    # writes out everything held back, at the end of the document
+    def finish(self) -> None:
+        self._process(final=True)
+        self._pending = ""
+
+    def _process(self, final: bool) -> None:
+        with stages.measure("minify"):
+            self._minify(final)
+
+    def _minify(self, final: bool) -> None:
+        data = self._pending + "".join(self._chunks)
+        self._chunks.clear()
+        self._chunks_size = 0
+        position = 0
+        while position < len(data):
+            if self._verbatim_end is not None:
+                position = self._copy_verbatim(data, position, final)
+                if self._verbatim_end is not None:
+                    break
+                continue
+
+            # most of a page is plain text and tags, found in one go
+            run = PLAIN_RUN_PATTERN.match(data, position)
+            if run is not None:
+                self._plain(run.group())
+                position = run.end()
+                continue
+
+            match = TAG_PATTERN.match(data, position)
+            if match is not None:
+                self._start_tag(*match.group(0, 1, 2))
+                position = match.end()
+                continue
+
+            end = self._markup(data, position, final)
+            if end is None:
+                break
+            position = end
+
+        self._pending = data[position:]
+        self.sink.write("".join(self._out))
+        self._out.clear()
+
+    # handles the markup starting at position and returns where it ends,
+    # None when it continues past the data we have so far
+    def _markup(self, data: str, position: int, final: bool) -> int | None:
+        next_char = data[position + 1 : position + 2]
+        if next_char == "!" and (
+            data.startswith("<!--", position)
+            or (not final and "<!--".startswith(data[position : position + 4]))
+        ):
+            if len(data) - position < 4:
+                return None
+            closing = data.find("-->", position + 4)
+            if closing == -1:
+                if not final:
+                    return None
+                self._plain(data[position:])
+                return len(data)
+            # conditional comments are markup to old browsers, the rest goes
+            if data.startswith("<!--[if", position):
+                self._tag(data[position : closing + 3])
+            return closing + 3
+
+        if (match := DECLARATION_PATTERN.match(data, position)) is not None:
+            self._tag(match.group())
+            return match.end()
+
+        # an unfinished tag waits for more data, a stray "<" is just text
+        unfinished = (
+            next_char == ""
+            or next_char.isalpha()
+            or (next_char in "/!?" and ">" not in data[position:])
+        )
+        if unfinished and not final and len(data) - position < MAX_TAG_CHARS:
+            return None
+        self._plain("<")
+        return position + 1
+
+    def _start_tag(self, tag: str, closing: str, name: str) -> None:
+        name = name.lower()
+        block = name in BLOCK_TAGS
+        if self._space and not self._after_block and not block:
+            self._out.append(" ")
+        self._out.append(tag)
+        self._space = False
+        self._after_block = block
+        if not closing and name in VERBATIM_TAGS and not tag.endswith("/>"):
+            self._verbatim_end = VERBATIM_END_PATTERNS[name]
+            self._verbatim_keep = len(name) + 2
+
+    def _copy_verbatim(self, data: str, position: int, final: bool) -> int:
+        match = self._verbatim_end.search(data, position)
+        if match is None:
+            # keep back what could be the start of the end tag
+            keep = 0 if final else self._verbatim_keep
+            end = max(position, len(data) - keep)
+            self._out.append(data[position:end])
+            return end
+
+        self._out.append(data[position : match.start()])
+        self._verbatim_end = None
+        self._after_block = False
+        self._space = False
+        return match.start()
+
+    # text and complete tags outside verbatim elements. split() hands back
+    # text, tag, slash and name for every tag, the hot loop keeps its state
+    # in locals
+    def _plain(self, run: str) -> None:
+        parts = TAG_SPLIT_PATTERN.split(run)
+        append = self._out.append
+        collapse = WHITESPACE_PATTERN.sub
+        space, after_block = self._space, self._after_block
+
+        for index in range(0, len(parts), 4):
+            text = parts[index]
+            if text:
+                text = collapse(" ", text)
+                if text[0] == " ":
+                    space = True
+                    text = text[1:]
+                if text:
+                    if space and not after_block:
+                        append(" ")
+                    space = text[-1] == " "
+                    append(text[:-1] if space else text)
+                    after_block = False
+
+            if index + 1 < len(parts):
+                block = parts[index + 3].lower() in BLOCK_TAGS
+                if space and not after_block and not block:
+                    append(" ")
+                append(parts[index + 1])
+                space = False
+                after_block = block
+
+        self._space, self._after_block = space, after_block
+
+    # comments kept and declarations, nothing renders around them
+    def _tag(self, tag: str) -> None:
+        self._out.append(tag)
+        self._space = False
+        self._after_block = True
+
+
+# the whole document at once, for callers that have it as a string
+def minify_html(html: str) -> str:
+    output = io.StringIO()
+    writer = MinifyingWriter(output)
+    writer.write(html)
+    writer.finish()
+    return output.getvalue()
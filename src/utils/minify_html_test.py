@@ -0,0 +1,96 @@
+import io
+import random
+
+from utils.minify_html import MinifyingWriter, minify_html
+
+PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <title> Page </title>
+    <!-- template comment -->
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>
+      <h1>Title</h1>
+      <p>some   <b>bold</b>
+         <i>italic</i> and&nbsp;  text, a < b</p>
+      <pre><code>def f():
+    return  1  <  2   # <!-- kept -->
+</code></pre>
+      <p>inline <code>x  =  1</code> code</p>
+      <a title="a > b" href="/x">link</a>
+      <textarea>  typed
+  text </textarea>
+      <script>
+        if (a<b && "</scr" + "ipt>") { run(); }  // <!-- not a comment -->
+      </script>
+      <!--[if IE]><p>old</p><![endif]-->
+    </article>
+  </body>
+</html>
+"""
+
+MINIFIED = (
+    "<!DOCTYPE html><html><head><title>Page</title>"
+    '<link href="/index.css" rel="stylesheet" /></head><body><article>'
+    "<h1>Title</h1><p>some <b>bold</b> <i>italic</i> and&nbsp;  text, a < b</p>"
+    "<pre><code>def f():\n    return  1  <  2   # <!-- kept -->\n</code></pre>"
+    "<p>inline <code>x  =  1</code> code</p>"
+    '<a title="a > b" href="/x">link</a>'
+    " <textarea>  typed\n  text </textarea>"
+    ' <script>\n        if (a<b && "</scr" + "ipt>") { run(); }  // <!-- not a comment -->\n'
+    "      </script>"
+    "<!--[if IE]><p>old</p><![endif]--></article></body></html>"
+)
+
+
+def streamed(html: str, sizes: list[int]) -> str:
+    output = io.StringIO()
+    writer = MinifyingWriter(output, buffer_size=1)
+    position = 0
+    for size in sizes:
+        writer.write(html[position : position + size])
+        position += size
+    writer.write(html[position:])
+    writer.finish()
+    return output.getvalue()
+
+
+def test_minifies_a_page():
+    assert minify_html(PAGE) == MINIFIED
+
+
+def test_same_output_for_any_chunking():
+    for size in range(1, 12):
+        assert streamed(PAGE, [size] * (len(PAGE) // size)) == MINIFIED
+
+    rng = random.Random(0)
+    for _ in range(200):
+        sizes = [rng.randint(1, 40) for _ in range(len(PAGE) // 10)]
+        assert streamed(PAGE, sizes) == MINIFIED
+
+
+def test_unfinished_markup_is_passed_through():
+    assert minify_html("<p>a <!-- never closed") == "<p>a <!-- never closed"
+    assert minify_html("<p>x <a title='unclosed>") == "<p>x <a title='unclosed>"
+    assert minify_html("<pre>  no end") == "<pre>  no end"
+    assert minify_html("   \n  ") == ""
+
+
+def test_uppercase_verbatim_tags():
+    assert minify_html("<PRE>  a  </PRE>  <p> b </p>") == "<PRE>  a  </PRE><p>b</p>"
+
+
+def test_random_markup_streams_like_a_single_write():
+    pieces = [
+        "<p>", "</p>", "<b>", "</b>", "<pre>", "</pre>", "<code>", "</code>",
+        "<script>", "</script>", "<!--", "-->", "<!doctype html>", "<a href='x > y'>",
+        "</a>", " ", "  ", "\n", "\t", "text", "a < b", "<", ">", "<br/>", "&nbsp;",
+    ]  # fmt: skip
+    rng = random.Random(1)
+    for _ in range(300):
+        html = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 60)))
+        whole = minify_html(html)
+        sizes = [rng.randint(1, 8) for _ in range(len(html))]
+        assert streamed(html, sizes) == whole, html
@@ -1,5 +1,10 @@
+import html
+
+from nodes.htmlnode import HTMLNode
 from nodes.textnode import TextNode, TextType
 from nodes.leafnode import LeafNode
+from nodes.parentnode import ParentNode
+from utils.text_to_nodes import INLINE_TOKEN_PATTERN, text_to_nodes
 
 
 def text_node_to_html(node: TextNode):
@@ -8,24 +13,40 @@ def text_node_to_html(node: TextNode):
             return LeafNode(value=node.text)
 
         case TextType.BOLD_TEXT:
-            return LeafNode(tag="b", value=node.text)
+            return nested_to_html("b", node.text)
 
         case TextType.ITALIC_TEXT:
-            return LeafNode(tag="i", value=node.text)
+            return nested_to_html("i", node.text)
 
         case TextType.CODE_TEXT:
             return LeafNode(tag="code", value=node.text)
 
         case TextType.LINK_TEXT:
-            return LeafNode(
-                tag="a",
-                value=node.text,
-                props={"href": node.url} if node.url else None,
-            )
+            return nested_to_html("a", node.text, asset_props("href", node))
 
         case TextType.IMAGE_TEXT:
             return LeafNode(
                 tag="img",
                 value=node.text,
-                props={"src": node.url} if node.url else None,
+                props=asset_props("src", node),
             )
+
+
+# bold, italic and link text may hold further inline markup ("[the **docs**](u)"),
+# it is parsed again into child nodes. text without any opening token stays a
+# single leaf, which is by far the common case
+def nested_to_html(tag: str, text: str, props: dict[str, str] | None = None) -> HTMLNode:
+    if INLINE_TOKEN_PATTERN.search(text) is None:
+        return LeafNode(tag=tag, value=text, props=props)
+    return ParentNode(tag, [text_node_to_html(child) for child in text_to_nodes(text)], props)
+
+
+# the url and title come straight from the markdown, escaped so a quote in
+# them cannot end the attribute early
+def asset_props(url_attribute: str, node: TextNode) -> dict[str, str] | None:
+    props = {}
+    if node.url:
+        props[url_attribute] = html.escape(node.url, quote=True)
+    if node.title is not None:
+        props["title"] = html.escape(node.title, quote=True)
+    return props or None
@@ -1,5 +1,6 @@
 from nodes.textnode import TextNode, TextType
 from utils.text_to_html import text_node_to_html
+from utils.text_to_nodes import text_to_nodes
 
 
 def test_text():
@@ -8,3 +9,20 @@ def test_text():
 
     assert html_node.tag is None
     assert html_node.value == "This is a text node"
+
+
+def test_link_with_title():
+    node = TextNode("docs", TextType.LINK_TEXT, "https://a.dev", "Read the docs")
+
+    assert (
+        text_node_to_html(node).to_html()
+        == '<a href="https://a.dev" title="Read the docs">docs</a>'
+    )
+
+
+def test_link_attributes_are_escaped():
+    nodes = text_to_nodes("""[a](http://u?x=1&y=2 'x" onclick="alert(1)')""")
+
+    assert text_node_to_html(nodes[0]).to_html() == (
+        '<a href="http://u?x=1&amp;y=2" title="x&quot; onclick=&quot;alert(1)">a</a>'
+    )
@@ -1,27 +1,100 @@
+import re
 from typing import List
 from nodes.textnode import TextNode, TextType
-from utils.asset_splitters import split_asset_nodes, AssetType
-from utils.split_nodes_delemeter import split_nodes_delemeter
+from utils.asset_splitters import AssetScanner
 
+# every token that can open an inline element
+INLINE_TOKEN_PATTERN = re.compile(r"\*\*|[_`\[]|!\[")
 
+DELIMITER_TYPES = {
+    "**": TextType.BOLD_TEXT,
+    "_": TextType.ITALIC_TEXT,
+    "`": TextType.CODE_TEXT,
+}
+
+
+# markup that a closing delimiter cannot be part of
+NESTED_TOKEN_PATTERN = re.compile(r"`|!?\[")
+
+
+# index of the delimiter that closes the span opened right before start.
+# code spans and links/images inside the span are jumped over, so a "_" in
+# a url or a "**" in inline code does not close it. -1 when nothing does
+def find_closer(text: str, token: str, start: int, scanner: AssetScanner) -> int:
+    if token == "`":
+        return text.find(token, start)
+
+    pos = start
+    close = text.find(token, pos)
+    while close != -1:
+        nested = NESTED_TOKEN_PATTERN.search(text, pos, close)
+        if nested is None:
+            return close
+
+        if nested.group() == "`":
+            code_close = text.find("`", nested.end())
+            # an unmatched backtick is plain text
+            pos = nested.end() if code_close == -1 else code_close + 1
+        elif (asset_match := scanner.match(nested.end() - 1)) is not None:
+            pos = asset_match.end
+        else:
+            pos = nested.end()
+
+        if pos > close:
+            close = text.find(token, pos)
+    return -1
+
+
+# single left to right scan over the text, jumping from one opening token to
+# the next. delimited spans and links/images are emitted as soon as they close,
+# unmatched tokens are kept as plain text instead of raising an error
 def text_to_nodes(text: str) -> List[TextNode]:
-    nodes = [TextNode(text=text, text_type=TextType.PLAIN)]
-    nodes = split_nodes_delemeter(
-        nodes,
-        "**",
-        TextType.BOLD_TEXT,
-    )
-    nodes = split_nodes_delemeter(nodes, "_", TextType.ITALIC_TEXT)
-    nodes = split_nodes_delemeter(
-        nodes,
-        "`",
-        TextType.CODE_TEXT,
-    )
-
-    nodes = split_asset_nodes(nodes, asset_type=AssetType.IMAGE)
-    nodes = split_asset_nodes(
-        nodes,
-        asset_type=AssetType.LINK,
-    )
+    nodes = []
+    plain_start = 0
+    pos = 0
+    # brackets are only paired up on the first link, most text never has one
+    scanner = AssetScanner(text)
+
+    while match := INLINE_TOKEN_PATTERN.search(text, pos):
+        start, end = match.span()
+        token = match.group()
+
+        if token in DELIMITER_TYPES:
+            close = find_closer(text, token, end, scanner)
+            if close == -1:
+                pos = end
+                continue
+
+            if plain_start < start:
+                nodes.append(TextNode(text[plain_start:start], TextType.PLAIN))
+            if close > end:
+                nodes.append(TextNode(text[end:close], DELIMITER_TYPES[token]))
+
+            pos = plain_start = close + len(token)
+            continue
+
+        # links are matched as a whole, so delimiters inside the
+        # link text no longer break them apart
+        is_image = token == "!["
+        asset_match = scanner.match(end - 1)
+        if asset_match is None:
+            pos = start + 1
+            continue
+
+        if plain_start < start:
+            nodes.append(TextNode(text[plain_start:start], TextType.PLAIN))
+
+        nodes.append(
+            TextNode(
+                text=asset_match.label,
+                text_type=TextType.IMAGE_TEXT if is_image else TextType.LINK_TEXT,
+                url=asset_match.url,
+                title=asset_match.title,
+            )
+        )
+        pos = plain_start = asset_match.end
+
+    if plain_start < len(text):
+        nodes.append(TextNode(text[plain_start:], TextType.PLAIN))
 
     return nodes
@@ -1,7 +1,12 @@
 from nodes.textnode import TextNode, TextType
+from utils.text_to_html import text_node_to_html
 from utils.text_to_nodes import text_to_nodes
 
 
+def render(text):
+    return "".join(text_node_to_html(node).to_html() for node in text_to_nodes(text))
+
+
 def test_plain_text_only():
     nodes = text_to_nodes("just normal text")
 
@@ -66,3 +71,69 @@ def test_node_order_is_preserved():
 
     texts = [node.text for node in nodes]
     assert texts == ["a ", "b", " c ", "d", " e ", "f", " g"]
+
+
+def test_unmatched_delimiters_stay_plain():
+    nodes = text_to_nodes("2 * 3 and a lone _ and a stray ` tick")
+
+    assert nodes == [TextNode("2 * 3 and a lone _ and a stray ` tick", TextType.PLAIN)]
+
+
+def test_unmatched_delimiter_after_match():
+    nodes = text_to_nodes("**bold** then **dangling")
+
+    assert nodes == [
+        TextNode("bold", TextType.BOLD_TEXT),
+        TextNode(" then **dangling", TextType.PLAIN),
+    ]
+
+
+def test_delimiters_inside_code_are_literal():
+    nodes = text_to_nodes("call `snake_case(**kwargs)` now")
+
+    assert nodes == [
+        TextNode("call ", TextType.PLAIN),
+        TextNode("snake_case(**kwargs)", TextType.CODE_TEXT),
+        TextNode(" now", TextType.PLAIN),
+    ]
+
+
+def test_bold_inside_link_keeps_link():
+    html = render("see [the **docs**](https://example.com/a_b_c) here")
+
+    assert html == 'see <a href="https://example.com/a_b_c">the <b>docs</b></a> here'
+
+
+def test_nested_spans_render_as_children():
+    html = render("see [the **docs**](http://x) and **bold _it_**")
+
+    assert html == 'see <a href="http://x">the <b>docs</b></a> and <b>bold <i>it</i></b>'
+
+
+def test_code_and_image_text_are_not_nested():
+    html = render("`**raw**` ![an _alt_](i.png)")
+
+    assert html == '<code>**raw**</code> <img src="i.png">an _alt_</img>'
+
+
+def test_unclosed_link_is_plain():
+    nodes = text_to_nodes("a [broken link and ![broken image")
+
+    assert nodes == [TextNode("a [broken link and ![broken image", TextType.PLAIN)]
+
+
+def test_empty_delimited_span_is_dropped():
+    nodes = text_to_nodes("a ____ b")
+
+    assert nodes == [
+        TextNode("a ", TextType.PLAIN),
+        TextNode(" b", TextType.PLAIN),
+    ]
+
+
+def test_closer_inside_link_or_code_does_not_close_the_span():
+    assert render("_see [docs](https://x.com/a_b)_ ok") == (
+        '<i>see <a href="https://x.com/a_b">docs</a></i> ok'
+    )
+    assert render("_[snake_case](http://x)_") == '<i><a href="http://x">snake_case</a></i>'
+    assert render("**run `a**b` now** x") == "<b>run <code>a**b</code> now</b> x"
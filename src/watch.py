@@ -0,0 +1,457 @@
+import argparse
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from build import build, setup_static_content
+from constants import (
+    CONTENT_DIR_PATH,
+    DEST_GENERATIONS_DIR_PATH,
+    DEST_STATIC_DIR_PATH,
+    KEEP_GENERATIONS,
+    MANIFEST_FILE_PATH,
+    SOURCE_STATIC_DIR_PATH,
+    TEMPLATE_FILE_PATH,
+)
+from generators.manifest import BuildManifest
+from generators.memory_output import MemoryOutput
+from generators.precompress import precompress_outputs
+from generators.page_gen import (
+    PageContent,
+    page_output_path,
+    parse_page,
+    write_output,
+    write_page,
+)
+from generators.template import clear_template_cache, load_template, template_fingerprint
+from serve import make_server
+from server.live_reload import LiveReload
+from utils.files.generations import OutputGenerations
+from utils.files.hashing import hash_file
+from utils.files.sync import place_file, scan_files, sync_dir, SyncMode
+
+# relative path -> (mtime_ns, size)
+Snapshot = dict[Path, tuple[int, int]]
+
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+
+def take_snapshot(root: Path) -> Snapshot:
+    return {
+        path: (stat.st_mtime_ns, stat.st_size)
+        for path, stat in scan_files(root).items()
+    }
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> dict[Path, str]:
+    changes = {path: ADDED for path in new.keys() - old.keys()}
+    changes.update({path: DELETED for path in old.keys() - new.keys()})
+    for path in old.keys() & new.keys():
+        if old[path] != new[path]:
+            changes[path] = MODIFIED
+    return changes
+
+
+# polls the sources and rebuilds only what a change affects. content edits
+# re-render the single page, static edits sync the single file and template
+# edits re-render every page from the parsed trees kept in memory.
+# every rebuild is written into a staging generation that is published like
+# a build, so the live output never holds half a rebuild.
+# with a memory output pages are rendered into it instead of dest_dir,
+# static files stay where they are and nothing touches the disk until flush
+class SiteWatcher:
+    def __init__(
+        self,
+        content_dir: Path = CONTENT_DIR_PATH,
+        static_dir: Path = SOURCE_STATIC_DIR_PATH,
+        template_path: Path = TEMPLATE_FILE_PATH,
+        dest_dir: Path = DEST_STATIC_DIR_PATH,
+        manifest_path: Path = MANIFEST_FILE_PATH,
+        generations_dir: Path = DEST_GENERATIONS_DIR_PATH,
+        keep_generations: int = KEEP_GENERATIONS,
+        interval: float = 0.5,
+        debounce: float = 0.2,
+        memory: MemoryOutput | None = None,
+        minify: bool = False,
+    ) -> None:
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.dest_dir = dest_dir
+        self.manifest_path = manifest_path
+        self.generations = OutputGenerations(dest_dir, generations_dir, keep=keep_generations)
+        # where outputs are written, the staging generation while one is open
+        self.output_dir = dest_dir
+        self.interval = interval
+        self.debounce = debounce
+        self.memory = memory
+        self.minify = minify
+        # set from another thread, the watch loop flushes on its next turn
+        self.flush_requested = threading.Event()
+
+        self.manifest = BuildManifest.load(manifest_path)
+        self.parsed: dict[Path, tuple[str, PageContent]] = {}
+        # outputs written or removed by the current apply
+        self.changed: set[Path] = set()
+        # partials the template included the last time it compiled
+        self.template_dependencies: list[Path] = []
+        self.snapshots = self.take_snapshots()
+
+    # a template that does not compile (a half typed block, a deleted
+    # partial) keeps the partials it last compiled with, so saving the fix
+    # is still noticed
+    def template_files(self) -> list[Path]:
+        try:
+            self.template_dependencies = load_template(self.template_path).dependencies
+        except Exception:
+            pass
+        return [self.template_path, *self.template_dependencies]
+
+    def take_snapshots(self) -> dict[str, Snapshot]:
+        template: Snapshot = {}
+        for path in self.template_files():
+            if path.exists():
+                stat = path.stat()
+                template[path] = (stat.st_mtime_ns, stat.st_size)
+
+        return {
+            "content": take_snapshot(self.content_dir),
+            "static": take_snapshot(self.static_dir),
+            "template": template,
+        }
+
+    # returns the changes since the last call, once the sources have been
+    # quiet for the debounce period so a burst of saves is handled once
+    def poll(self) -> dict[str, dict[Path, str]]:
+        current = self.take_snapshots()
+        if current == self.snapshots:
+            return {}
+
+        while True:
+            time.sleep(self.debounce)
+            settled = self.take_snapshots()
+            if settled == current:
+                break
+            current = settled
+
+        changes = {
+            kind: diff_snapshots(self.snapshots[kind], current[kind])
+            for kind in current
+        }
+        self.snapshots = current
+        return changes
+
+    # returns the output paths, relative to the destination, that were
+    # actually written or removed. pages rendered to identical html are not
+    def apply(self, changes: dict[str, dict[Path, str]]) -> list[str]:
+        self.changed = set()
+        if self.memory is not None:
+            self.update(changes)
+        else:
+            self.in_generation(lambda: self.update(changes))
+        return sorted(path.relative_to(self.dest_dir).as_posix() for path in self.changed)
+
+    # runs write in a new staging generation and publishes it with the
+    # manifest. variants of changed outputs are remade at the levels the
+    # last build used. when write fails the generation is thrown away and
+    # the manifest goes back to the one of the live output
+    def in_generation(self, write: Callable[[], None]) -> None:
+        staging = self.generations.stage()
+        self.output_dir = staging
+        try:
+            write()
+            if levels := self.manifest.compression_levels():
+                precompress_outputs(self.manifest, staging, self.dest_dir, levels)
+            self.manifest.save(self.manifest_path)
+        except BaseException:
+            self.generations.discard(staging)
+            self.manifest = BuildManifest.load(self.manifest_path)
+            raise
+        finally:
+            self.output_dir = self.dest_dir
+        self.generations.publish(staging, self.manifest_path)
+
+    # where a live output path is written right now
+    def staged(self, path: Path) -> Path:
+        return self.output_dir / path.relative_to(self.dest_dir)
+
+    def update(self, changes: dict[str, dict[Path, str]]) -> None:
+        page_changes = {
+            relative: action
+            for relative, action in changes.get("content", {}).items()
+            if relative.suffix == ".md"
+        }
+
+        if changes.get("template"):
+            # changed pages are parsed again, every other page is
+            # re-rendered from its cached tree
+            for relative, action in sorted(page_changes.items()):
+                if action == DELETED:
+                    self.update_page(relative, action)
+                else:
+                    self.parsed.pop(self.page_paths(relative)[0], None)
+            self.rerender_all()
+        else:
+            for relative, action in sorted(page_changes.items()):
+                self.update_page(relative, action)
+
+        for relative, action in sorted(changes.get("static", {}).items()):
+            self.update_static(relative, action)
+
+    def page_paths(self, relative: Path) -> tuple[Path, Path]:
+        source = self.content_dir / relative
+        return source, page_output_path(source, self.dest_dir / relative.parent)
+
+    def render(self, source: Path, output: Path, reparse: bool) -> None:
+        if reparse or source not in self.parsed:
+            self.parsed[source] = parse_page(source)
+
+        page_title, content = self.parsed[source]
+        entry = self.manifest.pages.get(str(source), {})
+        page_write = write_page(
+            load_template(self.template_path),
+            page_title=page_title,
+            content=content,
+            destination_file_path=self.staged(output),
+            previous_hash=entry.get("output_hash"),
+            memory=self.memory,
+            minify=self.minify,
+        )
+        if page_write.written:
+            self.changed.add(output)
+        else:
+            print(f"{output} is unchanged, not rewritten")
+        if self.memory is None:
+            self.manifest.record_page(
+                source, output, page_write.output_hash, page_write.size
+            )
+
+    def update_page(self, relative: Path, action: str) -> None:
+        source, output = self.page_paths(relative)
+
+        if action == DELETED:
+            print(f"Removing {output}")
+            self.changed.add(output)
+            self.parsed.pop(source, None)
+            if self.memory is not None:
+                self.memory.remove(output)
+                return
+            self.staged(output).unlink(missing_ok=True)
+            self.manifest.pages.pop(str(source), None)
+            return
+
+        print(f"Re-rendering {source} -> {output}")
+        self.render(source, output, reparse=True)
+
+    def pages(self) -> list[tuple[Path, Path]]:
+        return [
+            self.page_paths(relative)
+            for relative in sorted(self.snapshots["content"])
+            if relative.suffix == ".md"
+        ]
+
+    def render_all(self) -> None:
+        for source, output in self.pages():
+            self.render(source, output, reparse=False)
+
+    def rerender_all(self) -> None:
+        print("Template changed, re-rendering every page")
+        clear_template_cache()
+        self.manifest.template_hash = template_fingerprint(self.template_path)
+        self.render_all()
+
+    def update_static(self, relative: Path, action: str) -> None:
+        source, target = self.static_dir / relative, self.dest_dir / relative
+        staged_target = self.staged(target)
+        if self.memory is not None:
+            # served straight from the source, only open tabs need to know
+            self.changed.add(target)
+            return
+
+        if action == DELETED:
+            print(f"Removing {staged_target}")
+            staged_target.unlink(missing_ok=True)
+            self.manifest.remove_static(relative)
+            self.changed.add(target)
+            return
+
+        print(f"Copying file {source} -> {staged_target}")
+        place_file(source, staged_target, SyncMode.COPY)
+        file_hash = hash_file(staged_target)
+        if self.manifest.static.get(relative.as_posix(), {}).get("hash") != file_hash:
+            self.changed.add(target)
+        self.manifest.record_static(relative, file_hash, staged_target.stat().st_size)
+
+    # writes the pages held in memory and the static files to dest_dir, the
+    # way a build would, and records all of it in the manifest
+    def flush(self) -> None:
+        if self.memory is None:
+            return
+        print(f"Flushing {len(self.memory)} pages to {self.dest_dir}")
+        self.in_generation(self.write_memory)
+
+    def write_memory(self) -> None:
+        pages = self.pages()
+        stats = sync_dir(
+            src=self.static_dir,
+            dest=self.output_dir,
+            keep={self.staged(output) for _, output in pages}
+            | {self.output_dir / variant for variant in self.manifest.variants()},
+            mode=SyncMode.COPY,
+            known={Path(relative) for relative in self.manifest.static},
+        )
+        for relative, (file_hash, size) in stats.hashes.items():
+            self.manifest.record_static(relative, file_hash, size)
+        for relative in stats.deleted:
+            self.manifest.remove_static(relative)
+
+        for stale_output in self.manifest.remove_orphans({source for source, _ in pages}):
+            self.staged(stale_output).unlink(missing_ok=True)
+
+        written = 0
+        for source, output in pages:
+            page = self.memory.get(self.memory.relative(output))
+            if page is None:
+                continue
+            entry = self.manifest.pages.get(str(source), {})
+            page_write = write_output(
+                self.staged(output), page.data, page.output_hash, entry.get("output_hash")
+            )
+            written += page_write.written
+            self.manifest.record_page(source, output, page.output_hash, page_write.size)
+
+        self.manifest.template_hash = template_fingerprint(self.template_path)
+        self.manifest.minify = self.minify
+        print(
+            f"Flushed {written} changed pages and {len(stats.copied)} static files "
+            f"to {self.dest_dir}"
+        )
+
+    # on_change gets the output paths changed by every successful rebuild
+    def run(self, on_change: Callable[[list[str]], None] | None = None) -> None:
+        print(f"Watching {self.content_dir}, {self.static_dir} and {self.template_path}")
+        while True:
+            time.sleep(self.interval)
+            if self.flush_requested.is_set():
+                self.flush_requested.clear()
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Flush failed: {type(e).__name__}: {e}")
+
+            try:
+                changes = self.poll()
+                if not changes:
+                    continue
+                changed = self.apply(changes)
+            except Exception as e:
+                # a broken page must not stop the watcher, the next save retries
+                print(f"Rebuild failed: {type(e).__name__}: {e}")
+                continue
+
+            if on_change is not None and changed:
+                on_change(changed)
+
+
+# lines typed into the terminal while watching, "flush" writes the
+# in memory build to disk
+def read_commands(watcher: SiteWatcher) -> None:
+    for line in sys.stdin:
+        if line.strip() == "flush":
+            watcher.flush_requested.set()
+        elif line.strip():
+            print(f"Unknown command {line.strip()!r}, try flush")
+
+
+def watch(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the site and rebuild on change")
+    parser.add_argument("--interval", type=float, default=0.5)
+    parser.add_argument("--debounce", type=float, default=0.2)
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="also serve the site, open tabs reload when their page changes",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--bind", default="", help="address to listen on, all by default")
+    parser.add_argument(
+        "--memory",
+        action="store_true",
+        help="render pages into memory and serve them from there, type flush to write them",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="collapse whitespace and strip comments from the generated html",
+    )
+    args = parser.parse_args(argv)
+    if args.memory and not args.serve:
+        parser.error("--memory needs --serve, nothing else reads the pages")
+
+    if args.memory:
+        watcher = SiteWatcher(
+            interval=args.interval,
+            debounce=args.debounce,
+            memory=MemoryOutput(DEST_STATIC_DIR_PATH),
+            minify=args.minify,
+        )
+        watcher.render_all()
+        print(f"Rendered {len(watcher.memory)} pages into memory ({watcher.memory.size()} bytes)")
+        threading.Thread(target=read_commands, args=(watcher,), daemon=True).start()
+    else:
+        # staged and published like any other build, precompressed
+        # variants are kept at the levels they were made with
+        generations = OutputGenerations(
+            DEST_STATIC_DIR_PATH, DEST_GENERATIONS_DIR_PATH, keep=KEEP_GENERATIONS
+        )
+        staging = generations.stage()
+        try:
+            build(
+                output_dir=staging,
+                static_stats=setup_static_content(output_dir=staging),
+                minify=args.minify,
+            )
+        except BaseException:
+            generations.discard(staging)
+            raise
+        generations.publish(staging, MANIFEST_FILE_PATH)
+        watcher = SiteWatcher(
+            interval=args.interval, debounce=args.debounce, minify=args.minify
+        )
+
+    live_reload = None
+    server = None
+    if args.serve:
+        live_reload = LiveReload()
+        # in memory builds static files are served from their sources
+        root = SOURCE_STATIC_DIR_PATH if args.memory else DEST_STATIC_DIR_PATH
+        server = make_server(
+            root,
+            bind=args.bind,
+            port=args.port,
+            quiet=True,
+            live_reload=live_reload,
+            memory=watcher.memory,
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        url = f"http://{host or 'localhost'}:{port}"
+        print(f"Serving {'memory and ' if args.memory else ''}{root} on {url} with live reload")
+
+    try:
+        watcher.run(on_change=live_reload.publish if live_reload else None)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        if server is not None:
+            live_reload.close()
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    watch()
@@ -0,0 +1,263 @@
+import gzip
+
+import pytest
+
+from generators import page_gen
+from generators.manifest import BuildManifest
+from generators.memory_output import MemoryOutput
+from generators.precompress import precompress_outputs
+from watch import ADDED, DELETED, MODIFIED, SiteWatcher, diff_snapshots
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+@pytest.fixture
+def site(tmp_path):
+    write(tmp_path / "content" / "index.md", "# Home\n\nhello")
+    write(tmp_path / "content" / "blog" / "post.md", "# Post\n\nbody")
+    write(tmp_path / "static" / "index.css", "body {}")
+    write(tmp_path / "template.html", "<t>{{ Title }}</t>{{ Content }}")
+
+    return SiteWatcher(
+        content_dir=tmp_path / "content",
+        static_dir=tmp_path / "static",
+        template_path=tmp_path / "template.html",
+        dest_dir=tmp_path / "public",
+        manifest_path=tmp_path / "manifest.json",
+        generations_dir=tmp_path / "generations",
+        interval=0,
+        debounce=0,
+    )
+
+
+def test_diff_snapshots():
+    old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+    new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+
+    assert diff_snapshots(old, new) == {"b": MODIFIED, "c": DELETED, "d": ADDED}
+
+
+def test_no_changes(site):
+    assert site.poll() == {}
+
+
+def test_content_change_renders_only_that_page(site, tmp_path):
+    write(tmp_path / "content" / "blog" / "post.md", "# Post\n\nedited")
+
+    changes = site.poll()
+    site.apply(changes)
+
+    assert (tmp_path / "public" / "blog" / "post.html").read_text() == (
+        "<t>Post</t><div><h1>Post</h1><p>edited</p></div>"
+    )
+    assert not (tmp_path / "public" / "index.html").exists()
+    assert str(tmp_path / "content" / "blog" / "post.md") in site.manifest.pages
+
+
+def test_deleted_page_removes_output(site, tmp_path):
+    write(tmp_path / "content" / "index.md", "# Home\n\nagain")
+    site.apply(site.poll())
+    assert (tmp_path / "public" / "index.html").exists()
+
+    (tmp_path / "content" / "index.md").unlink()
+    site.apply(site.poll())
+
+    assert not (tmp_path / "public" / "index.html").exists()
+    assert site.manifest.pages == {}
+
+
+def test_static_change_syncs_only_that_file(site, tmp_path):
+    write(tmp_path / "static" / "index.css", "body { color: red }")
+
+    site.apply(site.poll())
+
+    assert (tmp_path / "public" / "index.css").read_text() == "body { color: red }"
+    assert not (tmp_path / "public" / "index.html").exists()
+
+
+def test_template_change_reuses_parsed_trees(site, tmp_path, monkeypatch):
+    write(tmp_path / "template.html", "<h>{{ Title }}</h>{{ Content }}")
+    site.apply(site.poll())
+    assert (tmp_path / "public" / "index.html").read_text().startswith("<h>Home</h>")
+
+    parsed = []
+    original = page_gen.parse_page
+    monkeypatch.setattr("watch.parse_page", lambda path: parsed.append(path) or original(path))
+
+    write(tmp_path / "template.html", "<xy>{{ Title }}</xy>{{ Content }}")
+    site.apply(site.poll())
+
+    assert parsed == []
+    assert (tmp_path / "public" / "blog" / "post.html").read_text() == (
+        "<xy>Post</xy><div><h1>Post</h1><p>body</p></div>"
+    )
+
+
+def test_apply_reports_only_outputs_that_changed(site, tmp_path):
+    write(tmp_path / "content" / "index.md", "# Home\n\nagain")
+    write(tmp_path / "static" / "index.css", "body { color: red }")
+    assert site.apply(site.poll()) == ["index.css", "index.html"]
+
+    # same html and same bytes, nothing for open tabs to reload
+    write(tmp_path / "content" / "index.md", "# Home\n\nagain\n")
+    write(tmp_path / "static" / "index.css", "body { color: red }")
+    (tmp_path / "static" / "index.css").touch()
+    assert site.apply(site.poll()) == []
+
+    (tmp_path / "content" / "index.md").unlink()
+    assert site.apply(site.poll()) == ["index.html"]
+
+
+def test_memory_build_renders_without_writing_until_flush(tmp_path):
+    write(tmp_path / "content" / "index.md", "# Home\n\nhello")
+    write(tmp_path / "content" / "blog" / "post.md", "# Post\n\nbody")
+    write(tmp_path / "static" / "index.css", "body {}")
+    write(tmp_path / "template.html", "<t>{{ Title }}</t>{{ Content }}")
+    memory = MemoryOutput(tmp_path / "public")
+    watcher = SiteWatcher(
+        content_dir=tmp_path / "content",
+        static_dir=tmp_path / "static",
+        template_path=tmp_path / "template.html",
+        dest_dir=tmp_path / "public",
+        manifest_path=tmp_path / "manifest.json",
+        generations_dir=tmp_path / "generations",
+        interval=0,
+        debounce=0,
+        memory=memory,
+    )
+
+    watcher.render_all()
+    write(tmp_path / "content" / "blog" / "post.md", "# Post\n\nedited")
+    write(tmp_path / "static" / "index.css", "body { color: red }")
+    assert watcher.apply(watcher.poll()) == ["blog/post.html", "index.css"]
+
+    assert memory.get("blog/post.html").data == (
+        b"<t>Post</t><div><h1>Post</h1><p>edited</p></div>"
+    )
+    assert not (tmp_path / "public").exists()
+    assert not (tmp_path / "manifest.json").exists()
+
+    watcher.flush()
+
+    assert (tmp_path / "public" / "blog" / "post.html").read_bytes() == (
+        memory.get("blog/post.html").data
+    )
+    assert (tmp_path / "public" / "index.css").read_text() == "body { color: red }"
+    manifest = BuildManifest.load(tmp_path / "manifest.json")
+    assert manifest.output_state(tmp_path / "public").keys() == {
+        "blog/post.html",
+        "index.css",
+        "index.html",
+    }
+
+    # a page deleted in memory is removed from disk on the next flush
+    (tmp_path / "content" / "blog" / "post.md").unlink()
+    watcher.apply(watcher.poll())
+    watcher.flush()
+    assert not (tmp_path / "public" / "blog" / "post.html").exists()
+
+
+def test_watcher_starts_with_a_broken_template(tmp_path):
+    write(tmp_path / "template.html", "{% if Title %}<t>{{ Title }}</t>")
+
+    watcher = SiteWatcher(
+        content_dir=tmp_path / "content",
+        static_dir=tmp_path / "static",
+        template_path=tmp_path / "template.html",
+        dest_dir=tmp_path / "public",
+        manifest_path=tmp_path / "manifest.json",
+        generations_dir=tmp_path / "generations",
+    )
+
+    assert watcher.template_files() == [tmp_path / "template.html"]
+
+
+class StopWatching(Exception):
+    pass
+
+
+def test_broken_template_does_not_stop_the_watcher(site, tmp_path, monkeypatch):
+    template, partial = tmp_path / "template.html", tmp_path / "partial.html"
+    included = '{% include "partial.html" %}{{ Content }}'
+    steps = [
+        lambda: write(partial, "<h>{{ Title }}</h>") or write(template, included),
+        lambda: partial.unlink(),
+        lambda: write(template, "{% if Title %}{{ Content }}"),
+        lambda: write(partial, "<h2>{{ Title }}</h2>") or write(template, included),
+    ]
+
+    # every interval runs the next step, the debounce waits are skipped
+    def sleep(seconds):
+        if seconds == site.interval:
+            if not steps:
+                raise StopWatching
+            steps.pop(0)()
+
+    monkeypatch.setattr("watch.time.sleep", sleep)
+    site.interval = 1
+    rebuilds = []
+    with pytest.raises(StopWatching):
+        site.run(on_change=rebuilds.append)
+
+    assert rebuilds == [["blog/post.html", "index.html"]] * 2
+    assert (tmp_path / "public" / "index.html").read_text() == (
+        "<h2>Home</h2><div><h1>Home</h1><p>hello</p></div>"
+    )
+
+
+def test_rebuilds_are_published_as_new_generations(site, tmp_path):
+    write(tmp_path / "content" / "index.md", "# Home\n\nfirst")
+    site.apply(site.poll())
+    first = site.generations.current()
+
+    write(tmp_path / "content" / "index.md", "# Home\n\nsecond")
+    site.apply(site.poll())
+    second = site.generations.current()
+
+    assert first != second
+    # the old generation is left as it was, it still has its own page
+    assert "first" in (first / "index.html").read_text()
+    assert "second" in (tmp_path / "public" / "index.html").read_text()
+    assert site.generations.manifest_path(second).read_text() == (
+        (tmp_path / "manifest.json").read_text()
+    )
+
+
+def test_failed_rebuild_leaves_the_live_output(site, tmp_path, monkeypatch):
+    write(tmp_path / "content" / "index.md", "# Home\n\nfirst")
+    site.apply(site.poll())
+    live, generations = site.generations.current(), site.generations.generations()
+
+    def broken(path):
+        raise ValueError("broken page")
+
+    monkeypatch.setattr("watch.parse_page", broken)
+    write(tmp_path / "content" / "blog" / "post.md", "# Post\n\nedited")
+    write(tmp_path / "content" / "index.md", "# Home\n\nsecond")
+    with pytest.raises(ValueError):
+        site.apply(site.poll())
+
+    assert site.generations.current() == live
+    assert site.generations.generations() == generations
+    assert "first" in (tmp_path / "public" / "index.html").read_text()
+    assert site.manifest.pages.keys() == {str(tmp_path / "content" / "index.md")}
+
+
+def test_rebuild_keeps_precompressed_variants(site, tmp_path):
+    write(tmp_path / "content" / "index.md", "# Home\n\n" + "hello " * 100)
+    write(tmp_path / "content" / "blog" / "post.md", "# Post\n\n" + "body " * 100)
+    site.apply(site.poll())
+    precompress_outputs(site.manifest, tmp_path / "public", tmp_path / "public", {"gzip": 6})
+    site.manifest.save(tmp_path / "manifest.json")
+
+    write(tmp_path / "content" / "blog" / "post.md", "# Post\n\n" + "edited " * 100)
+    site.apply(site.poll())
+
+    public = tmp_path / "public"
+    assert (public / "index.html.gz").exists()
+    assert gzip.decompress((public / "blog" / "post.html.gz").read_bytes()) == (
+        (public / "blog" / "post.html").read_bytes()
+    )